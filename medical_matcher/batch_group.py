@@ -0,0 +1,288 @@
+"""
+批量分组：读取出院病案（CSV/XLSX），按目录匹配 DIP 分组，
+输出每条病案的 DIP 分组编码、分值及城乡/职工盈亏平衡值。
+
+用法:
+    python medical_matcher/batch_group.py 病案.xlsx -o 分组结果.csv --rural 8 --worker 10 --weight 0.889
+"""
+import argparse
+import copy
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core.balance import balance_values
+from utils.data_handler import DataHandler
+
+RESULT_COLUMNS = ('DIP分组编码', '病种名称', '分值', '城乡盈亏平衡值', '职工盈亏平衡值')
+
+
+def _text(value):
+    if value is None or value != value:  # None 或 NaN
+        return ''
+    return str(value).strip()
+
+
+class BatchGrouper:
+    """按病种编码和手术编码对病案分组"""
+
+    def __init__(self, data_handler, rural_value=1.0, worker_value=1.0, weight_value=1.0,
+                 diagnosis_col='病种编码', main_col='主要手术编码', other_col='其他手术编码'):
+        self.data_handler = data_handler
+        self.matcher = data_handler.matcher
+        self.rural_value = rural_value
+        self.worker_value = worker_value
+        self.weight_value = weight_value
+        self.diagnosis_col = diagnosis_col
+        self.main_col = main_col
+        self.other_col = other_col
+
+    def with_params(self, rural_value, worker_value, weight_value):
+        """参数不同、共享目录和匹配器的分组器"""
+        grouper = copy.copy(self)
+        grouper.rural_value = rural_value
+        grouper.worker_value = worker_value
+        grouper.weight_value = weight_value
+        return grouper
+
+    def match_record(self, record):
+        """匹配单条病案，返回分组或None"""
+        disease_code = _text(record.get(self.diagnosis_col))
+        user_input = {
+            'main_surgery': _text(record.get(self.main_col)),
+            'other_surgeries': _text(record.get(self.other_col)),
+        }
+        group = self.matcher.best(user_input, disease_code=disease_code)
+        if group is not None:
+            return group
+
+        # match_group 要求其他手术至少命中一项；没有其他手术的组合在这里按
+        # 同样的主要手术规则匹配，未做手术的病案归入该病种的保守治疗组合
+        main_codes, _ = self.matcher.parse_input(user_input)
+        fallback = None
+        for candidate in self.matcher.disease_groups(disease_code):
+            if candidate.other_surgeries:
+                continue
+            if user_input['main_surgery']:
+                matched = all(code in candidate.main_surgeries for code in main_codes)
+            else:
+                matched = not candidate.main_surgeries and not user_input['other_surgeries']
+            if matched and (fallback is None or candidate.score > fallback.score):
+                fallback = candidate
+        return fallback
+
+    def group_record(self, record):
+        """返回病案的分组结果字段"""
+        group = self.match_record(record)
+        if group is None:
+            return dict.fromkeys(RESULT_COLUMNS, '')
+
+        rural_balance, worker_balance = balance_values(
+            group.score, self.data_handler.is_basic_level_disease(group.disease_name),
+            self.rural_value, self.worker_value, self.weight_value
+        )
+        return {
+            'DIP分组编码': group.dip_code,
+            '病种名称': group.disease_name,
+            '分值': group.score,
+            '城乡盈亏平衡值': round(rural_balance, 2),
+            '职工盈亏平衡值': round(worker_balance, 2),
+        }
+
+    def group_records(self, records):
+        return [self.group_record(record) for record in records]
+
+
+# 子进程中的分组器，每个进程只在启动时加载一次目录
+_worker_grouper = None
+
+
+def _init_worker(grouper_args):
+    global _worker_grouper
+    _worker_grouper = BatchGrouper(DataHandler(), *grouper_args)
+
+
+def _group_chunk(records, params=None):
+    """params 为 (城乡分值, 职工分值, 权重系数) 时按该参数计算，否则使用进程启动时的参数"""
+    grouper = _worker_grouper if params is None else _worker_grouper.with_params(*params)
+    return grouper.group_records(records)
+
+
+def group_chunks(chunks, grouper_args, workers):
+    """
+    分块分组，按输入顺序返回 (病案块, 结果块)
+    Args:
+        chunks: 病案块的迭代器
+        grouper_args: BatchGrouper 除 data_handler 外的参数
+        workers: 进程数，1 表示在当前进程中分组
+    """
+    if workers <= 1:
+        grouper = BatchGrouper(DataHandler(), *grouper_args)
+        for records in chunks:
+            yield records, grouper.group_records(records)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(grouper_args,)) as executor:
+        # 最多同时提交 2 倍进程数的块，既让每个进程都有活干，又限制内存
+        pending = deque()
+        for records in chunks:
+            pending.append((records, executor.submit(_group_chunk, records)))
+            if len(pending) >= workers * 2:
+                records, future = pending.popleft()
+                yield records, future.result()
+        while pending:
+            records, future = pending.popleft()
+            yield records, future.result()
+
+
+def read_records(path, chunk_size):
+    """按块读取病案，每块为字典列表"""
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [_text(name) for name in next(rows, ())]
+            chunk = []
+            for values in rows:
+                chunk.append(dict(zip(header, values)))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            workbook.close()
+    else:
+        import pandas as pd
+        # 编码按文本读取，避免 34.2000 之类被转成数字
+        for df in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size):
+            yield df.to_dict('records')
+
+
+class ResultWriter:
+    """按块写出结果，CSV 或 XLSX"""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+        self._is_excel = path.lower().endswith('.xlsx')
+        if self._is_excel:
+            from openpyxl import Workbook
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+        else:
+            # utf-8-sig 便于 Excel 直接打开中文 CSV
+            self._file = open(path, 'w', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._file)
+
+    def write(self, records, results):
+        for record, result in zip(records, results):
+            if self.header is None:
+                self.header = list(record) + [name for name in RESULT_COLUMNS if name not in record]
+                self._write_row(self.header)
+            row = dict(record)
+            row.update(result)
+            self._write_row([row.get(name, '') for name in self.header])
+
+    def _write_row(self, values):
+        if self._is_excel:
+            self._sheet.append(values)
+        else:
+            self._writer.writerow(values)
+
+    def close(self):
+        if self._is_excel:
+            self._workbook.save(self.path)
+        else:
+            self._file.close()
+
+
+def peak_memory_mb(children=False):
+    """进程峰值内存（MB），children 为 True 时返回子进程中的最大值"""
+    try:
+        import resource
+    except ImportError:
+        # Windows 没有 resource 模块，退回到 tracemalloc 统计的 Python 内存峰值
+        import tracemalloc
+        if children or not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def load_saved_params(path='params.json'):
+    """读取首页保存的参数，读取失败时使用默认值"""
+    try:
+        with open(path, 'r') as f:
+            params = json.load(f)
+        return (float(params.get('rural_urban', 1.0)), float(params.get('worker', 1.0)),
+                float(params.get('weight', 1.0)))
+    except (OSError, ValueError):
+        return 1.0, 1.0, 1.0
+
+
+def parse_args(argv=None):
+    rural, worker, weight = load_saved_params()
+    parser = argparse.ArgumentParser(description="批量匹配出院病案的 DIP 分组")
+    parser.add_argument('input', help="病案文件（.csv 或 .xlsx）")
+    parser.add_argument('-o', '--output', help="结果文件（.csv 或 .xlsx），默认为 输入文件名_分组结果.csv")
+    parser.add_argument('--rural', type=float, default=rural, help="城乡分值")
+    parser.add_argument('--worker', type=float, default=worker, help="职工分值")
+    parser.add_argument('--weight', type=float, default=weight, help="权重系数")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="每块读取的病案数")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="分组进程数，默认为CPU核数，1 表示不使用进程池")
+    parser.add_argument('--diagnosis-col', default='病种编码', help="诊断编码列名")
+    parser.add_argument('--main-col', default='主要手术编码', help="主要手术编码列名")
+    parser.add_argument('--other-col', default='其他手术编码', help="其他手术编码列名（多个编码用/分隔）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = args.output or f"{os.path.splitext(args.input)[0]}_分组结果.csv"
+
+    if sys.platform == 'win32':
+        # Windows 没有 resource 模块，峰值内存改由 tracemalloc 统计（见 peak_memory_mb）
+        import tracemalloc
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    grouper_args = (args.rural, args.worker, args.weight,
+                    args.diagnosis_col, args.main_col, args.other_col)
+
+    total = matched = 0
+    writer = ResultWriter(output)
+    try:
+        chunks = read_records(args.input, args.chunk_size)
+        for records, results in group_chunks(chunks, grouper_args, args.workers):
+            writer.write(records, results)
+            total += len(records)
+            matched += sum(1 for result in results if result['DIP分组编码'])
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"结果已写入 {output}")
+    print(f"病案 {total} 条，匹配 {matched} 条，未匹配 {total - matched} 条")
+    print(f"进程数 {max(args.workers, 1)}，耗时 {elapsed:.2f}s（含目录加载），"
+          f"吞吐量 {total / elapsed if elapsed > 0 else 0:.0f} 条/秒")
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"峰值内存 {peak:.1f} MB")
+    peak = peak_memory_mb(children=True) if args.workers > 1 else None
+    if peak:
+        print(f"子进程峰值内存 {peak:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
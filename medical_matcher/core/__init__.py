@@ -0,0 +1,16 @@
+"""
+无界面的核心层：目录加载、病种/手术查询、组合匹配和盈亏平衡值计算
+
+不导入 tkinter 和 matplotlib；NumPy 在加载目录（创建 CatalogService）时才导入。
+"""
+from core.balance import DEFAULT_PARAMS, balance_range, balance_values
+from core.service import DISEASE_SORT_COLUMNS, GROUP_SORT_COLUMNS, CatalogService
+
+__all__ = [
+    'CatalogService',
+    'DEFAULT_PARAMS',
+    'DISEASE_SORT_COLUMNS',
+    'GROUP_SORT_COLUMNS',
+    'balance_range',
+    'balance_values',
+]
@@ -0,0 +1,22 @@
+DEFAULT_PARAMS = (1.0, 1.0, 1.0)  # (城乡分值, 职工分值, 权重系数)
+
+# 结果链路图的区间：盈亏平衡值的 0.6 倍到 2 倍
+RANGE_LOW = 0.6
+RANGE_HIGH = 2.0
+
+
+def balance_values(score, is_basic, rural_value, worker_value, weight_value):
+    """
+    单个分值的城乡、职工盈亏平衡值
+    基层病种：分值 × 城乡/职工分值；其他病种：分值 × 权重系数 × 城乡/职工分值
+    Returns:
+        (城乡盈亏平衡值, 职工盈亏平衡值)
+    """
+    if not is_basic:
+        score = score * weight_value
+    return score * rural_value, score * worker_value
+
+
+def balance_range(balance):
+    """(下限, 盈亏平衡值, 上限)"""
+    return balance * RANGE_LOW, balance, balance * RANGE_HIGH
@@ -0,0 +1,217 @@
+from core.balance import DEFAULT_PARAMS, balance_range, balance_values
+from utils.balance_engine import BalanceEngine
+from utils.data_handler import DataHandler
+
+# 病种列表可排序的列
+DISEASE_SORT_COLUMNS = ('standard_score', 'name')
+# 病种下组合列表的列：(主要手术, 其他手术, 操作数, 分值, 城乡盈亏平衡值, 行号)
+GROUP_SORT_COLUMNS = ('main_surgery', 'other_surgery', 'surgery_count', 'score', 'rural_balance')
+
+
+class CatalogService:
+    """
+    目录查询与计算服务
+
+    把界面中的病种过滤、组合列表、组合筛选、匹配和盈亏平衡值计算集中在这里，
+    不依赖 tkinter，可以在脚本、批处理或服务中直接使用，界面只负责显示。
+    每个实例有自己的参数和盈亏平衡值数组；多个实例可共享同一个 DataHandler（目录数据只读）。
+    """
+
+    def __init__(self, data_handler=None, store=None, params=DEFAULT_PARAMS):
+        """
+        Args:
+            data_handler: 已加载的 DataHandler，不指定时加载目录快照（或 store 指定的目录库）
+            store: 可选的 SQLite 目录库，见 DataHandler
+            params: 初始参数 (城乡分值, 职工分值, 权重系数)
+        """
+        self.data_handler = data_handler if data_handler is not None else DataHandler(store=store)
+        self.groups = self.data_handler.groups
+        self.disease_index = self.data_handler.disease_index
+        # 病种名称 -> 标准分值（按名称排序），每次过滤都要用，只计算一次
+        self.standard_scores = self.disease_index.standard_scores()
+        # 全部组合的盈亏平衡值，参数变化时一次性重新计算（最近用过的参数直接取缓存）
+        self.balance_engine = BalanceEngine(self.groups, self.data_handler.is_basic_level_disease,
+                                            version=self.fingerprint)
+        self.balance_engine.update(*params)
+
+    @property
+    def fingerprint(self):
+        """目录版本（源文件指纹），目录更新后会变化"""
+        return self.data_handler.fingerprint
+
+    # ---- 参数与盈亏平衡值 ----
+
+    @property
+    def params(self):
+        """当前参数 (城乡分值, 职工分值, 权重系数)"""
+        return self.balance_engine.params
+
+    def set_params(self, rural_value, worker_value, weight_value):
+        """
+        更新参数并重新计算全部组合的盈亏平衡值
+        Returns:
+            bool: 参数是否有变化
+        """
+        return self.balance_engine.update(rural_value, worker_value, weight_value)
+
+    def is_basic(self, disease_name):
+        return self.data_handler.is_basic_level_disease(disease_name)
+
+    def row_of(self, group):
+        """组合在目录中的行号，可作为界面中的行id"""
+        return self.balance_engine.row_of(group)
+
+    def balance(self, group):
+        """组合按当前参数的 (城乡盈亏平衡值, 职工盈亏平衡值)"""
+        return self.balance_engine.rural_balance(group), self.balance_engine.worker_balance(group)
+
+    def score_balance(self, score, disease_name, params=None):
+        """任意分值按病种是否基层病种、当前（或指定）参数计算 (城乡, 职工) 盈亏平衡值"""
+        return balance_values(score, self.is_basic(disease_name), *(params or self.params))
+
+    def balance_ranges(self, group):
+        """结果链路图的数据：((城乡下限, 平衡值, 上限), (职工下限, 平衡值, 上限))"""
+        rural_balance, worker_balance = self.balance(group)
+        return balance_range(rural_balance), balance_range(worker_balance)
+
+    def combination_balances(self, group, base_score):
+        """
+        组合卡片的盈亏平衡值及相对基准分值的提升值
+        Returns:
+            ((城乡盈亏平衡值, 提升值), (职工盈亏平衡值, 提升值))，分值不高于基准分值时提升值为None
+        """
+        rural_balance, worker_balance = self.balance(group)
+        if group.score <= base_score:
+            return (rural_balance, None), (worker_balance, None)
+        rural_increase, worker_increase = self.score_balance(group.score - base_score, group.disease_name)
+        return (rural_balance, rural_increase), (worker_balance, worker_increase)
+
+    # ---- 病种 ----
+
+    def diseases(self, search_text='', sort=None, reverse=False):
+        """
+        按名称子串或拼音/首字母过滤病种
+        Args:
+            search_text: 搜索文本（小写），为空时返回全部
+            sort: 排序列（DISEASE_SORT_COLUMNS 之一），None 时按名称
+        Returns:
+            list: [(标准分值, 病种名称)]
+        """
+        pinyin_matches = self.data_handler.search_pinyin(search_text) if search_text else set()
+        items = [
+            (score, name)
+            for name, score in self.standard_scores.items()
+            if search_text in name.lower() or name in pinyin_matches
+        ]
+        if sort:
+            column = DISEASE_SORT_COLUMNS.index(sort)
+            try:
+                items.sort(key=lambda item: float(item[column]) if column == 0 else item[column],
+                           reverse=reverse)
+            except (TypeError, ValueError):
+                items.sort(key=lambda item: str(item[column]), reverse=reverse)
+        return items
+
+    def disease_names(self, search_text=''):
+        """按名称子串或拼音/首字母过滤病种名称（按名称排序）"""
+        return [name for _, name in self.diseases(search_text)]
+
+    def disease_summary(self, disease_name):
+        """
+        病种汇总信息，病种不存在时返回None
+        Returns:
+            dict: name, is_basic, standard_score（保守治疗或最低分值）, min_score, max_score, group_count
+        """
+        entry = self.disease_index.get(disease_name)
+        if entry is None:
+            return None
+        return {
+            'name': entry.name,
+            'is_basic': entry.is_basic,
+            'standard_score': entry.standard_score,
+            'min_score': entry.min_score,
+            'max_score': entry.max_score,
+            'group_count': entry.group_count,
+        }
+
+    def standard_balance(self, disease_name, params=None):
+        """
+        病种标准分值及其盈亏平衡值（分值对比用）
+        Returns:
+            (标准分值, 城乡盈亏平衡值, 职工盈亏平衡值)，病种不存在时返回None
+        """
+        score = self.disease_index.standard_score(disease_name)
+        if score is None:
+            return None
+        return (score,) + self.score_balance(score, disease_name, params)
+
+    # ---- 组合 ----
+
+    def disease_groups(self, disease_name, search_text='', sort=None, reverse=False):
+        """
+        病种下的组合列表，可按手术名称子串过滤
+        Args:
+            search_text: 搜索文本（小写），在主要手术和其他手术名称中查找
+            sort: 排序列（GROUP_SORT_COLUMNS 之一），None 时保持目录顺序
+        Returns:
+            list: [(主要手术, 其他手术, 操作数, 分值, 城乡盈亏平衡值, 行号)]
+        """
+        rural_balances = self.balance_engine.rural_balances
+        items = []
+        for group in self.disease_index.groups_of(disease_name):
+            if (search_text and search_text not in group.main_surgeries_lower and
+                    search_text not in group.other_surgeries_lower):
+                continue
+            row = self.row_of(group)
+            items.append((
+                group.main_surgeries_text,
+                group.other_surgeries_names,
+                group.surgery_count,
+                group.score,
+                float(rural_balances[row]),
+                row,
+            ))
+        if sort:
+            column = GROUP_SORT_COLUMNS.index(sort)
+            items.sort(
+                key=lambda item: float(item[column]) if isinstance(item[column], (int, float)) else item[column],
+                reverse=reverse
+            )
+        return items
+
+    def combinations(self, disease_name, search_terms=(), surgery_counts=(1, 2, 3)):
+        """
+        病种的手术组合推荐：按操作数和搜索词（全部命中）过滤，按分值从高到低排序
+        Args:
+            search_terms: 小写搜索词，在组合的全部手术名称中查找
+            surgery_counts: 保留的操作数
+        """
+        groups = [
+            group for group in self.disease_index.groups_of(disease_name)
+            if group.surgery_count in surgery_counts and
+            all(term in group.search_text for term in search_terms)
+        ]
+        groups.sort(key=lambda group: group.score, reverse=True)
+        return groups
+
+    def search_surgeries(self, search_text):
+        """按手术名称子串（或拼音、首字母）搜索组合，保持目录顺序"""
+        return self.data_handler.search_surgeries(search_text)
+
+    def filter_groups(self, **conditions):
+        """按病种、分值范围、基层病种、操作数筛选组合，见 DataHandler.filter_groups"""
+        return self.data_handler.filter_groups(**conditions)
+
+    def match(self, user_input, top_k=1, disease_code=None):
+        """
+        按手术编码匹配组合
+        Args:
+            user_input: {'main_surgery': 'a/b', 'other_surgeries': 'c/d'}
+        Returns:
+            list: [(组合, 命中的其他手术个数)]
+        """
+        return self.data_handler.matcher.match(user_input, top_k=top_k, disease_code=disease_code)
+
+    def match_group(self, user_input, disease_code=None):
+        """最佳匹配组合，没有匹配时返回None"""
+        return self.data_handler.matcher.best(user_input, disease_code=disease_code)
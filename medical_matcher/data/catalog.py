@@ -0,0 +1,257 @@
+import mmap
+import numbers
+import os
+import runpy
+import struct
+import sys
+from array import array
+
+# 目录快照：把 surgery_data.py 中的字典列表编译成按列存储的二进制文件，
+# 启动时通过 mmap 直接映射，避免每次解析执行四万多行的 Python 字面量。
+#
+# 文件布局（全部按 8 字节对齐，整数为本机字节序）：
+#   文件头   MAGIC, 版本, 行数, 列数, 字符串数, 指纹长度, 字符串区长度
+#   指纹     源文件的 路径|大小|修改时间，不一致时自动重建
+#   列目录   每列: 列名字符串id, 类型码, 数据偏移
+#   字符串区 以 '\0' 分隔的 UTF-8 字符串表
+#   列数据   'q' 整数列 / 'd' 浮点列 / 'I' 字符串列（存字符串表中的id）
+
+MAGIC = b'DIPCAT\x00\x01'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sIIIIIQ')
+_COLUMN = struct.Struct('<I4sQ')
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_MODULE = os.path.join(DATA_DIR, 'surgery_data.py')
+SOURCE_EXCEL = os.path.join(DATA_DIR, 'surgery_data.xlsx')
+SNAPSHOT_PATH = os.path.join(DATA_DIR, 'surgery_data.bin')
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _is_missing(value):
+    # None 或 NaN（NaN 不等于自身）
+    return value is None or value != value
+
+
+class Catalog:
+    """按列存储的目录数据，列为类型化数组，字符串列存字符串表id"""
+
+    def __init__(self, columns, arrays, strings, fingerprint='', buffer=None):
+        self.columns = list(columns)
+        self.strings = strings
+        self.fingerprint = fingerprint
+        self._arrays = dict(zip(self.columns, arrays))
+        self._typecodes = {
+            name: getattr(values, 'typecode', None) or values.format
+            for name, values in self._arrays.items()
+        }
+        self._buffer = buffer  # 持有 mmap，保证列视图有效
+
+    def __len__(self):
+        if not self.columns:
+            return 0
+        return len(self._arrays[self.columns[0]])
+
+    def close(self):
+        """释放 mmap（之后不能再访问列数据）"""
+        if self._buffer is not None:
+            # 先释放列视图，否则 mmap 仍有导出的缓冲区，close() 会抛出 BufferError
+            for values in self._arrays.values():
+                if isinstance(values, memoryview):
+                    values.release()
+            self._arrays.clear()
+            try:
+                self._buffer.close()
+            except BufferError:
+                pass  # 其他对象（如由列数据创建的数组）仍引用映射，随它们一起释放
+            self._buffer = None
+
+    def typecode(self, name):
+        return self._typecodes[name]
+
+    def column(self, name):
+        """返回某列的值列表，字符串列会解析为字符串"""
+        values = self._arrays[name]
+        if self.typecode(name) == 'I':
+            strings = self.strings
+            return [strings[i] for i in values]
+        return list(values)
+
+    def rows(self):
+        """逐行生成与 SURGERY_DATA 相同结构的字典"""
+        names = self.columns
+        data = [self.column(name) for name in names]
+        for values in zip(*data):
+            yield dict(zip(names, values))
+
+    def records(self):
+        return list(self.rows())
+
+    def content_hash(self):
+        """
+        目录内容的哈希（字符串表和各列数据，不含源文件指纹），
+        源文件只是移动或修改时间变化时不变，作为派生索引缓存的键
+        """
+        import hashlib  # 加载 OpenSSL 需要几毫秒，只在计算哈希时导入
+        h = hashlib.sha1()
+        h.update('\x00'.join(self.strings).encode('utf-8'))
+        for name in self.columns:
+            h.update(f'\x00{name}:{self.typecode(name)}\x00'.encode('utf-8'))
+            h.update(memoryview(self._arrays[name]).cast('B'))
+        return h.hexdigest()
+
+    @classmethod
+    def from_records(cls, records, fingerprint=''):
+        """由字典列表构建目录，自动推断每列的存储类型"""
+        columns = []
+        for record in records:
+            for name in record:
+                if name not in columns:
+                    columns.append(name)
+
+        strings = []
+        string_ids = {}
+
+        def intern(text):
+            sid = string_ids.get(text)
+            if sid is None:
+                sid = string_ids[text] = len(strings)
+                strings.append(text)
+            return sid
+
+        # 列名也放入字符串表
+        for name in columns:
+            intern(name)
+
+        arrays = []
+        for name in columns:
+            values = [record.get(name) for record in records]
+            present = [v for v in values if not _is_missing(v)]
+            numeric = all(isinstance(v, numbers.Real) and not isinstance(v, bool) for v in present)
+            if present and numeric and len(present) == len(values) \
+                    and all(isinstance(v, numbers.Integral) for v in present):
+                arrays.append(array('q', [int(v) for v in values]))
+            elif present and numeric:
+                arrays.append(array('d', [float('nan') if _is_missing(v) else float(v) for v in values]))
+            else:
+                arrays.append(array('I', [intern('' if _is_missing(v) else str(v)) for v in values]))
+        return cls(columns, arrays, strings, fingerprint)
+
+    def save(self, path):
+        """写入快照文件（先写临时文件再替换，避免读到半个文件）"""
+        fingerprint = self.fingerprint.encode('utf-8')
+        names = [self.strings.index(name) for name in self.columns]
+        blob = '\x00'.join(self.strings).encode('utf-8')
+
+        offset = _align(_HEADER.size) + _align(len(fingerprint)) \
+            + _align(_COLUMN.size * len(self.columns)) + _align(len(blob))
+        directory = []
+        chunks = []
+        for name, sid in zip(self.columns, names):
+            data = self._arrays[name].tobytes()
+            directory.append(_COLUMN.pack(sid, self.typecode(name).encode('ascii').ljust(4, b'\x00'), offset))
+            chunks.append(data)
+            offset += _align(len(data))
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_pad(_HEADER.pack(MAGIC, VERSION, len(self), len(self.columns),
+                                      len(self.strings), len(fingerprint), len(blob))))
+            f.write(_pad(fingerprint))
+            f.write(_pad(b''.join(directory)))
+            f.write(_pad(blob))
+            for data in chunks:
+                f.write(_pad(data))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path):
+        """通过 mmap 打开快照文件"""
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        magic, version, n_rows, n_cols, n_strings, fp_len, blob_len = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"无效的目录快照: {path}")
+
+        pos = _align(_HEADER.size)
+        fingerprint = bytes(view[pos:pos + fp_len]).decode('utf-8')
+        pos += _align(fp_len)
+        directory = [_COLUMN.unpack_from(view, pos + i * _COLUMN.size) for i in range(n_cols)]
+        pos += _align(_COLUMN.size * n_cols)
+        strings = bytes(view[pos:pos + blob_len]).decode('utf-8').split('\x00') if n_strings else []
+        if len(strings) != n_strings:
+            raise ValueError(f"目录快照字符串表损坏: {path}")
+
+        columns = []
+        arrays = []
+        for sid, code, offset in directory:
+            code = code.rstrip(b'\x00').decode('ascii')
+            size = array(code).itemsize * n_rows
+            if offset + size > len(view):
+                raise ValueError(f"目录快照不完整: {path}")
+            columns.append(strings[sid])
+            arrays.append(view[offset:offset + size].cast(code))
+        return cls(columns, arrays, strings, fingerprint, buffer)
+
+
+def _pad(data):
+    return data + b'\x00' * (_align(len(data)) - len(data))
+
+
+def source_fingerprint(sources):
+    """根据源文件的大小和修改时间生成指纹"""
+    parts = [sys.byteorder]
+    for path in sources:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            parts.append(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}")
+    return ';'.join(parts)
+
+
+def _read_source(path):
+    """从源文件读取字典列表"""
+    if path.endswith(('.xlsx', '.xls')):
+        import pandas as pd
+        df = pd.read_excel(path, engine='openpyxl')
+        return df.to_dict('records')
+    return runpy.run_path(path)['SURGERY_DATA']
+
+
+def load_catalog(snapshot_path=SNAPSHOT_PATH, sources=None):
+    """
+    加载目录快照，源文件有变化时自动重建
+    Args:
+        snapshot_path: 快照文件路径
+        sources: 源文件列表，默认为 surgery_data.py 和同目录下的 surgery_data.xlsx
+    Returns:
+        Catalog: 目录数据
+    """
+    if sources is None:
+        sources = [SOURCE_MODULE, SOURCE_EXCEL]
+    expected, sources = sources, [path for path in sources if os.path.exists(path)]
+    fingerprint = source_fingerprint(sources)
+
+    if os.path.exists(snapshot_path):
+        try:
+            catalog = Catalog.open(snapshot_path)
+            if catalog.fingerprint == fingerprint:
+                return catalog
+            catalog.close()
+        except (OSError, ValueError, struct.error):
+            pass  # 快照损坏时重建
+
+    # 以最近修改的源文件为准重建
+    if not sources:
+        raise FileNotFoundError(f"找不到目录源文件: {', '.join(expected)}")
+    source = max(sources, key=os.path.getmtime)
+    catalog = Catalog.from_records(_read_source(source), fingerprint)
+    try:
+        catalog.save(snapshot_path)
+    except OSError:
+        pass  # 目录不可写时仅使用内存中的数据
+    return catalog
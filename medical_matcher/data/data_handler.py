@@ -1,26 +1,53 @@
 class DataHandler:
     def __init__(self):
-        # 首先加载手术数据
-        from .surgery_data import SURGERY_DATA
-        self.surgery_data = SURGERY_DATA
-        
+        # 首先加载手术数据（从目录快照读取）
+        from .catalog import load_catalog
+        self.surgery_data = load_catalog().records()
+
         # 初始化其他数据
         self.groups = []
         self.load_data()
-    
+
     def load_data(self):
-        # 加载其他数据的代码...
-        pass
-    
+        # 建立 (病种名称, 主要手术名称, 其他手术名称) 组合键索引
+        self._surgery_index = {}
+        self._basic_level_diseases = set()
+        for surgery in self.surgery_data:
+            key = (surgery['病种名称'], surgery['主要手术名称'], surgery['其他手术名称'])
+            # 与逐条扫描一致，重复的组合键保留第一条
+            self._surgery_index.setdefault(key, surgery)
+
+            remark = surgery.get('备注', '')
+            if remark and '基层病种' in remark:
+                self._basic_level_diseases.add(surgery['病种名称'])
+
+    def find_surgery(self, disease_name, main_surgeries, other_surgeries):
+        """根据病种名称和手术信息查找手术记录，找不到时返回None"""
+        return self._surgery_index.get((disease_name, main_surgeries, other_surgeries))
+
+    def find_surgeries(self, keys):
+        """
+        批量查找手术记录
+        Args:
+            keys: (病种名称, 主要手术名称, 其他手术名称) 组合键的可迭代对象
+        Returns:
+            list: 与 keys 顺序一致的手术记录，找不到的位置为None
+        """
+        get = self._surgery_index.get
+        return [get(tuple(key)) for key in keys]
+
     def get_surgery_number(self, disease_name, main_surgeries, other_surgeries):
         """根据病种名称和手术信息获取序号"""
-        for surgery in self.surgery_data:
-            if (surgery['病种名称'] == disease_name and 
-                surgery['主要手术名称'] == main_surgeries and 
-                surgery['其他手术名称'] == other_surgeries):
-                return surgery['序号']
-        return '-'
-    
+        surgery = self.find_surgery(disease_name, main_surgeries, other_surgeries)
+        return surgery['序号'] if surgery is not None else '-'
+
+    def get_surgery_numbers(self, keys):
+        """批量获取序号，找不到的位置为'-'"""
+        return [
+            surgery['序号'] if surgery is not None else '-'
+            for surgery in self.find_surgeries(keys)
+        ]
+
     def is_basic_level_disease(self, disease_name, main_surgeries=None, other_surgeries=None):
         """
         判断是否为基层病种
@@ -33,19 +60,19 @@ class DataHandler:
         """
         # 如果提供了具体手术信息，则按手术组合判断
         if main_surgeries is not None:
-            for surgery in self.surgery_data:
-                if (surgery['病种名称'] == disease_name and 
-                    surgery['主要手术名称'] == main_surgeries and 
-                    surgery['其他手术名称'] == other_surgeries):
-                    # 检查备注字段是否包含"基层病种"
-                    remark = surgery.get('备注', '')
-                    return '基层病种' in remark if remark else False
-            return False
-        
+            surgery = self.find_surgery(disease_name, main_surgeries, other_surgeries)
+            if surgery is None:
+                return False
+            # 检查备注字段是否包含"基层病种"
+            remark = surgery.get('备注', '')
+            return '基层病种' in remark if remark else False
+
         # 如果只提供病种名称，则检查该病种下是否有基层病种
-        for surgery in self.surgery_data:
-            if surgery['病种名称'] == disease_name:
-                remark = surgery.get('备注', '')
-                if remark and '基层病种' in remark:
-                    return True
-        return False
\ No newline at end of file
+        return disease_name in self._basic_level_diseases
+
+    def are_basic_level_diseases(self, keys):
+        """批量判断手术组合是否为基层病种，keys 同 find_surgeries"""
+        return [
+            '基层病种' in (surgery.get('备注', '') or '') if surgery is not None else False
+            for surgery in self.find_surgeries(keys)
+        ]
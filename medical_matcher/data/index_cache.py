@@ -0,0 +1,203 @@
+import mmap
+import os
+import struct
+import threading
+import time
+
+from data.catalog import DATA_DIR, _align, _pad
+
+# 派生索引的磁盘缓存：病种索引、手术名称 n-gram 索引、拼音索引、编码位集等由目录计算得到的结构，
+# 各自保存为一个文件，文件名和文件头中带有源目录的内容哈希。哈希一致时通过 mmap 直接映射，
+# 数值数组不复制；不一致（目录更新）时重新构建并写入新文件，旧哈希的文件随后删除。
+#
+# 文件内容只由内容哈希决定，多个实例（或同一进程的多个线程）同时写入时各自写临时文件再 os.replace，
+# 读到的总是完整的文件，重复写入的内容也相同。多个目录共用缓存目录时，每种结构保留最近使用的几个哈希。
+#
+# 文件布局（全部按 8 字节对齐，整数为本机字节序）：
+#   文件头   MAGIC, 版本, 数组数, 键长度, 名称区长度
+#   键       源目录的内容哈希
+#   数组目录 每个数组: 类型码, 元素个数, 数据偏移, 数据字节数
+#   名称区   以 '\0' 分隔的数组名
+#   数组数据 类型化数组；类型码 's' 为以 '\0' 分隔的 UTF-8 字符串列表
+
+MAGIC = b'DIPIDX\x00\x01'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sIIII')
+_ENTRY = struct.Struct('<4sQQQ')
+
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
+STALE_TMP_SECONDS = 3600  # 超过该时间的临时文件视为残留
+KEEP_KEYS = 4  # 每种结构最多保留的哈希个数（含当前），多个目录共用缓存目录时不会互相删除
+
+
+class IndexArrays:
+    """缓存文件中的一组命名数组：数值数组为 mmap 上的 memoryview，字符串列表在首次访问时解码"""
+
+    def __init__(self, key, entries, buffer=None):
+        self.key = key
+        self._entries = entries  # 名称 -> (类型码, 数据视图, 元素个数)
+        self._strings = {}
+        self._buffer = buffer  # 持有 mmap，保证数组视图有效
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __getitem__(self, name):
+        code, view, count = self._entries[name]
+        if code != 's':
+            return view
+        strings = self._strings.get(name)
+        if strings is None:
+            strings = bytes(view).decode('utf-8').split('\x00') if count else []
+            if len(strings) != count:
+                raise ValueError(f"索引缓存字符串列表损坏: {name}")
+            self._strings[name] = strings
+        return strings
+
+
+def save_arrays(path, key, arrays):
+    """
+    写入缓存文件（先写临时文件再替换，避免读到半个文件）
+    Args:
+        key: 源目录的内容哈希
+        arrays: 名称 -> array.array / bytes，或字符串列表
+    """
+    key = key.encode('utf-8')
+    names = '\x00'.join(arrays).encode('utf-8')
+    chunks = []
+    for value in arrays.values():
+        if isinstance(value, list):
+            chunks.append(('s', len(value), '\x00'.join(value).encode('utf-8')))
+        else:
+            view = memoryview(value)
+            chunks.append((view.format, len(view), view.tobytes()))
+
+    offset = _align(_HEADER.size) + _align(len(key)) + _align(_ENTRY.size * len(chunks)) + _align(len(names))
+    directory = []
+    for code, count, data in chunks:
+        directory.append(_ENTRY.pack(code.encode('ascii').ljust(4, b'\x00'), count, offset, len(data)))
+        offset += _align(len(data))
+
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_pad(_HEADER.pack(MAGIC, VERSION, len(chunks), len(key), len(names))))
+            f.write(_pad(key))
+            f.write(_pad(b''.join(directory)))
+            f.write(_pad(names))
+            for _, _, data in chunks:
+                f.write(_pad(data))
+        os.replace(tmp_path, path)
+    except OSError:
+        # Windows 上目标文件被其他实例映射时不能替换
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def open_arrays(path):
+    """通过 mmap 打开缓存文件"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    magic, version, n_arrays, key_len, names_len = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"无效的索引缓存: {path}")
+
+    pos = _align(_HEADER.size)
+    key = bytes(view[pos:pos + key_len]).decode('utf-8')
+    pos += _align(key_len)
+    directory = [_ENTRY.unpack_from(view, pos + i * _ENTRY.size) for i in range(n_arrays)]
+    pos += _align(_ENTRY.size * n_arrays)
+    names = bytes(view[pos:pos + names_len]).decode('utf-8').split('\x00') if n_arrays else []
+    if len(names) != n_arrays:
+        raise ValueError(f"索引缓存目录损坏: {path}")
+
+    entries = {}
+    for name, (code, count, offset, size) in zip(names, directory):
+        code = code.rstrip(b'\x00').decode('ascii')
+        if offset + size > len(buffer):
+            raise ValueError(f"索引缓存不完整: {path}")
+        data = view[offset:offset + size]
+        entries[name] = (code, data if code == 's' else data.cast(code), count)
+    return IndexArrays(key, entries, buffer)
+
+
+class IndexCache:
+    """
+    按源目录内容哈希区分的索引缓存目录
+
+    每种结构一个文件：<名称>.<哈希前16位>.idx。读取失败（不存在、损坏、哈希不一致）时返回None，
+    由调用方重新构建；目录不可写时保存静默失败，仅使用内存中的结构。
+    读取成功时更新文件的修改时间，清理旧文件时按它判断最近使用的哈希。
+    """
+
+    def __init__(self, key, directory=CACHE_DIR):
+        self.key = key
+        self.directory = directory
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.{self.key[:16]}.idx")
+
+    def has(self, name):
+        return os.path.exists(self.path(name))
+
+    def load(self, name):
+        """Returns: IndexArrays 或None"""
+        path = self.path(name)
+        if not os.path.exists(path):
+            return None
+        try:
+            arrays = open_arrays(path)
+        except (OSError, ValueError, struct.error):
+            return None  # 损坏时重建
+        if arrays.key != self.key:
+            return None
+        try:
+            os.utime(path)  # 记录最近使用
+        except OSError:
+            pass
+        return arrays
+
+    def save(self, name, arrays):
+        """
+        写入缓存并清理旧文件：同一结构其他版本（名称中 '.' 之后的部分）的文件直接删除，
+        同一版本其他哈希的文件只保留最近使用的 KEEP_KEYS - 1 个
+        Returns: 是否写入成功
+        """
+        path = self.path(name)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            save_arrays(path, self.key, arrays)
+        except OSError:
+            return False
+        import glob  # 只在写入后清理时用到，不拖慢启动
+        base = name.split('.')[0]
+        pattern = os.path.join(glob.escape(self.directory), glob.escape(base))
+        same_version = os.path.join(self.directory, name + '.')
+        now = time.time()
+        stale, other_keys = [], []
+        for old_path in glob.glob(f"{pattern}.*.idx") + glob.glob(f"{pattern}.*.tmp"):
+            try:
+                mtime = os.path.getmtime(old_path)
+            except OSError:
+                continue  # 已被删除
+            if old_path == path:
+                continue
+            if old_path.endswith('.tmp'):
+                # 临时文件只删除写入中途被终止的进程留下的
+                if now - mtime >= STALE_TMP_SECONDS:
+                    stale.append(old_path)
+            elif old_path.startswith(same_version) and old_path.count('.') == path.count('.'):
+                other_keys.append((mtime, old_path))
+            else:
+                stale.append(old_path)  # 其他版本，当前代码不会再读取
+        other_keys.sort(reverse=True)
+        stale.extend(old_path for _, old_path in other_keys[KEEP_KEYS - 1:])
+        for old_path in stale:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass  # 其他实例仍在使用（Windows）或已被删除
+        return True
@@ -0,0 +1,370 @@
+import os
+import sqlite3
+import threading
+
+from models.disease_group import parse_row
+from .catalog import DATA_DIR, SOURCE_EXCEL, SOURCE_MODULE, load_catalog, source_fingerprint
+
+# SQLite 目录库：组合、病种、手术分表存放并建索引，多个工具/进程共享同一个文件，
+# 按分值范围、基层病种、操作数等条件的筛选直接用 SQL 完成。
+
+STORE_PATH = os.path.join(DATA_DIR, 'surgery_data.db')
+SCHEMA_VERSION = '2'
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE diseases (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    disease_type TEXT NOT NULL DEFAULT '',
+    is_basic INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE groups (
+    id INTEGER PRIMARY KEY,
+    seq INTEGER,
+    dip_code TEXT NOT NULL,
+    disease_id INTEGER NOT NULL REFERENCES diseases(id),
+    main_codes TEXT NOT NULL DEFAULT '',
+    main_names TEXT NOT NULL DEFAULT '',
+    other_codes TEXT NOT NULL DEFAULT '',
+    other_names TEXT NOT NULL DEFAULT '',
+    score REAL NOT NULL,
+    remark TEXT NOT NULL DEFAULT '',
+    is_basic INTEGER NOT NULL DEFAULT 0,
+    operation_count INTEGER NOT NULL
+);
+CREATE TABLE surgeries (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE group_surgeries (
+    group_id INTEGER NOT NULL REFERENCES groups(id),
+    surgery_id INTEGER NOT NULL REFERENCES surgeries(id),
+    role INTEGER NOT NULL  -- 0 主要手术，1 次要手术，2 搭配手术
+);
+CREATE INDEX idx_diseases_name ON diseases (name);
+CREATE INDEX idx_diseases_code ON diseases (code);
+CREATE INDEX idx_groups_dip_code ON groups (dip_code);
+CREATE INDEX idx_groups_disease ON groups (disease_id, score);
+CREATE INDEX idx_groups_score ON groups (score);
+CREATE INDEX idx_groups_filter ON groups (is_basic, operation_count, score);
+CREATE UNIQUE INDEX idx_surgeries_code_name ON surgeries (code, name);
+CREATE INDEX idx_surgeries_name ON surgeries (name);
+CREATE INDEX idx_group_surgeries_surgery ON group_surgeries (surgery_id, role);
+CREATE INDEX idx_group_surgeries_group ON group_surgeries (group_id);
+"""
+
+# 查询结果还原成与 SURGERY_DATA 相同的字段
+GROUP_COLUMNS = """
+    g.id, g.seq AS "序号", g.dip_code AS "DIP分组编码", d.code AS "病种编码", d.name AS "病种名称",
+    g.main_codes AS "主要手术编码", g.main_names AS "主要手术名称",
+    g.other_codes AS "其他手术编码", g.other_names AS "其他手术名称",
+    d.disease_type AS "病种类型", g.score AS "分值", g.remark AS "备注"
+"""
+
+
+def _text(value):
+    if value is None or value != value:
+        return ''
+    return str(value).strip()
+
+
+def operation_count(other_names):
+    """操作数：主要手术算1个，次要手术、搭配手术各算1个"""
+    parts = [part.strip() for part in other_names.split('+')] if other_names else []
+    count = 1
+    if parts and parts[0]:
+        count += 1
+    if len(parts) > 1 and parts[1]:
+        count += 1
+    return count
+
+
+def _split_surgeries(codes, names):
+    """
+    把编码和名称拆成 (角色, 编码, 名称) 列表
+    编码与名称按 '+' 和 '/' 对应拆分，个数对不上时编码和名称分别单独登记
+    """
+    result = []
+    code_parts = codes.split('+') if codes else []
+    name_parts = names.split('+') if names else []
+    for role in range(max(len(code_parts), len(name_parts))):
+        part_codes = [c.strip() for c in code_parts[role].split('/')] if role < len(code_parts) else []
+        part_names = [n.strip() for n in name_parts[role].split('/')] if role < len(name_parts) else []
+        if len(part_codes) == len(part_names):
+            pairs = zip(part_codes, part_names)
+        else:
+            pairs = [(code, '') for code in part_codes] + [('', name) for name in part_names]
+        result.extend((role, code, name) for code, name in pairs if code or name)
+    return result
+
+
+def _fts5_tokenizer(conn):
+    """优先使用 trigram 分词（支持中文子串检索），旧版本 SQLite 退回 unicode61"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp.fts_probe")
+        return 'trigram'
+    except sqlite3.OperationalError:
+        return 'unicode61'
+
+
+class CatalogStore:
+    """
+    SQLite 目录库
+
+    一个连接由多个线程共用（界面线程、预加载线程、HTTP 服务的处理线程），
+    每次查询在锁内执行并取完全部结果，同一时刻只有一个线程使用连接。
+    """
+
+    def __init__(self, path=STORE_PATH, readonly=True):
+        self.path = path
+        if readonly:
+            uri = 'file:' + os.path.abspath(path).replace('\\', '/') + '?mode=ro'
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self.tokenizer = self.meta('tokenizer')  # 每次搜索都要用到，打开时读取一次
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def meta(self, key, default=None):
+        try:
+            rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        except sqlite3.DatabaseError:
+            return default
+        return rows[0][0] if rows else default
+
+    @property
+    def fingerprint(self):
+        return self.meta('fingerprint', '')
+
+    @property
+    def content_hash(self):
+        """生成目录库时目录内容的哈希（Catalog.content_hash），旧版目录库中没有时为空"""
+        return self.meta('content_hash', '')
+
+    @classmethod
+    def build(cls, path, records, fingerprint='', content_hash=''):
+        """由字典列表（SURGERY_DATA 结构）生成目录库，先写临时文件再替换"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(SCHEMA)
+            tokenizer = _fts5_tokenizer(conn)
+            # 手术名称搜索表：每个组合一行，文本与内存中的 SurgeryNameIndex 相同
+            # （各主要手术名称、完整的其他手术名称，均为小写），两种方式的搜索结果一致
+            conn.execute(
+                f"CREATE VIRTUAL TABLE group_fts USING fts5(main_names, other_names, tokenize='{tokenizer}')"
+            )
+
+            diseases = {}
+            surgeries = {}
+            group_rows = []
+            link_rows = []
+            search_rows = []
+            for group_id, record in enumerate(records, 1):
+                name = _text(record.get('病种名称'))
+                remark = _text(record.get('备注'))
+                is_basic = int('基层病种' in remark)
+                disease_id = diseases.get(name)
+                if disease_id is None:
+                    disease_id = diseases[name] = len(diseases) + 1
+                    conn.execute(
+                        "INSERT INTO diseases (id, code, name, disease_type, is_basic) VALUES (?, ?, ?, ?, ?)",
+                        (disease_id, _text(record.get('病种编码')), name, _text(record.get('病种类型')), is_basic)
+                    )
+                elif is_basic:
+                    conn.execute("UPDATE diseases SET is_basic = 1 WHERE id = ?", (disease_id,))
+
+                main_codes = _text(record.get('主要手术编码'))
+                main_names = _text(record.get('主要手术名称'))
+                other_codes = _text(record.get('其他手术编码'))
+                other_names = _text(record.get('其他手术名称'))
+                group_rows.append((
+                    group_id, record.get('序号'), _text(record.get('DIP分组编码')), disease_id,
+                    main_codes, main_names, other_codes, other_names,
+                    record.get('分值'), remark, is_basic, operation_count(other_names)
+                ))
+
+                fields = parse_row({
+                    'DIP分组编码': '', '病种名称': name, '主要手术编码': main_codes, '主要手术名称': main_names,
+                    '其他手术编码': other_codes, '其他手术名称': other_names, '分值': None,
+                })
+                search_rows.append((
+                    group_id,
+                    '\n'.join(surgery.lower() for surgery in fields['main_surgeries_names']),
+                    fields['other_surgeries_names'].lower(),
+                ))
+
+                links = [(0, code, surgery) for _, code, surgery in _split_surgeries(main_codes, main_names)]
+                links += [(role + 1, code, surgery)
+                          for role, code, surgery in _split_surgeries(other_codes, other_names)]
+                for role, code, surgery in links:
+                    surgery_id = surgeries.get((code, surgery))
+                    if surgery_id is None:
+                        surgery_id = surgeries[(code, surgery)] = len(surgeries) + 1
+                    link_rows.append((group_id, surgery_id, role))
+
+            conn.executemany("INSERT INTO groups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", group_rows)
+            conn.executemany(
+                "INSERT INTO surgeries (id, code, name) VALUES (?, ?, ?)",
+                [(surgery_id, code, name) for (code, name), surgery_id in surgeries.items()]
+            )
+            conn.executemany("INSERT INTO group_surgeries VALUES (?, ?, ?)", link_rows)
+            conn.executemany("INSERT INTO group_fts (rowid, main_names, other_names) VALUES (?, ?, ?)",
+                             search_rows)
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('schema_version', SCHEMA_VERSION),
+                ('fingerprint', fingerprint),
+                ('content_hash', content_hash),
+                ('tokenizer', tokenizer),
+            ])
+            conn.commit()
+            conn.execute("PRAGMA journal_mode = WAL")
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    def _ids(self, where='', params=()):
+        sql = "SELECT g.id FROM groups g JOIN diseases d ON d.id = g.disease_id"
+        if where:
+            sql += f" WHERE {where}"
+        return [row[0] for row in self._query(sql + " ORDER BY g.id", params)]
+
+    def _rows(self, where='', params=()):
+        sql = f"SELECT {GROUP_COLUMNS} FROM groups g JOIN diseases d ON d.id = g.disease_id"
+        if where:
+            sql += f" WHERE {where}"
+        rows = []
+        for row in self._query(sql + " ORDER BY g.id", params):
+            record = dict(row)
+            del record['id']
+            # 分值是整数时还原成 int，与 SURGERY_DATA 保持一致
+            score = record['分值']
+            if isinstance(score, float) and score.is_integer():
+                record['分值'] = int(score)
+            rows.append(record)
+        return rows
+
+    def records(self):
+        """全部组合，按目录顺序"""
+        return self._rows()
+
+    def disease_names(self):
+        return [row[0] for row in self._query("SELECT name FROM diseases ORDER BY name")]
+
+    def groups_of(self, disease_name):
+        return self._rows("d.name = ?", (disease_name,))
+
+    def groups_by_dip_code(self, dip_code):
+        return self._rows("g.dip_code = ?", (dip_code,))
+
+    def groups_by_surgery_code(self, code, role=None):
+        """包含某个手术编码的组合，role 为 0 时只查主要手术"""
+        where = "g.id IN (SELECT gs.group_id FROM group_surgeries gs JOIN surgeries s ON s.id = gs.surgery_id " \
+                "WHERE s.code = ?"
+        params = [code]
+        if role is not None:
+            where += " AND gs.role = ?"
+            params.append(role)
+        return self._rows(where + ")", params)
+
+    @staticmethod
+    def _filter_conditions(disease_name=None, min_score=None, max_score=None,
+                           is_basic=None, operation_count=None):
+        conditions = []
+        params = []
+        if disease_name is not None:
+            conditions.append("d.name = ?")
+            params.append(disease_name)
+        if min_score is not None:
+            conditions.append("g.score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("g.score <= ?")
+            params.append(max_score)
+        if is_basic is not None:
+            conditions.append("g.is_basic = ?")
+            params.append(int(bool(is_basic)))
+        if operation_count is not None:
+            counts = [operation_count] if isinstance(operation_count, int) else list(operation_count)
+            conditions.append(f"g.operation_count IN ({', '.join('?' * len(counts))})")
+            params.extend(counts)
+        return ' AND '.join(conditions), params
+
+    def filter_ids(self, **conditions):
+        """满足筛选条件的组合序号（从1开始，即目录中的行号+1），条件同 filter_groups"""
+        return self._ids(*self._filter_conditions(**conditions))
+
+    def filter_groups(self, **conditions):
+        """
+        按条件筛选组合
+        Args:
+            disease_name: 病种名称
+            min_score / max_score: 分值范围（含边界）
+            is_basic: 是否基层病种
+            operation_count: 操作数（1-3），可以是单个值或多个值
+        """
+        return self._rows(*self._filter_conditions(**conditions))
+
+    def _surgery_condition(self, text):
+        # 与 SurgeryNameIndex 相同：查询词（小写）是某个主要手术名称或其他手术名称文本的子串。
+        # trigram 分词下 3 个字及以上走 FTS5 索引，更短的查询退回 LIKE（文本已是小写，LIKE 的大小写规则不影响结果）
+        if self.tokenizer == 'trigram' and len(text) >= 3:
+            group_ids = "SELECT rowid FROM group_fts WHERE group_fts MATCH ?"
+            params = ('"' + text.replace('"', '""') + '"',)
+        else:
+            group_ids = "SELECT rowid FROM group_fts " \
+                        "WHERE main_names LIKE ? ESCAPE '\\' OR other_names LIKE ? ESCAPE '\\'"
+            pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            params = (pattern, pattern)
+        return f"g.id IN ({group_ids})", params
+
+    def search_ids(self, text):
+        """手术名称包含 text 的组合序号（与 SurgeryNameIndex 一样只转小写，不去掉空白）"""
+        text = text.lower()
+        return self._ids(*self._surgery_condition(text)) if text else []
+
+    def search_surgeries(self, text):
+        """按手术名称子串搜索组合"""
+        text = text.lower()
+        return self._rows(*self._surgery_condition(text)) if text else []
+
+
+def open_store(path=STORE_PATH, sources=None):
+    """
+    打开目录库，与源文件指纹不一致（或文件不存在）时从目录快照重建
+    Args:
+        path: 目录库路径
+        sources: 源文件列表，默认为 surgery_data.py 和 surgery_data.xlsx
+    """
+    if sources is None:
+        sources = [SOURCE_MODULE, SOURCE_EXCEL]
+    sources = [source for source in sources if os.path.exists(source)]
+    fingerprint = source_fingerprint(sources)
+
+    if os.path.exists(path):
+        try:
+            store = CatalogStore(path)
+            if store.fingerprint == fingerprint and store.meta('schema_version') == SCHEMA_VERSION:
+                return store
+            store.close()
+        except sqlite3.DatabaseError:
+            pass
+
+    catalog = load_catalog(sources=sources)
+    return CatalogStore.build(path, catalog.rows(), fingerprint, catalog.content_hash())
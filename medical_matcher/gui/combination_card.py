@@ -0,0 +1,244 @@
+import tkinter as tk
+
+CARD_BG = '#333333'
+HIGHLIGHT_FG = '#FFA500'  # 搜索词高亮（橙色）
+
+# 根据操作数设置标题颜色
+HEADER_COLORS = {
+    1: '#FFFFFF',  # 白色
+    2: '#4CAF50',  # 绿色
+    3: '#2196F3'   # 蓝色
+}
+
+# 手术分区：(标题, 列表前缀, 颜色)
+SECTIONS = (
+    ("主要手术:", "- ", 'white'),
+    ("次要手术:", "○ ", '#4CAF50'),
+    ("搭配手术:", "□ ", '#2196F3'),
+)
+
+
+class DarkButton(tk.Label):
+    """自定义深色主题按钮"""
+    def __init__(self, master, text, command):
+        super().__init__(
+            master,
+            text=text,
+            font=('Arial', 10),
+            fg='#AAAAAA',
+            bg=CARD_BG,
+            padx=10,
+            pady=3,
+            cursor='heart'  # 将 cursor 从 'hand2' 改为 'heart'
+        )
+        self.command = command
+        self.bind('<Button-1>', lambda e: self.command())
+        self.bind('<Enter>', self._on_enter)
+        self.bind('<Leave>', self._on_leave)
+
+    def _on_enter(self, e):
+        self.configure(bg='#444444', fg='#FFFFFF')
+
+    def _on_leave(self, e):
+        self.configure(bg=CARD_BG, fg='#AAAAAA')
+
+
+class CombinationCard(tk.Frame):
+    """
+    手术组合卡片
+
+    控件只在创建时构建一次，之后通过 show() 绑定新的组合数据：
+    改写文字、按需补充手术标签，多余的标签 pack_forget 隐藏而不销毁。
+    """
+
+    def __init__(self, master, on_toggle, on_copy, on_apply):
+        super().__init__(master, bg=CARD_BG, highlightbackground='#444444', highlightthickness=1)
+        self.group = None
+        self.widgets_created = 1
+        self.selected = tk.BooleanVar()
+        self._on_toggle = on_toggle
+
+        # 顶部工具栏：勾选框、标题、功能按钮
+        self.toolbar = self._frame(self)
+        self.toolbar.pack(side=tk.TOP, fill=tk.X, padx=5, pady=2)
+        self.checkbox = tk.Checkbutton(
+            self.toolbar,
+            variable=self.selected,
+            command=lambda: self._on_toggle(self),
+            bg=CARD_BG,
+            activebackground=CARD_BG,
+            selectcolor='#444444'
+        )
+        self.checkbox.pack(side=tk.LEFT)
+        self.widgets_created += 1
+        self.title_label = self._label(self.toolbar, font=('Arial', 14, 'bold'), anchor='w')
+        self.title_label.pack(side=tk.LEFT, padx=(5, 0))
+
+        button_frame = self._frame(self.toolbar)
+        button_frame.pack(side=tk.RIGHT)
+        DarkButton(button_frame, text="复制", command=lambda: on_copy(self.group)).pack(side=tk.RIGHT, padx=2)
+        DarkButton(button_frame, text="应用", command=lambda: on_apply(self.group)).pack(side=tk.RIGHT, padx=2)
+        self.widgets_created += 2
+
+        # 标题栏：分值及提升值
+        self.header = self._frame(self)
+        score_frame = self._frame(self.header)
+        score_frame.pack(side=tk.RIGHT)
+        self.score_label = self._label(score_frame, font=('Arial', 14, 'bold'))
+        self.score_label.pack(side=tk.LEFT)
+        self.score_increase = self._label(score_frame, font=('Arial', 14, 'bold'), fg='#FF4444')
+
+        # 盈亏平衡值
+        self.balance_frame = self._frame(self)
+        self.balance_labels = []
+        for _ in range(2):
+            row = self._frame(self.balance_frame)
+            row.pack(fill=tk.X)
+            value = self._label(row, font=('Arial', 13, 'bold'), fg='white')
+            value.pack(side=tk.LEFT)
+            increase = self._label(row, font=('Arial', 13, 'bold'), fg='#FF4444')
+            self.balance_labels.append((value, increase))
+
+        # 手术分区：标题 + 手术标签（按需增加）
+        self.section_titles = [
+            self._label(self, font=('Arial', 13, 'bold'), fg=color, anchor='w')
+            for _, _, color in SECTIONS
+        ]
+        self.section_labels = [[] for _ in SECTIONS]
+
+        self.footer = self._frame(self)
+        self.footer_labels = [self._label(self.footer, font=('Arial', 10), fg='#888888', anchor='w')
+                              for _ in range(2)]
+
+        for widget in (self, self.toolbar, self.header, self.balance_frame, self.footer):
+            widget.bind('<Button-1>', self._on_click)
+
+    def _frame(self, master):
+        self.widgets_created += 1
+        return tk.Frame(master, bg=CARD_BG)
+
+    def _label(self, master, **kw):
+        self.widgets_created += 1
+        label = tk.Label(master, bg=CARD_BG, **kw)
+        if master is self:
+            # 卡片正文的标签也响应点击
+            label.bind('<Button-1>', self._on_click)
+        return label
+
+    def _on_click(self, event):
+        self.selected.set(not self.selected.get())
+        self._on_toggle(self)
+
+    def _surgery_label(self, section, index):
+        labels = self.section_labels[section]
+        while len(labels) <= index:
+            labels.append(self._label(self, font=('Arial', 13), anchor='w', wraplength=380, justify=tk.LEFT))
+        return labels[index]
+
+    def show(self, group, group_num, base_score, balances, search_terms=()):
+        """
+        绑定组合数据
+        Args:
+            balances: ((城乡盈亏平衡值, 提升值), (职工盈亏平衡值, 提升值))，无提升时提升值为None
+            search_terms: 需要高亮的搜索词（小写）
+        """
+        self.group = group
+        text_color = HEADER_COLORS.get(group.surgery_count, '#FFFFFF')
+        self.title_label.configure(text=f"序号{group_num}-操作数:{group.surgery_count}", fg=text_color)
+        self.score_label.configure(text=f"分值：{group.score}", fg=text_color)
+        if group.score > base_score:
+            self.score_increase.configure(text=f" ↑{group.score - base_score:.0f}", fg='#FF4444')
+            self.score_increase.pack(side=tk.LEFT)
+        else:
+            self.score_increase.pack_forget()
+
+        for (name, (value, increase)), (value_label, increase_label) in zip(
+                (("城乡", balances[0]), ("职工", balances[1])), self.balance_labels):
+            value_label.configure(text=f"{name}盈亏平衡值：¥{value:.2f}")
+            if increase is not None:
+                increase_label.configure(text=f" ↑{increase:.2f}")
+                increase_label.pack(side=tk.LEFT)
+            else:
+                increase_label.pack_forget()
+
+        # 按原有顺序重新排列卡片正文
+        for widget in self.pack_slaves():
+            if widget is not self.toolbar:
+                widget.pack_forget()
+        self.header.pack(fill=tk.X, padx=10, pady=5)
+        self.balance_frame.pack(fill=tk.X, padx=8, pady=(0, 5))
+
+        sections = (group.main_surgeries_names, group.secondary_surgeries_names, group.companion_surgeries_names)
+        for section, (title, prefix, color) in enumerate(SECTIONS):
+            surgeries = sections[section]
+            if section and not surgeries:
+                continue
+            title_label = self.section_titles[section]
+            title_label.configure(text=title, fg=color)
+            title_label.pack(fill=tk.X, padx=8, pady=(8, 4))
+            for index, surgery in enumerate(surgeries):
+                label = self._surgery_label(section, index)
+                label.configure(text=f"{prefix}{surgery}", fg=color)
+                label.pack(fill=tk.X, padx=16)
+
+        self.footer.pack(fill=tk.X, padx=8, pady=5)
+        footer_texts = []
+        if getattr(group, 'surgery_codes', None):
+            footer_texts.append(f"手术编码: {group.surgery_codes}")
+        if getattr(group, 'notes', None):
+            footer_texts.append(f"备注: {group.notes}")
+        for index, label in enumerate(self.footer_labels):
+            if index < len(footer_texts):
+                label.configure(text=footer_texts[index])
+                label.pack(side=tk.LEFT, padx=(10, 0) if index else 0)
+            else:
+                label.pack_forget()
+
+        # 如果有搜索词，高亮匹配的文本
+        if search_terms:
+            for widget in self.pack_slaves():
+                if isinstance(widget, tk.Label):
+                    text = widget.cget('text').lower()
+                    if any(term in text for term in search_terms):
+                        widget.configure(fg=HIGHLIGHT_FG)
+
+    def set_selected(self, selected):
+        self.selected.set(selected)
+        self.configure(highlightbackground='#2196F3' if selected else '#444444')
+
+
+class CardPool:
+    """
+    卡片复用池
+
+    已创建的卡片一直保留，刷新时按顺序取用并重新绑定数据，
+    数量不够才新建，多出的卡片 grid_remove 隐藏。
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.cards = []
+        self.created = 0
+        self.reused = 0
+
+    def get(self, index):
+        """取得第 index 张卡片（已有则复用，否则新建）"""
+        if index < len(self.cards):
+            self.reused += 1
+        else:
+            while len(self.cards) <= index:
+                self.cards.append(self.factory())
+                self.created += 1
+        return self.cards[index]
+
+    def release_from(self, count):
+        """隐藏第 count 张之后的卡片"""
+        for card in self.cards[count:]:
+            card.grid_remove()
+
+    @property
+    def widgets_created(self):
+        return sum(card.widgets_created for card in self.cards)
+
+    def stats_text(self):
+        return f"卡片：新建 {self.created}，复用 {self.reused}（共创建控件 {self.widgets_created} 个）"
@@ -1,20 +1,18 @@
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import numpy as np
-from matplotlib.font_manager import FontProperties
+from gui.search_scheduler import SearchScheduler
+
+# 分值对比固定按 城乡8、职工10、权重系数0.889 计算盈亏平衡值
+COMPARE_PARAMS = (8, 10, 0.889)
 
 class CompareWindow(tk.Toplevel):
-    def __init__(self, master, data_handler):
+    def __init__(self, master, core):
         super().__init__(master)
         self.title("病种分值对比")
         self.geometry("1200x800")
-        self.data_handler = data_handler
-        
-        # 设置中文字体
-        self.font = FontProperties(family=['Heiti TC', 'Arial Unicode MS', 'Microsoft YaHei', 'SimHei'])
+        self.core = core
+        # 搜索框输入防抖，查询在后台线程执行
+        self.disease_search = SearchScheduler(self)
         
         # 设置窗口背景色
         self.configure(bg='#2b2b2b')
@@ -191,30 +189,27 @@ class CompareWindow(tk.Toplevel):
         for item in self.disease_list.get_children():
             self.disease_list.delete(item)
         
-        # 获取所有不重复的病种
-        diseases = set()
-        for group in self.data_handler.groups:
-            diseases.add(group.disease_name)
+        # 获取所有不重复的病种（已按名称排序）
+        diseases = self.core.disease_names()
         
         # 添加到列表
-        for disease in sorted(diseases):
+        for disease in diseases:
             self.disease_list.insert('', 'end', values=(disease,))
             
     def filter_disease_list(self, *args):
-        """过滤病种列表"""
+        """过滤病种列表（防抖后在后台线程过滤）"""
         search_text = self.search_var.get().lower()
-        
+        self.disease_search.schedule(lambda: self._query_diseases(search_text), self._show_diseases)
+
+    def _query_diseases(self, search_text):
+        # 匹配的病种（同时支持拼音和首字母）
+        return self.core.disease_names(search_text)
+
+    def _show_diseases(self, diseases):
         # 清空列表
-        for item in self.disease_list.get_children():
-            self.disease_list.delete(item)
+        self.disease_list.delete(*self.disease_list.get_children())
         
-        # 重新添加匹配的病种
-        diseases = set()
-        for group in self.data_handler.groups:
-            if search_text in group.disease_name.lower():
-                diseases.add(group.disease_name)
-        
-        for disease in sorted(diseases):
+        for disease in diseases:
             self.disease_list.insert('', 'end', values=(disease,))
             
     def create_disease_card(self, disease_name, base_score, rural_balance, worker_balance):
@@ -368,32 +363,8 @@ class CompareWindow(tk.Toplevel):
         for item in selection:
             disease_name = self.disease_list.item(item)['values'][0]
             if disease_name not in self.selected_diseases:
-                # 获取病种基准分值和盈亏平衡值
-                base_score = 0
-                conservative_score = None
-                min_score = float('inf')
-                
-                for group in self.data_handler.groups:
-                    if group.disease_name == disease_name:
-                        if group.score < min_score:
-                            min_score = group.score
-                        # 检查是否是保守治疗
-                        main_surgeries = ' / '.join(group.main_surgeries_names).lower()
-                        if '保守治疗' in main_surgeries:
-                            conservative_score = group.score
-                            break
-                
-                # 使用保守治疗分值或最低分值
-                base_score = conservative_score if conservative_score is not None else min_score
-                
-                # 计算盈亏平衡值
-                is_basic = self.data_handler.is_basic_level_disease(disease_name)
-                if is_basic:
-                    rural_balance = base_score * 8
-                    worker_balance = base_score * 10
-                else:
-                    rural_balance = base_score * 0.889 * 8
-                    worker_balance = base_score * 0.889 * 10
+                # 病种基准分值（保守治疗分值或最低分值）及盈亏平衡值
+                base_score, rural_balance, worker_balance = self.core.standard_balance(disease_name, COMPARE_PARAMS)
                 
                 # 创建新卡片
                 self.create_disease_card(disease_name, base_score, rural_balance, worker_balance)
@@ -457,31 +428,8 @@ class CompareWindow(tk.Toplevel):
         
         # 收集数据并创建卡片
         for disease in diseases:
-            # 获取该病种的基准分值
-            conservative_score = None
-            min_score = float('inf')
-            
-            for group in self.data_handler.groups:
-                if group.disease_name == disease:
-                    if group.score < min_score:
-                        min_score = group.score
-                    # 检查是否是保守治疗
-                    main_surgeries = ' / '.join(group.main_surgeries_names).lower()
-                    if '保守治疗' in main_surgeries:
-                        conservative_score = group.score
-                        break
-            
-            # 使用保守治疗分值或最低分值
-            base_score = conservative_score if conservative_score is not None else min_score
-            
-            # 计算盈亏平衡值
-            is_basic = self.data_handler.is_basic_level_disease(disease)
-            if is_basic:
-                rural_balance = base_score * 8
-                worker_balance = base_score * 10
-            else:
-                rural_balance = base_score * 0.889 * 8
-                worker_balance = base_score * 0.889 * 10
+            # 该病种的基准分值（保守治疗分值或最低分值）及盈亏平衡值
+            base_score, rural_balance, worker_balance = self.core.standard_balance(disease, COMPARE_PARAMS)
             
             # 创建卡片
             self.create_disease_card(disease, base_score, rural_balance, worker_balance)
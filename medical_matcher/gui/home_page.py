@@ -1,8 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from .main_window import MainWindow
-import pandas as pd
 import json
+import threading
 
 class HomePage(tk.Frame):
     def __init__(self, master=None):
@@ -10,10 +9,14 @@ class HomePage(tk.Frame):
         self.master = master
         self.matcher_window = None
         self.matcher_app = None
+        # 匹配窗口模块和目录数据在首页显示后于后台预加载
+        self._preload_thread = None
+        self._data_handler = None
         
         # 从文件加载上次保存的参数
         self.load_params()
         self.create_widgets()
+        self.after(100, self.start_preload)
         
     def load_params(self):
         """从文件加载参数"""
@@ -139,6 +142,7 @@ class HomePage(tk.Frame):
                 filetypes=[("Excel files", "*.xlsx *.xls")]
             )
             if file_path:
+                import pandas as pd
                 df = pd.read_excel(file_path)
                 self.monthly_params = df  # 保存月度参数
                 self.show_monthly_params()  # 显示月度参数窗口
@@ -156,14 +160,44 @@ class HomePage(tk.Frame):
         self.weight_value.delete(0, tk.END)
         self.weight_value.insert(0, str(weight))
     
+    def start_preload(self):
+        """
+        后台导入匹配窗口（及 NumPy）并加载目录、构建病种索引
+        首页不需要这些模块，启动时只导入 tkinter，打开匹配系统时通常已加载完毕
+        """
+        if self._preload_thread is None:
+            self._preload_thread = threading.Thread(target=self._preload, name='preload', daemon=True)
+            self._preload_thread.start()
+
+    def _preload(self):
+        try:
+            from .main_window import MainWindow  # noqa: F401
+            from utils.data_handler import DataHandler
+            self._data_handler = DataHandler()
+            # 目录更新后，搜索和匹配用的索引在后台构建并写入缓存
+            self._data_handler.start_index_rebuild()
+        except Exception:
+            # 预加载失败时由匹配窗口同步加载；同步加载可能成功，先把这里的错误输出到控制台以便排查
+            import sys
+            import traceback
+            print("后台预加载失败，打开匹配系统时将重新加载：", file=sys.stderr)
+            traceback.print_exc()
+            self._data_handler = None
+
     def open_matcher(self):
+        # 预加载尚未完成时等待（最多与同步加载一样久）
+        if self._preload_thread is not None:
+            self._preload_thread.join()
+        from .main_window import MainWindow
+
         # 打开手术匹配系统窗口
         self.matcher_window = tk.Toplevel(self.master)
         self.matcher_window.title("手术匹配系统")
         self.matcher_window.geometry("800x600")
         self.matcher_app = MainWindow(
             master=self.matcher_window,
-            home_page=self  # 传递首页实例以实现参数同步
+            home_page=self,  # 传递首页实例以实现参数同步
+            data_handler=self._data_handler
         )
         self.matcher_app.pack(fill=tk.BOTH, expand=True) 
     
@@ -190,6 +224,7 @@ class HomePage(tk.Frame):
                 "城乡分值": [8.0] * 12,  # 12个月的示例值
                 "职工分值": [10.0] * 12
             }
+            import pandas as pd
             df = pd.DataFrame(template_data)
             
             # 让用户选择保存位置
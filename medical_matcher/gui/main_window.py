@@ -1,13 +1,12 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, Canvas
-from utils.data_handler import DataHandler
-from gui.compare_window import CompareWindow
-import numpy as np
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from tkinter import ttk, messagebox, Canvas
+from core import CatalogService
+from gui.virtual_tree import VirtualTreeview
+from gui.search_scheduler import SearchScheduler
+from gui.combination_card import CardPool, CombinationCard
 
 class MainWindow(tk.Frame):
-    def __init__(self, master=None, home_page=None):
+    def __init__(self, master=None, home_page=None, data_handler=None):
         super().__init__(master)
         self.master = master
         self.home_page = home_page
@@ -24,44 +23,22 @@ class MainWindow(tk.Frame):
             self.worker_value = 1.0
             self.weight_value = 1.0
         
-        self.data_handler = DataHandler()
-        self.groups = self.data_handler.groups
+        # 查询和计算都由核心层完成，首页预加载的数据可直接复用，否则在此加载目录
+        self.core = CatalogService(data_handler, params=(self.rural_value, self.worker_value, self.weight_value))
+        self.data_handler = self.core.data_handler
+        self.groups = self.core.groups
+        self.disease_index = self.core.disease_index
+        self.balance_engine = self.core.balance_engine
+        # 打开的搜索窗口等需要随参数刷新的视图
+        self.balance_views = []
         
-        # 预处理病种数据
-        self.disease_info = self._preprocess_disease_info()
+        # 搜索框输入防抖，查询在后台线程执行
+        self.disease_search = SearchScheduler(self)
+        self.surgery_search = SearchScheduler(self)
         
         self.create_widgets()
         self.update_disease_list()
         
-    def _preprocess_disease_info(self):
-        """预处理病种数据，避免重复计算"""
-        disease_info = {}
-        
-        for group in self.groups:
-            disease_name = group.disease_name
-            if disease_name not in disease_info:
-                # 查找保守治疗分值
-                conservative_score = None
-                min_score = float('inf')
-                
-                # 遍历同一病种的所有组
-                for g in self.groups:
-                    if g.disease_name == disease_name:
-                        # 更新最低分值
-                        if g.score < min_score:
-                            min_score = g.score
-                        # 检查是否是保守治疗
-                        main_surgeries = ' / '.join(g.main_surgeries_names).lower()
-                        if '保守治疗' in main_surgeries:
-                            conservative_score = g.score
-                            break
-                
-                # 如果没有找到保守治疗分值，使用最低分值
-                standard_score = conservative_score if conservative_score is not None else min_score
-                disease_info[disease_name] = standard_score
-        
-        return disease_info
-
     def create_widgets(self):
         # 创建顶部工具栏
         self.toolbar = tk.Frame(self.master)
@@ -233,8 +210,8 @@ class MainWindow(tk.Frame):
         )
         self.surgery_search_entry.pack(side=tk.LEFT, padx=(5, 0))
         
-        # 详细信息表
-        self.detail_tree = ttk.Treeview(
+        # 详细信息表（虚拟化，只创建可视区域内的行）
+        self.detail_tree = VirtualTreeview(
             self.detail_frame,
             columns=('main_surgery', 'other_surgery', 'surgery_count', 'score', 'rural_balance'),
             show='headings',
@@ -255,16 +232,8 @@ class MainWindow(tk.Frame):
         self.detail_tree.column('score', width=80, anchor='e')
         self.detail_tree.column('rural_balance', width=150, anchor='e')
         
-        # 添加滚动条
-        detail_scrollbar = ttk.Scrollbar(
-            self.detail_frame,
-            orient=tk.VERTICAL,
-            command=self.detail_tree.yview
-        )
-        self.detail_tree.configure(yscrollcommand=detail_scrollbar.set)
-        
+        # 滚动条由虚拟表格自带
         self.detail_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        detail_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         self.detail_tree.bind('<<TreeviewSelect>>', self.on_select_surgery)
         
@@ -400,321 +369,14 @@ class MainWindow(tk.Frame):
         scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
         content_frame = tk.Frame(canvas, bg='#2b2b2b')
         
-        class DarkButton(tk.Label):
-            """自定义深色主题按钮"""
-            def __init__(self, master, text, command):
-                super().__init__(
-                    master,
-                    text=text,
-                    font=('Arial', 10),
-                    fg='#AAAAAA',
-                    bg='#333333',
-                    padx=10,
-                    pady=3,
-                    cursor='heart'  # 将 cursor 从 'hand2' 改为 'heart'
-                )
-                self.command = command
-                self.bind('<Button-1>', lambda e: self.command())
-                self.bind('<Enter>', self._on_enter)
-                self.bind('<Leave>', self._on_leave)
-                
-            def _on_enter(self, e):
-                self.configure(bg='#444444', fg='#FFFFFF')
-                
-            def _on_leave(self, e):
-                self.configure(bg='#333333', fg='#AAAAAA')
-        
-        def create_card(parent, group_num, group, surgery_count):
-            """创建卡片"""
-            # 计算基准分值（保守治疗或最低分值）
-            conservative_score = None
-            min_score = float('inf')
-            for g in self.groups:
-                if g.disease_name == group.disease_name:
-                    # 更新最低分值
-                    if g.score < min_score:
-                        min_score = g.score
-                    # 检查是否是保守治疗
-                    main_surgeries = ' / '.join(g.main_surgeries_names).lower()
-                    if '保守治疗' in main_surgeries:
-                        conservative_score = g.score
-                        break
-            
-            # 使用保守治疗分值或最低分值作为基准
-            base_score = conservative_score if conservative_score is not None else min_score
-            
-            # 计算盈亏平衡值
-            is_basic = self.data_handler.is_basic_level_disease(group.disease_name)
-            if is_basic:
-                rural_balance = group.score * self.rural_value
-                worker_balance = group.score * self.worker_value
-            else:
-                rural_balance = group.score * self.weight_value * self.rural_value
-                worker_balance = group.score * self.weight_value * self.worker_value
-            
-            # 创建卡片主框架
-            card = tk.Frame(parent, bg='#333333', highlightbackground='#444444', highlightthickness=1)
-            
-            # 添加顶部工具栏框架
-            toolbar = tk.Frame(card, bg='#333333')
-            toolbar.pack(side=tk.TOP, fill=tk.X, padx=5, pady=2)
-            
-            # 添加勾选框
-            card_selected = tk.BooleanVar()
-            checkbox = tk.Checkbutton(
-                toolbar,
-                variable=card_selected,
-                command=lambda: on_card_selected(card, group, card_selected),
-                bg='#333333',
-                activebackground='#333333',
-                selectcolor='#444444'
-            )
-            checkbox.pack(side=tk.LEFT)
-            
-            # 将整个卡片绑定点击事件
-            def on_card_click(event):
-                card_selected.set(not card_selected.get())
-                on_card_selected(card, group, card_selected)
-            
-            # 为卡片的所有子组件绑定点击事件
-            def bind_click_to_children(widget):
-                widget.bind('<Button-1>', on_card_click)
-                for child in widget.winfo_children():
-                    if not isinstance(child, tk.Checkbutton):  # 跳过勾选框本身
-                        child.bind('<Button-1>', on_card_click)
-                        if isinstance(child, tk.Frame):
-                            bind_click_to_children(child)
-            
-            # 绑定点击事件到卡片及其所有子组件
-            bind_click_to_children(card)
-            
-            # 添加右上角功能按钮
-            button_frame = tk.Frame(toolbar, bg='#333333')
-            button_frame.pack(side=tk.RIGHT)
-            
-            # 使用自定义按钮
-            copy_btn = DarkButton(
-                button_frame,
-                text="复制",
-                command=lambda: copy_card_content(group)
-            )
-            copy_btn.pack(side=tk.RIGHT, padx=2)
-            
-            apply_btn = DarkButton(
-                button_frame,
-                text="应用",
-                command=lambda: self.apply_combination(group)
-            )
-            apply_btn.pack(side=tk.RIGHT, padx=2)
-            
-            # 根据操作数设置标题栏颜色
-            header_colors = {
-                1: '#FFFFFF',  # 白色
-                2: '#4CAF50',  # 绿色
-                3: '#2196F3'   # 蓝色
-            }
-            header_bg = '#333333'  # 默认背景色
-            
-            # 标题栏
-            header = tk.Frame(card, bg=header_bg)
-            header.pack(fill=tk.X, padx=10, pady=5)
-            
-            # 左侧标题（组合序号和操作数）
-            title_frame = tk.Frame(header, bg=header_bg)
-            title_frame.pack(side=tk.LEFT)
-            
-            # 获取对应的文字颜色
-            text_color = header_colors.get(surgery_count, '#FFFFFF')
-            
-            # 将标题移到勾选框后面
-            checkbox.pack(side=tk.LEFT)
-            tk.Label(
-                toolbar,  # 注意这里改为 toolbar 而不是 title_frame
-                text=f"序号{group_num}-操作数:{surgery_count}",  # 将"组合"改为"序号"
-                font=('Arial', 14, 'bold'),
-                fg=text_color,
-                bg='#333333',
-                anchor='w'
-            ).pack(side=tk.LEFT, padx=(5, 0))  # 添加左边距
-            
-            # 右侧分值框架
-            score_frame = tk.Frame(header, bg=header_bg)
-            score_frame.pack(side=tk.RIGHT)
-            
-            # 基础分值显示
-            tk.Label(
-                score_frame,
-                text=f"分值：{group.score}",
-                font=('Arial', 14, 'bold'),
-                fg=text_color,
-                bg=header_bg
-            ).pack(side=tk.LEFT)
-            
-            # 如果有提升值，显示在同一行
-            if group.score > base_score:
-                increase = group.score - base_score
-                tk.Label(
-                    score_frame,
-                    text=f" ↑{increase:.0f}",  # 使用向上箭头，去掉括号和加号
-                    font=('Arial', 14, 'bold'),
-                    fg='#FF4444',  # 红色
-                    bg=header_bg
-                ).pack(side=tk.LEFT)
-            
-            # 盈亏平衡值
-            balance_frame = tk.Frame(card, bg='#333333')
-            balance_frame.pack(fill=tk.X, padx=8, pady=(0,5))
-            
-            # 创建城乡盈亏平衡值行框架
-            rural_frame = tk.Frame(balance_frame, bg='#333333')
-            rural_frame.pack(fill=tk.X)
-            
-            tk.Label(
-                rural_frame,
-                text=f"城乡盈亏平衡值：¥{rural_balance:.2f}",
-                font=('Arial', 13, 'bold'),
-                fg='white',
-                bg='#333333'
-            ).pack(side=tk.LEFT)
-            
-            # 如果有提升值，显示在同一行
-            if group.score > base_score:
-                increase_balance = (group.score - base_score) * (self.rural_value if is_basic else self.weight_value * self.rural_value)
-                tk.Label(
-                    rural_frame,
-                    text=f" ↑{increase_balance:.2f}",
-                    font=('Arial', 13, 'bold'),
-                    fg='#FF4444',
-                    bg='#333333'
-                ).pack(side=tk.LEFT)
-            
-            # 职工盈亏平衡值
-            worker_frame = tk.Frame(balance_frame, bg='#333333')
-            worker_frame.pack(fill=tk.X)
-            
-            tk.Label(
-                worker_frame,
-                text=f"职工盈亏平衡值：¥{worker_balance:.2f}",
-                font=('Arial', 13, 'bold'),
-                fg='white',
-                bg='#333333'
-            ).pack(side=tk.LEFT)
-            
-            # 如果有提升值，显示在同一行
-            if group.score > base_score:
-                increase_balance = (group.score - base_score) * (self.worker_value if is_basic else self.weight_value * self.worker_value)
-                tk.Label(
-                    worker_frame,
-                    text=f" ↑{increase_balance:.2f}",
-                    font=('Arial', 13, 'bold'),
-                    fg='#FF4444',
-                    bg='#333333'
-                ).pack(side=tk.LEFT)
-            
-            # 主要手术标题
-            tk.Label(
-                card,
-                text="主要手术:",
-                font=('Arial', 13, 'bold'),  # 从14改为13
-                fg='white',
-                bg='#333333',
-                anchor='w'
-            ).pack(fill=tk.X, padx=8, pady=(8,4))
-            
-            # 主要手术列表
-            for surgery in group.main_surgeries_names:
-                tk.Label(
-                    card,
-                    text=f"- {surgery}",
-                    font=('Arial', 13),  # 从14改为13
-                    fg='white',
-                    bg='#333333',
-                    anchor='w',
-                    wraplength=380,
-                    justify=tk.LEFT
-                ).pack(fill=tk.X, padx=16)
-            
-            # 其他手术（如果有）
-            if group.other_surgeries_names:
-                surgery_groups = group.other_surgeries_names.split('+')
-                
-                # 显示次要手术（第一组）
-                if len(surgery_groups) > 0 and surgery_groups[0].strip():
-                    tk.Label(
-                        card,
-                        text="次要手术:",
-                        font=('Arial', 13, 'bold'),  # 从14改为13
-                        fg='#4CAF50',
-                        bg='#333333',
-                        anchor='w'
-                    ).pack(fill=tk.X, padx=8, pady=(8,4))
-                    
-                    surgeries = [s.strip() for s in surgery_groups[0].split('/')]
-                    for surgery in surgeries:
-                        if surgery.strip():
-                            tk.Label(
-                                card,
-                                text=f"○ {surgery.strip()}",
-                                font=('Arial', 13),  # 从14改为13
-                                fg='#4CAF50',
-                                bg='#333333',
-                                anchor='w',
-                                wraplength=380,
-                                justify=tk.LEFT
-                            ).pack(fill=tk.X, padx=16)
-                
-                # 显示搭配手术（第二组）
-                if len(surgery_groups) > 1 and surgery_groups[1].strip():
-                    tk.Label(
-                        card,
-                        text="搭配手术:",
-                        font=('Arial', 13, 'bold'),  # 从14改为13
-                        fg='#2196F3',
-                        bg='#333333',
-                        anchor='w'
-                    ).pack(fill=tk.X, padx=8, pady=(8,4))
-                    
-                    surgeries = [s.strip() for s in surgery_groups[1].split('/')]
-                    for surgery in surgeries:
-                        if surgery.strip():
-                            tk.Label(
-                                card,
-                                text=f"□ {surgery.strip()}",
-                                font=('Arial', 13),  # 从14改为13
-                                fg='#2196F3',
-                                bg='#333333',
-                                anchor='w',
-                                wraplength=380,
-                                justify=tk.LEFT
-                            ).pack(fill=tk.X, padx=16)
-            
-            # 添加底部信息栏
-            footer = tk.Frame(card, bg='#333333')
-            footer.pack(fill=tk.X, padx=8, pady=5)
-            
-            # 添加手术编码信息（如果有）
-            if hasattr(group, 'surgery_codes') and group.surgery_codes:
-                tk.Label(
-                    footer,
-                    text=f"手术编码: {group.surgery_codes}",
-                    font=('Arial', 10),
-                    fg='#888888',
-                    bg='#333333',
-                    anchor='w'
-                ).pack(side=tk.LEFT)
-            
-            # 添加备注信息（如果有）
-            if hasattr(group, 'notes') and group.notes:
-                tk.Label(
-                    footer,
-                    text=f"备注: {group.notes}",
-                    font=('Arial', 10),
-                    fg='#888888',
-                    bg='#333333',
-                    anchor='w'
-                ).pack(side=tk.LEFT, padx=(10, 0))
-            
-            return card
+        # 卡片复用池：刷新时重新绑定已有卡片，不再销毁重建
+        card_pool = CardPool(lambda: CombinationCard(
+            content_frame,
+            on_toggle=lambda card: on_card_selected(card, card.group, card.selected),
+            on_copy=copy_card_content,
+            on_apply=self.apply_combination
+        ))
+        content_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
         
         def copy_card_content(group):
             """复制卡片内容到剪贴板"""
@@ -725,19 +387,15 @@ class MainWindow(tk.Frame):
             for surgery in group.main_surgeries_names:
                 content.append(f"- {surgery}")
             
-            if group.other_surgeries_names:
-                surgery_groups = group.other_surgeries_names.split('+')
-                if surgery_groups[0].strip():
-                    content.append("\n次要手术：")
-                    for surgery in surgery_groups[0].split('/'):
-                        if surgery.strip():
-                            content.append(f"○ {surgery.strip()}")
-                
-                if len(surgery_groups) > 1 and surgery_groups[1].strip():
-                    content.append("\n搭配手术：")
-                    for surgery in surgery_groups[1].split('/'):
-                        if surgery.strip():
-                            content.append(f"□ {surgery.strip()}")
+            if group.secondary_surgeries_names:
+                content.append("\n次要手术：")
+                for surgery in group.secondary_surgeries_names:
+                    content.append(f"○ {surgery}")
+            
+            if group.companion_surgeries_names:
+                content.append("\n搭配手术：")
+                for surgery in group.companion_surgeries_names:
+                    content.append(f"□ {surgery}")
             
             # 添加手术编码和备注信息（如果有）
             if hasattr(group, 'surgery_codes') and group.surgery_codes:
@@ -752,83 +410,92 @@ class MainWindow(tk.Frame):
             # 显示提示消息
             messagebox.showinfo("提示", "内容已复制到剪贴板")
         
-        def update_combinations(*args):
-            # 清空现有内容
-            for widget in content_frame.winfo_children():
-                widget.destroy()
-            
+        # 用于存储选中的卡片
+        selected_cards = []
+        
+        # 输入防抖，过滤在后台线程执行
+        combination_search = SearchScheduler(preview_window)
+        
+        def update_combinations(*args, delay=None):
             # 获取搜索文本并分割成关键词列表
             search_terms = [term.strip().lower() for term in search_var.get().split() if term.strip()]
-            
-            # 获取并过滤组合
-            related_groups = []
-            for group in self.groups:
-                if group.disease_name != selected_disease:
-                    continue
-                    
-                # 计算操作数
-                surgery_count = 1
-                if group.other_surgeries_names:
-                    surgery_groups = [g.strip() for g in group.other_surgeries_names.split('+')]
-                    if surgery_groups[0]:
-                        surgery_count += 1
-                    if len(surgery_groups) > 1 and surgery_groups[1]:
-                        surgery_count += 1
-                
-                # 检查操作数是否被选中
-                if not filter_vars[surgery_count].get():
-                    continue
-                    
-                # 检查搜索词匹配
-                all_surgeries_text = (
-                    ' '.join(surgery.lower() for surgery in group.main_surgeries_names) +
-                    ' ' + (group.other_surgeries_names.lower() if group.other_surgeries_names else '')
-                )
-                
-                if not search_terms or all(term in all_surgeries_text for term in search_terms):
-                    related_groups.append(group)
-            
-            # 按分值排序
-            related_groups.sort(key=lambda x: x.score, reverse=True)
-            
-            # 修改为每行4个卡片的布局
-            current_row = None
-            for i, group in enumerate(related_groups, 1):
-                # 每四个组合创建新行
-                if (i-1) % 4 == 0:
-                    current_row = tk.Frame(content_frame, bg='#2b2b2b')
-                    current_row.pack(fill=tk.X, pady=5)
-                    current_row.grid_columnconfigure((0,1,2,3), weight=1)
-                
-                # 计算当前组合的操作数
-                group_surgery_count = 1
-                if group.other_surgeries_names:
-                    surgery_groups = [g.strip() for g in group.other_surgeries_names.split('+')]
-                    if surgery_groups[0]:
-                        group_surgery_count += 1
-                    if len(surgery_groups) > 1 and surgery_groups[1]:
-                        group_surgery_count += 1
-                
-                # 使用正确的操作数创建卡片
-                card = create_card(current_row, i, group, group_surgery_count)
-                card.grid(row=0, 
-                         column=(i-1)%4,
-                         sticky='nsew', 
-                         padx=10,
-                         pady=5)
+            # 勾选的操作数
+            enabled_counts = {count for count, var in filter_vars.items() if var.get()}
+            combination_search.schedule(
+                lambda: query_combinations(search_terms, enabled_counts),
+                lambda related_groups: show_combination_cards(related_groups, search_terms),
+                delay=delay
+            )
+        
+        def query_combinations(search_terms, enabled_counts):
+            """过滤并排序组合（后台线程执行，不访问控件）"""
+            return self.core.combinations(selected_disease, search_terms, enabled_counts)
+        
+        # 分批渲染：先显示第一屏，其余随滚动分批加载
+        FIRST_BATCH = 12  # 第一屏（3行）
+        BATCH_SIZE = 8    # 之后每批（2行）
+        render_state = {'groups': [], 'terms': [], 'base_score': 0, 'loaded': 0, 'job': None}
+        
+        def show_combination_cards(related_groups, search_terms):
+            if render_state['job'] is not None:
+                preview_window.after_cancel(render_state['job'])
+                render_state['job'] = None
+            render_state.update(
+                groups=related_groups,
+                terms=search_terms,
+                # 计算基准分值（保守治疗或最低分值）
+                base_score=self.disease_index.standard_score(selected_disease),
+                loaded=0
+            )
+            canvas.yview_moveto(0)
+            load_cards(FIRST_BATCH)
+            card_pool.release_from(render_state['loaded'])
+        
+        def load_cards(count):
+            """继续渲染 count 个组合卡片"""
+            related_groups = render_state['groups']
+            search_terms = render_state['terms']
+            base_score = render_state['base_score']
+            start = render_state['loaded']
+            selected_groups = {id(group): index for index, (_, group) in enumerate(selected_cards)}
+            
+            # 每行4个卡片
+            for i in range(start + 1, min(start + count, len(related_groups)) + 1):
+                group = related_groups[i - 1]
+                card = card_pool.get(i - 1)
                 
-                # 如果有搜索词，高亮匹配的文本
-                if search_terms:
-                    for widget in card.winfo_children():
-                        if isinstance(widget, tk.Label):
-                            text = widget.cget('text')
-                            for term in search_terms:
-                                if term in text.lower():
-                                    widget.configure(fg='#FFA500')  # 使用橙色高亮显示匹配文本
-                                    break
+                # 重新绑定卡片数据，保留已选中组合的勾选状态
+                card.show(group, i, base_score,
+                          self.core.combination_balances(group, base_score), search_terms)
+                selected_index = selected_groups.get(id(group))
+                card.set_selected(selected_index is not None)
+                if selected_index is not None:
+                    # 已选中的组合指向当前显示它的卡片
+                    selected_cards[selected_index] = (card, group)
+                card.grid(row=(i-1)//4,
+                          column=(i-1)%4,
+                          sticky='nsew',
+                          padx=10,
+                          pady=5)
+                render_state['loaded'] = i
+            
+            progress_var.set(f"已加载 {render_state['loaded']} / {len(related_groups)} 个组合")
+            pool_stats_var.set(card_pool.stats_text())
+        
+        def load_next_batch():
+            render_state['job'] = None
+            if render_state['loaded'] < len(render_state['groups']):
+                load_cards(BATCH_SIZE)
+        
+        def on_canvas_scroll(first, last):
+            scrollbar.set(first, last)
+            # 滚动到接近底部（或内容不足一屏）时，在事件循环空闲时加载下一批
+            if (float(last) > 0.9 and render_state['job'] is None
+                    and render_state['loaded'] < len(render_state['groups'])):
+                render_state['job'] = preview_window.after(10, load_next_batch)
         
         # 配置滚动
-        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.configure(yscrollcommand=on_canvas_scroll)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
@@ -845,7 +512,7 @@ class MainWindow(tk.Frame):
         search_var.trace('w', update_combinations)
         
         # 初始显示
-        update_combinations()
+        update_combinations(delay=0)
         
         # 修改鼠标滚轮绑定函数
         def _on_mousewheel(event):
@@ -882,8 +549,25 @@ class MainWindow(tk.Frame):
         )
         compare_btn.pack(side=tk.RIGHT)
         
-        # 用于存储选中的卡片
-        selected_cards = []
+        # 加载进度
+        progress_var = tk.StringVar()
+        tk.Label(
+            compare_frame,
+            textvariable=progress_var,
+            font=('Arial', 10),
+            fg='white',
+            bg='#2b2b2b'
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # 卡片创建/复用统计
+        pool_stats_var = tk.StringVar()
+        tk.Label(
+            compare_frame,
+            textvariable=pool_stats_var,
+            font=('Arial', 9),
+            fg='#888888',
+            bg='#2b2b2b'
+        ).pack(side=tk.LEFT)
         
         def on_card_selected(card, group, selected):
             """处理卡片选中状态变化"""
@@ -1005,9 +689,12 @@ class MainWindow(tk.Frame):
                     tk.Label(score_frame_row, text=f" ↑{diff2}", 
                             font=('Arial', 14, 'bold'), fg='#F44336', bg='#2b2b2b').pack(side=tk.LEFT)
             
+            # 按当前参数计算各组合的盈亏平衡值（同一病种，按该病种是否基层病种计算）
+            rural_balance, worker_balance = self.core.score_balance(group.score, group.disease_name)
+            compare_balances = [self.core.score_balance(other.score, group.disease_name)
+                                for other in compare_groups or ()]
+            
             # 城乡盈亏平衡值（带差异显示）
-            is_basic = self.data_handler.is_basic_level_disease(group.disease_name)
-            rural_balance = group.score * self.rural_value if is_basic else group.score * self.weight_value * self.rural_value
             
             rural_frame_row = tk.Frame(score_frame, bg='#2b2b2b')
             rural_frame_row.pack(fill=tk.X)
@@ -1019,35 +706,34 @@ class MainWindow(tk.Frame):
                 # 对于高分组合，先显示与中分组合的差额（绿色），再显示与低分组合的差额（红色）
                 if len(compare_groups) >= 2:  # 有中分组合和低分组合
                     # 与中分组合的差额（绿色）
-                    other_rural_middle = compare_groups[1].score * self.rural_value if is_basic else compare_groups[1].score * self.weight_value * self.rural_value
+                    other_rural_middle = compare_balances[1][0]
                     diff_middle = int(rural_balance - other_rural_middle)
                     tk.Label(rural_frame_row, text=f" ↑{diff_middle}", 
                             font=('Arial', 14, 'bold'), fg='#4CAF50', bg='#2b2b2b').pack(side=tk.LEFT)
                     # 与低分组合的差额（红色）
-                    other_rural_low = compare_groups[0].score * self.rural_value if is_basic else compare_groups[0].score * self.weight_value * self.rural_value
+                    other_rural_low = compare_balances[0][0]
                     diff_low = int(rural_balance - other_rural_low)
                     tk.Label(rural_frame_row, text=f" ↑{diff_low}", 
                             font=('Arial', 14, 'bold'), fg='#F44336', bg='#2b2b2b').pack(side=tk.LEFT)
                 elif len(compare_groups) == 1:  # 只有低分组合
-                    other_rural = compare_groups[0].score * self.rural_value if is_basic else compare_groups[0].score * self.weight_value * self.rural_value
+                    other_rural = compare_balances[0][0]
                     diff = int(rural_balance - other_rural)
                     tk.Label(rural_frame_row, text=f" ↑{diff}", 
                             font=('Arial', 14, 'bold'), fg='#F44336', bg='#2b2b2b').pack(side=tk.LEFT)
             elif compare_groups:
                 # 其他组合保持原有逻辑
                 if len(compare_groups) >= 1:
-                    other_rural = compare_groups[0].score * self.rural_value if is_basic else compare_groups[0].score * self.weight_value * self.rural_value
+                    other_rural = compare_balances[0][0]
                     diff1 = int(rural_balance - other_rural)
                     tk.Label(rural_frame_row, text=f" ↑{diff1}", 
                             font=('Arial', 14, 'bold'), fg='#4CAF50', bg='#2b2b2b').pack(side=tk.LEFT)
                 if len(compare_groups) >= 2:
-                    other_rural = compare_groups[1].score * self.rural_value if is_basic else compare_groups[1].score * self.weight_value * self.rural_value
+                    other_rural = compare_balances[1][0]
                     diff2 = int(rural_balance - other_rural)
                     tk.Label(rural_frame_row, text=f" ↑{diff2}", 
                             font=('Arial', 14, 'bold'), fg='#F44336', bg='#2b2b2b').pack(side=tk.LEFT)
             
             # 职工盈亏平衡值（带差异显示）
-            worker_balance = group.score * self.worker_value if is_basic else group.score * self.weight_value * self.worker_value
             
             worker_frame_row = tk.Frame(score_frame, bg='#2b2b2b')
             worker_frame_row.pack(fill=tk.X)
@@ -1059,29 +745,29 @@ class MainWindow(tk.Frame):
                 # 对于高分组合，先显示与中分组合的差额（绿色），再显示与低分组合的差额（红色）
                 if len(compare_groups) >= 2:  # 有中分组合和低分组合
                     # 与中分组合的差额（绿色）
-                    other_worker_middle = compare_groups[1].score * self.worker_value if is_basic else compare_groups[1].score * self.weight_value * self.worker_value
+                    other_worker_middle = compare_balances[1][1]
                     diff_middle = int(worker_balance - other_worker_middle)
                     tk.Label(worker_frame_row, text=f" ↑{diff_middle}", 
                             font=('Arial', 14, 'bold'), fg='#4CAF50', bg='#2b2b2b').pack(side=tk.LEFT)
                     # 与低分组合的差额（红色）
-                    other_worker_low = compare_groups[0].score * self.worker_value if is_basic else compare_groups[0].score * self.weight_value * self.worker_value
+                    other_worker_low = compare_balances[0][1]
                     diff_low = int(worker_balance - other_worker_low)
                     tk.Label(worker_frame_row, text=f" ↑{diff_low}", 
                             font=('Arial', 14, 'bold'), fg='#F44336', bg='#2b2b2b').pack(side=tk.LEFT)
                 elif len(compare_groups) == 1:  # 只有低分组合
-                    other_worker = compare_groups[0].score * self.worker_value if is_basic else compare_groups[0].score * self.weight_value * self.worker_value
+                    other_worker = compare_balances[0][1]
                     diff = int(worker_balance - other_worker)
                     tk.Label(worker_frame_row, text=f" ↑{diff}", 
                             font=('Arial', 14, 'bold'), fg='#F44336', bg='#2b2b2b').pack(side=tk.LEFT)
             elif compare_groups:
                 # 其他组合保持原有逻辑
                 if len(compare_groups) >= 1:
-                    other_worker = compare_groups[0].score * self.worker_value if is_basic else compare_groups[0].score * self.weight_value * self.worker_value
+                    other_worker = compare_balances[0][1]
                     diff1 = int(worker_balance - other_worker)
                     tk.Label(worker_frame_row, text=f" ↑{diff1}", 
                             font=('Arial', 14, 'bold'), fg='#4CAF50', bg='#2b2b2b').pack(side=tk.LEFT)
                 if len(compare_groups) >= 2:
-                    other_worker = compare_groups[1].score * self.worker_value if is_basic else compare_groups[1].score * self.weight_value * self.worker_value
+                    other_worker = compare_balances[1][1]
                     diff2 = int(worker_balance - other_worker)
                     tk.Label(worker_frame_row, text=f" ↑{diff2}", 
                             font=('Arial', 14, 'bold'), fg='#F44336', bg='#2b2b2b').pack(side=tk.LEFT)
@@ -1157,7 +843,7 @@ class MainWindow(tk.Frame):
             other_surgeries = values[1]
             
             # 检查是否匹配当前组合
-            if (main_surgeries == ' / '.join(group.main_surgeries_names) and
+            if (main_surgeries == group.main_surgeries_text and
                 other_surgeries == group.other_surgeries_names):
                 # 选中该组合
                 self.detail_tree.selection_set(item)
@@ -1170,51 +856,14 @@ class MainWindow(tk.Frame):
         for item in self.disease_tree.get_children():
             self.disease_tree.delete(item)
         
-        # 获取所有不重复的病种名称及其标准分值
-        disease_info = {}  # 用于存储病种名称和对应的分值
-        
-        for group in self.groups:
-            disease_name = group.disease_name
-            if disease_name not in disease_info:
-                # 查找保守治疗分值
-                conservative_score = None
-                min_score = float('inf')
-                
-                # 遍历同一病种的所有组
-                for g in self.groups:
-                    if g.disease_name == disease_name:
-                        # 更新最低分值
-                        if g.score < min_score:
-                            min_score = g.score
-                        # 检查是否是保守治疗
-                        main_surgeries = ' / '.join(g.main_surgeries_names).lower()
-                        if '保守治疗' in main_surgeries:
-                            conservative_score = g.score
-                            break
-                
-                # 如果没有找到保守治疗分值，使用最低分值
-                standard_score = conservative_score if conservative_score is not None else min_score
-                disease_info[disease_name] = standard_score
-        
-        # 按病种名称排序并添加到树形列表
-        for disease_name in sorted(disease_info.keys()):
-            self.disease_tree.insert(
-                '',
-                'end',
-                values=(
-                    disease_info[disease_name],  # 标准分值
-                    disease_name  # 病种名称
-                )
-            )
+        # 所有病种（按名称排序）：(标准分值, 病种名称)
+        for item in self.core.diseases():
+            self.disease_tree.insert('', 'end', values=item)
 
     def filter_disease_list(self, *args):
-        """优化后的疾病列表过滤方法"""
+        """优化后的疾病列表过滤方法（防抖后在后台线程过滤）"""
         search_text = self.search_var.get().lower()
         
-        # 清空树形列表
-        for item in self.disease_tree.get_children():
-            self.disease_tree.delete(item)
-        
         # 获取当前排序状态
         current_sort = None
         current_reverse = False
@@ -1229,23 +878,19 @@ class MainWindow(tk.Frame):
                 current_reverse = False
                 break
         
-        # 使用预处理的数据进行过滤
-        filtered_items = [
-            (score, name) 
-            for name, score in self.disease_info.items() 
-            if search_text in name.lower()
-        ]
-        
-        # 如果有排序，应用排序
-        if current_sort:
-            col_index = 0 if current_sort == 'standard_score' else 1
-            try:
-                filtered_items.sort(
-                    key=lambda x: float(x[col_index]) if col_index == 0 else x[col_index],
-                    reverse=current_reverse
-                )
-            except ValueError:
-                filtered_items.sort(key=lambda x: x[col_index], reverse=current_reverse)
+        self.disease_search.schedule(
+            lambda: self._query_diseases(search_text, current_sort, current_reverse),
+            self._show_diseases
+        )
+
+    def _query_diseases(self, search_text, current_sort, current_reverse):
+        """过滤并排序病种列表（后台线程执行，不访问控件）"""
+        # 同时支持名称子串、拼音和首字母
+        return self.core.diseases(search_text, current_sort, current_reverse)
+
+    def _show_diseases(self, filtered_items):
+        # 清空树形列表
+        self.disease_tree.delete(*self.disease_tree.get_children())
         
         # 插入排序后的项目
         for item in filtered_items:
@@ -1256,73 +901,28 @@ class MainWindow(tk.Frame):
         if not selection:
             return
             
-        # 清空手术搜索框
+        # 清空手术搜索框（下面直接重建列表，不需要再触发一次过滤）
         self.surgery_search_var.set("")
+        self.surgery_search.cancel()
         
         # 清空详细信息表格
-        for item in self.detail_tree.get_children():
-            self.detail_tree.delete(item)
+        self.detail_tree.clear()
             
         selected_item = self.disease_tree.item(selection[0])
         selected_disease = selected_item['values'][1]  # 改为 values[1]，因为病种名称现在在第二列
         
         # 判断是否为基层病种并更新显示
-        is_basic_level = self.data_handler.is_basic_level_disease(selected_disease)
-        self.basic_level_var.set("是" if is_basic_level else "否")
-        
-        # 获取选中病种的所有相关信息
-        related_groups = [
-            group for group in self.groups 
-            if group.disease_name == selected_disease
-        ]
+        summary = self.core.disease_summary(selected_disease)
+        self.basic_level_var.set("是" if summary and summary['is_basic'] else "否")
         
         # 更新基准分值（最低分值）
-        if related_groups:
-            min_score = min(group.score for group in related_groups)
-            self.base_score_var.set(str(min_score))
-        else:
-            self.base_score_var.set("-")
+        self.base_score_var.set(str(summary['min_score']) if summary else "-")
         
         # 清空当前选择分值
         self.current_score_var.set("-")
         
         # 更新详细信息表格
-        for group in related_groups:
-            main_surgeries_names = ' / '.join(group.main_surgeries_names)
-            other_surgeries_names = group.other_surgeries_names
-            score = group.score
-            
-            # 计算手术操作个数
-            surgery_count = 1  # 主要手术至少有1个
-            
-            # 检查其他手术区域
-            if other_surgeries_names:
-                surgery_groups = [group.strip() for group in other_surgeries_names.split('+')]
-                if surgery_groups[0].strip():  # 检查第一个其他手术区域
-                    surgery_count += 1
-                if len(surgery_groups) > 1 and surgery_groups[1].strip():  # 检查第二个其他手术区域
-                    surgery_count += 1
-            
-            # 获取是否为基层病种
-            is_basic_level = self.data_handler.is_basic_level_disease(selected_disease)
-            
-            # 使用保存的参数值计算城乡盈亏平衡值
-            if is_basic_level:
-                rural_balance = score * self.rural_value
-            else:
-                rural_balance = score * self.weight_value * self.rural_value
-            
-            self.detail_tree.insert(
-                '',
-                'end',
-                values=(
-                    main_surgeries_names,  # 不再包含操作数
-                    other_surgeries_names,
-                    surgery_count,  # 单独的操作数列
-                    score,
-                    f"{rural_balance:.2f}"
-                )
-            )
+        self._show_surgeries(self.core.disease_groups(selected_disease))
         
         # 更新病种详情显示
         self.disease_detail.config(state='normal')  # 临时允许编辑
@@ -1402,7 +1002,6 @@ class MainWindow(tk.Frame):
         
         # 设置边距和间距
         margin_x = 80
-        margin_y = 30
         
         # 计算绘图区域
         chart_width = canvas_width - 2 * margin_x
@@ -1472,49 +1071,23 @@ class MainWindow(tk.Frame):
             return
         
         try:
-            # 使用保存的参数值
-            weight = self.weight_value
-            rural_value = self.rural_value
-            worker_value = self.worker_value
+            # 行id为组合在目录中的行号
+            group = self.groups[int(selection[0])]
             
-            # 获取选中行的分值 - 修改这里，使用正确的分值列索引
-            item = self.detail_tree.item(selection[0])
-            score = float(item['values'][3])  # 改为 values[3]，因为现在分值在第4列
+            # 按当前参数计算盈亏平衡值及范围
+            rural_range, worker_range = self.core.balance_ranges(group)
             
-            # 获取选中的病种名称
-            disease_selection = self.disease_tree.selection()
-            if disease_selection:
-                disease_name = self.disease_tree.item(disease_selection[0])['values'][0]
-                is_basic_level = self.data_handler.is_basic_level_disease(disease_name)
+            # 绘制链路路图
+            self.draw_result_chart(*rural_range, *worker_range, self.core.is_basic(group.disease_name))
                 
-                # 计算盈亏平衡值
-                if is_basic_level:
-                    rural_balance = score * rural_value
-                    worker_balance = score * worker_value
-                else:
-                    rural_balance = score * weight * rural_value
-                    worker_balance = score * weight * worker_value
-                
-                # 计算范围
-                rural_min = rural_balance * 0.6
-                rural_max = rural_balance * 2.0
-                worker_min = worker_balance * 0.6
-                worker_max = worker_balance * 2.0
-                
-                # 绘制链路路图
-                self.draw_result_chart(
-                    rural_min, rural_balance, rural_max,
-                    worker_min, worker_balance, worker_max,
-                    is_basic_level
-                )
-                
-        except ValueError:
+        except (ValueError, IndexError):
             # 清空链路图
             self.result_canvas.delete('all')
 
     def open_compare_window(self):
         """打开对比窗口"""
-        compare_window = CompareWindow(self.master, self.data_handler)
+        from gui.compare_window import CompareWindow
+        CompareWindow(self.master, self.core)
 
     def create_surgery_list(self):
         # ... 现有代码 ...
@@ -1564,9 +1137,22 @@ class MainWindow(tk.Frame):
         self.rural_value = rural_urban
         self.worker_value = worker
         self.weight_value = weight
+        # 一次性重新计算全部组合，再刷新界面上已有的行
+        if self.core.set_params(rural_urban, worker, weight):
+            self.refresh_balance_column(self.detail_tree)
+            for refresh in list(self.balance_views):
+                refresh()
         # 更新当前显示的结果
         self.calculate_results()
 
+    def refresh_balance_column(self, tree):
+        """按行id（组合行号）从盈亏平衡值数组刷新表格中的城乡盈亏平衡值列"""
+        rural_balances = self.balance_engine.rural_balances
+        # 虚拟表格只改模型中的值，可视区域在下一次渲染时统一刷新
+        for item in tree.get_children():
+            if item.isdigit():
+                tree.set(item, 'rural_balance', f"{rural_balances[int(item)]:.2f}")
+
     def filter_surgery_list(self, *args):
         search_text = self.surgery_search_var.get().lower()
         
@@ -1591,75 +1177,25 @@ class MainWindow(tk.Frame):
                 current_reverse = False
                 break
         
+        self.surgery_search.schedule(
+            lambda: self._query_surgeries(selected_disease, search_text, current_sort, current_reverse),
+            self._show_surgeries
+        )
+
+    def _query_surgeries(self, selected_disease, search_text, current_sort, current_reverse):
+        """过滤并排序病种下的手术组合（后台线程执行，不访问控件）"""
+        return self.core.disease_groups(selected_disease, search_text, current_sort, current_reverse)
+
+    def _show_surgeries(self, filtered_items):
         # 清空详细信息表格
-        for item in self.detail_tree.get_children():
-            self.detail_tree.delete(item)
-            
-        # 获取选中病种的所有相关信息
-        related_groups = [
-            group for group in self.groups 
-            if group.disease_name == selected_disease
-        ]
-        
-        # 更新详细信息表格，加入搜索过滤
-        filtered_items = []
-        for group in related_groups:
-            main_surgeries_names = ' / '.join(group.main_surgeries_names)
-            other_surgeries_names = group.other_surgeries_names
-            score = group.score
-            
-            # 计算手术操作个数
-            surgery_count = 1  # 主要手术至少有1个
-            
-            # 检查其他手术区域
-            if other_surgeries_names:
-                surgery_groups = [group.strip() for group in other_surgeries_names.split('+')]
-                if surgery_groups[0].strip():  # 检查第一个其他手术区域
-                    surgery_count += 1
-                if len(surgery_groups) > 1 and surgery_groups[1].strip():  # 检查第二个其他手术区域
-                    surgery_count += 1
-            
-            # 如果搜索文本为空或者搜索文本在主要手术或次要手术中
-            if (not search_text or 
-                search_text in main_surgeries_names.lower() or 
-                search_text in other_surgeries_names.lower()):
-                
-                # 获取是否为基层病种
-                is_basic_level = self.data_handler.is_basic_level_disease(selected_disease)
-                
-                # 使用保存的参数值计算城乡盈亏平衡值
-                if is_basic_level:
-                    rural_balance = score * self.rural_value
-                else:
-                    rural_balance = score * self.weight_value * self.rural_value
-                
-                filtered_items.append((
-                    main_surgeries_names,  # 不再包含操作数
-                    other_surgeries_names,
-                    surgery_count,  # 添加手术操作数
-                    score,
-                    rural_balance
-                ))
-        
-        # 如果有排序，应用排序
-        if current_sort:
-            col_index = {
-                'main_surgery': 0,
-                'other_surgery': 1,
-                'surgery_count': 2,
-                'score': 3,
-                'rural_balance': 4
-            }[current_sort]
-            filtered_items.sort(
-                key=lambda x: float(x[col_index]) if isinstance(x[col_index], (int, float)) else x[col_index],
-                reverse=current_reverse
-            )
+        self.detail_tree.clear()
         
         # 插入排序后的项目
         for item in filtered_items:
             self.detail_tree.insert(
                 '',
                 'end',
+                iid=str(item[5]),
                 values=(
                     item[0],  # 主要手术
                     item[1],  # 其他手术
@@ -1682,8 +1218,7 @@ class MainWindow(tk.Frame):
             l.sort(reverse=reverse)
             
         # 重新排序所有项目
-        for index, (val, k) in enumerate(l):
-            self.detail_tree.move(k, '', index)
+        self.detail_tree.reorder([k for val, k in l])
             
         # 切换排序方向
         self.detail_tree.heading(col, 
@@ -1719,8 +1254,8 @@ class MainWindow(tk.Frame):
         result_frame = tk.Frame(search_window)
         result_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        # 修改树形结构，添加分值列
-        result_tree = ttk.Treeview(
+        # 修改树形结构，添加分值列（虚拟化表格，结果再多也只创建一屏的行）
+        result_tree = VirtualTreeview(
             result_frame,
             columns=('disease', 'main_surgery', 'other_surgery', 'score', 'rural_balance'),
             show='tree headings',  # 显示树形图标和表头
@@ -1742,100 +1277,63 @@ class MainWindow(tk.Frame):
         result_tree.column('score', width=80, anchor='e')  # 右对齐
         result_tree.column('rural_balance', width=120, anchor='e')  # 右对齐
         
-        scrollbar = ttk.Scrollbar(result_frame, orient="vertical", command=result_tree.yview)
-        result_tree.configure(yscrollcommand=scrollbar.set)
-        
         result_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        def search_surgery(*args):
+        def query_results(search_text):
+            """搜索匹配的手术组合及子项（后台线程执行，不访问控件）"""
+            results = []
+            # 通过倒排索引搜索匹配的手术
+            for group in self.core.search_surgeries(search_text):
+                main_surgeries = group.main_surgeries_names
+                
+                # 主要手术、其他手术的显示文本
+                main_surgery_text = group.main_surgeries_text
+                other_surgery_text = group.other_surgeries_names or ""
+                
+                # 城乡盈亏平衡值（按当前参数预先算好）
+                rural_balance, _ = self.core.balance(group)
+                
+                children = []
+                # 添加主要手术子项
+                for i, surgery in enumerate(main_surgeries, 1):
+                    tags = ('matched',) if search_text in surgery.lower() else ()
+                    children.append((("", f"{i}. {surgery}", "", "", ""), tags))
+                
+                # 添加其他手术子项（次要手术、搭配手术）
+                other_surgeries_list = (group.secondary_surgeries_names, group.companion_surgeries_names)
+                for i, surgeries in enumerate(other_surgeries_list, 1):
+                    for j, surgery in enumerate(surgeries, 1):
+                        tags = ('matched',) if search_text in surgery.lower() else ()
+                        children.append((("", "", f"{i}.{j} {surgery}", "", ""), tags))
+                
+                # 行id为组合在目录中的行号
+                results.append((str(self.core.row_of(group)), (
+                    group.disease_name,
+                    main_surgery_text,
+                    other_surgery_text,
+                    f"{group.score:.2f}",  # 添加分值
+                    f"{rural_balance:.2f}"  # 添加城乡盈亏平衡值
+                ), children))
+            return results
+        
+        def show_results(results):
             # 清空现有结果
-            for item in result_tree.get_children():
-                result_tree.delete(item)
-            
+            result_tree.clear()
+            for iid, values, children in results:
+                parent = result_tree.insert('', 'end', iid=iid, values=values)
+                for child_values, tags in children:
+                    result_tree.insert(parent, 'end', values=child_values, tags=tags)
+        
+        # 输入防抖，查询在后台线程执行，只显示最新一次的结果
+        result_search = SearchScheduler(search_window)
+        
+        def search_surgery(*args):
             search_text = search_var.get().strip().lower()
             if not search_text:
+                result_search.cancel()
+                result_tree.clear()
                 return
-                
-            # 搜索匹配的手术
-            for group in self.groups:
-                main_surgeries = group.main_surgeries_names
-                other_surgeries = group.other_surgeries_names
-                
-                # 检查是否匹配搜索条件
-                if any(search_text in surgery.lower() for surgery in main_surgeries) or search_text in other_surgeries.lower():
-                    # 创建主要手术的显示文本
-                    main_surgery_text = ""
-                    for i, surgery in enumerate(main_surgeries, 1):
-                        if i > 1:
-                            main_surgery_text += " / "
-                        main_surgery_text += surgery
-                    
-                    # 创建其他手术的显示文本
-                    other_surgery_text = other_surgeries if other_surgeries else ""
-                    
-                    # 计算城乡盈亏平衡值
-                    is_basic = self.data_handler.is_basic_level_disease(group.disease_name)
-                    if is_basic:
-                        rural_balance = group.score * self.rural_value
-                    else:
-                        rural_balance = group.score * self.weight_value * self.rural_value
-                    
-                    # 插入行
-                    parent = result_tree.insert('', 'end', values=(
-                        group.disease_name,
-                        main_surgery_text,
-                        other_surgery_text,
-                        f"{group.score:.2f}",  # 添加分值
-                        f"{rural_balance:.2f}"  # 添加城乡盈亏平衡值
-                    ))
-                    
-                    # 添加主要手术子项
-                    for i, surgery in enumerate(main_surgeries, 1):
-                        if search_text in surgery.lower():
-                            result_tree.insert(parent, 'end', values=(
-                                "",
-                                f"{i}. {surgery}",
-                                "",
-                                "",
-                                ""
-                            ), tags=('matched',))
-                        else:
-                            result_tree.insert(parent, 'end', values=(
-                                "",
-                                f"{i}. {surgery}",
-                                "",
-                                "",
-                                ""
-                            ))
-                    
-                    # 添加其他手术子项
-                    if other_surgeries:
-                        other_surgeries_list = [s.strip() for s in other_surgeries.split('+')]
-                        for i, surgery_group in enumerate(other_surgeries_list, 1):
-                            if surgery_group:
-                                surgeries = [s.strip() for s in surgery_group.split('/')]
-                                for j, surgery in enumerate(surgeries, 1):
-                                    if surgery:  # 确保不是空字符串
-                                        if search_text in surgery.lower():
-                                            result_tree.insert(parent, 'end', values=(
-                                                "",
-                                                "",
-                                                f"{i}.{j} {surgery}",
-                                                "",
-                                                ""
-                                            ), tags=('matched',))
-                                        else:
-                                            result_tree.insert(parent, 'end', values=(
-                                                "",
-                                                "",
-                                                f"{i}.{j} {surgery}",
-                                                "",
-                                                ""
-                                            ))
-                    
-                    # 默认展开父节点
-                    result_tree.item(parent, open=True)
+            result_search.schedule(lambda: query_results(search_text), show_results)
         
         # 设置匹配项的样式
         result_tree.tag_configure('matched', foreground='red')
@@ -1843,6 +1341,17 @@ class MainWindow(tk.Frame):
         # 绑定搜索事件
         search_var.trace('w', search_surgery)
         
+        # 参数变化时刷新搜索结果中的城乡盈亏平衡值，窗口关闭后注销
+        def refresh_results():
+            self.refresh_balance_column(result_tree)
+        
+        def on_destroy(event):
+            if event.widget is search_window and refresh_results in self.balance_views:
+                self.balance_views.remove(refresh_results)
+        
+        self.balance_views.append(refresh_results)
+        search_window.bind('<Destroy>', on_destroy, add='+')
+        
         # 双击结果时跳转到对应病种
         def on_double_click(event):
             selection = result_tree.selection()
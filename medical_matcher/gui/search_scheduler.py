@@ -0,0 +1,92 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 所有搜索框共用一个后台线程，查询依次执行。数据对象的索引（倒排索引、拼音索引等）
+# 也可能同时在首页的预加载/索引重建线程中初始化，由 DataHandler._index 的按索引加锁保证只构建一次，
+# 搜索线程请求的索引正在别处构建时会等它完成；查询函数本身只读数据，不需要另外加锁
+_executor = None
+_executor_lock = threading.Lock()
+
+DEFAULT_DELAY = 150  # 防抖时间（毫秒）
+POLL_INTERVAL = 15   # 检查后台查询是否完成的间隔（毫秒）
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search')
+        return _executor
+
+
+class SearchScheduler:
+    """
+    搜索调度器
+
+    输入变化时先等待防抖时间，期间的连续按键合并为一次查询；查询在后台线程执行，
+    新的查询会取消尚未开始的旧查询，已经在执行的旧查询结果直接丢弃，
+    只有最新一次的结果通过 after() 回到 Tk 线程显示。
+    query 只能做纯计算，不能访问 Tk 控件；需要的输入应在调用 schedule 前读取好。
+    """
+
+    def __init__(self, widget, delay=DEFAULT_DELAY):
+        self.widget = widget
+        self.delay = delay
+        self._generation = 0
+        self._after_id = None
+        self._future = None
+        widget.bind('<Destroy>', self._on_destroy, add='+')
+
+    def schedule(self, query, apply, delay=None):
+        """
+        安排一次查询
+        Args:
+            query: 无参数的查询函数，在后台线程执行
+            apply: 接收查询结果的函数，在 Tk 线程执行
+            delay: 防抖时间（毫秒），默认使用创建时的设置
+        """
+        self.cancel()
+        generation = self._generation
+        self._after_id = self.widget.after(
+            self.delay if delay is None else delay,
+            lambda: self._start(generation, query, apply)
+        )
+
+    def cancel(self):
+        """取消等待中和执行中的查询"""
+        self._generation += 1
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+    @property
+    def pending(self):
+        """是否有尚未显示结果的查询"""
+        return self._after_id is not None
+
+    def _start(self, generation, query, apply):
+        if generation != self._generation:
+            return
+        self._future = _get_executor().submit(query)
+        self._poll(generation, self._future, apply)
+
+    def _poll(self, generation, future, apply):
+        if generation != self._generation:
+            return
+        if not future.done():
+            self._after_id = self.widget.after(POLL_INTERVAL, lambda: self._poll(generation, future, apply))
+            return
+        self._after_id = None
+        self._future = None
+        # 查询中的异常在 Tk 线程重新抛出，由 Tk 的回调异常处理统一报告
+        apply(future.result())
+
+    def _on_destroy(self, event):
+        if event.widget is self.widget:
+            self.cancel()
@@ -0,0 +1,299 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualTreeview(ttk.Frame):
+    """
+    虚拟化表格
+
+    全部行保存在 Python 模型中，Treeview 里只保留可视区域大小的一组行，
+    滚动时复用这些行改写内容，因此无论结果多大，Tk 中的行数都不超过一屏。
+    提供与 ttk.Treeview 相近的接口（insert、delete、item、set、selection 等），
+    子行固定展开，显示在父行之后。
+    """
+
+    def __init__(self, master, columns, show='headings', height=15, **kw):
+        super().__init__(master)
+        self.tree = ttk.Treeview(self, columns=columns, show=show, height=height,
+                                 selectmode='browse', **kw)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, sticky='ns')
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self._columns = list(columns)
+        self._top = []          # 顶层行的 key，按显示顺序
+        self._rows = {}         # key -> [values, tags, parent]
+        self._children = {}     # 父行 key -> [子行 key]
+        self._lines = None      # 展开后的显示顺序（父行后紧跟子行），按需重建
+        self._line_index = None
+        self._next_id = 0
+
+        self._slots = []        # Treeview 中复用的行
+        self._visible = height  # 可视行数，窗口大小变化时重新计算
+        self._offset = 0        # 第一可视行在 _lines 中的位置
+        self._selected = None
+        self._render_pending = False
+
+        self.tree.bind('<<TreeviewSelect>>', self._on_tree_select)
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll_lines(-3))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_lines(3))
+        for sequence, step in (('<Up>', -1), ('<Down>', 1)):
+            self.tree.bind(sequence, lambda e, step=step: self._move_selection(step))
+        self.tree.bind('<Prior>', lambda e: self._move_selection(-self._visible))
+        self.tree.bind('<Next>', lambda e: self._move_selection(self._visible))
+        self.tree.bind('<Home>', lambda e: self._move_selection(-len(self._get_lines())))
+        self.tree.bind('<End>', lambda e: self._move_selection(len(self._get_lines())))
+
+    # ---- 与 ttk.Treeview 相同的表头/列接口 ----
+
+    def heading(self, column, option=None, **kw):
+        return self.tree.heading(column, option, **kw)
+
+    def column(self, column, option=None, **kw):
+        return self.tree.column(column, option, **kw)
+
+    def tag_configure(self, tagname, option=None, **kw):
+        return self.tree.tag_configure(tagname, option, **kw)
+
+    def bind(self, sequence=None, func=None, add=None):
+        """选择事件由本控件发出，其余事件绑定到内部 Treeview"""
+        if sequence == '<<TreeviewSelect>>':
+            return super().bind(sequence, func, add)
+        return self.tree.bind(sequence, func, add)
+
+    # ---- 数据模型 ----
+
+    def __len__(self):
+        return len(self._get_lines())
+
+    @property
+    def item_count(self):
+        """Treeview 中实际存在的行数"""
+        return len(self._slots)
+
+    def insert(self, parent, index, iid=None, values=(), tags=(), **kw):
+        """添加一行，只支持追加到末尾（index 为 'end'）"""
+        if iid is None:
+            iid = f"I{self._next_id:06d}"
+            self._next_id += 1
+        iid = str(iid)
+        if isinstance(tags, str):
+            tags = (tags,)
+        parent = str(parent) if parent else ''
+        self._rows[iid] = [tuple(values), tuple(tags), parent]
+        if parent:
+            self._children.setdefault(parent, []).append(iid)
+        else:
+            self._top.append(iid)
+        self._invalidate()
+        return iid
+
+    def clear(self):
+        """删除全部行"""
+        self._top = []
+        self._rows = {}
+        self._children = {}
+        self._selected = None
+        self._offset = 0
+        self._invalidate()
+
+    def delete(self, *items):
+        keys = set()
+        for item in items:
+            keys.add(item)
+            keys.update(self._children.get(item, ()))
+        keys &= self._rows.keys()  # 已删除或不存在的行不计入，避免误判为全部删除
+        if len(keys) >= len(self._rows):
+            self.clear()
+            return
+        self._top = [key for key in self._top if key not in keys]
+        for key in keys:
+            row = self._rows.pop(key, None)
+            self._children.pop(key, None)
+            if row and row[2] in self._children:
+                self._children[row[2]] = [child for child in self._children[row[2]] if child != key]
+        if self._selected in keys:
+            self._selected = None
+        self._invalidate()
+
+    def reorder(self, keys):
+        """按给定顺序重排顶层行（子行跟随父行）"""
+        self._top = list(keys)
+        self._invalidate()
+
+    def get_children(self, item=''):
+        if item:
+            return tuple(self._children.get(item, ()))
+        return tuple(self._top)
+
+    def parent(self, item):
+        return self._rows[item][2]
+
+    def exists(self, item):
+        return item in self._rows
+
+    def item(self, item, option=None, **kw):
+        row = self._rows[item]
+        if kw:
+            if 'values' in kw:
+                row[0] = tuple(kw['values'])
+            if 'tags' in kw:
+                row[1] = (kw['tags'],) if isinstance(kw['tags'], str) else tuple(kw['tags'])
+            self._schedule_render()
+            return None
+        info = {'text': '', 'values': list(row[0]), 'tags': list(row[1]), 'open': True}
+        return info[option] if option else info
+
+    def set(self, item, column, value=None):
+        """读取或修改某行某列的值"""
+        row = self._rows[item]
+        index = self._columns.index(column)
+        if value is None:
+            return row[0][index]
+        values = list(row[0])
+        values[index] = value
+        row[0] = tuple(values)
+        self._schedule_render()
+        return None
+
+    def selection(self):
+        return (self._selected,) if self._selected is not None else ()
+
+    def selection_set(self, item):
+        self._selected = item
+        self.see(item)
+
+    def see(self, item):
+        """滚动使指定行可见"""
+        line = self._get_line_index().get(item)
+        if line is None:
+            return
+        if line < self._offset:
+            self._offset = line
+        elif line >= self._offset + self._visible:
+            self._offset = line - self._visible + 1
+        self._schedule_render()
+
+    def _invalidate(self):
+        self._lines = None
+        self._line_index = None
+        self._schedule_render()
+
+    def _get_lines(self):
+        if self._lines is None:
+            lines = []
+            children = self._children
+            for key in self._top:
+                lines.append(key)
+                if key in children:
+                    lines.extend(children[key])
+            self._lines = lines
+        return self._lines
+
+    def _get_line_index(self):
+        if self._line_index is None:
+            self._line_index = {key: line for line, key in enumerate(self._get_lines())}
+        return self._line_index
+
+    # ---- 渲染 ----
+
+    def _schedule_render(self):
+        # 同一轮事件中的多次修改只渲染一次
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        self._render_pending = False
+        lines = self._get_lines()
+        self._offset = max(0, min(self._offset, len(lines) - self._visible))
+        count = min(self._visible, len(lines) - self._offset)
+
+        while len(self._slots) < count:
+            self._slots.append(self.tree.insert('', 'end', iid=str(len(self._slots))))
+        while len(self._slots) > count:
+            self.tree.delete(self._slots.pop())
+
+        selected_slot = None
+        for slot, key in zip(self._slots, lines[self._offset:self._offset + count]):
+            values, tags, parent = self._rows[key]
+            text = '' if parent or key not in self._children else '▼'
+            self.tree.item(slot, text=text, values=values, tags=tags)
+            if key == self._selected:
+                selected_slot = slot
+
+        if selected_slot is not None:
+            self.tree.selection_set(selected_slot)
+            self.tree.focus(selected_slot)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        if lines:
+            self.scrollbar.set(self._offset / len(lines), (self._offset + count) / len(lines))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_configure(self, event):
+        # 根据控件实际高度计算一屏能显示的行数
+        top, row_height = 0, 0
+        if self._slots:
+            box = self.tree.bbox(self._slots[0])
+            if box:
+                top, row_height = box[1], box[3]
+        if not row_height:
+            row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+            top = row_height
+        visible = max(1, (event.height - top) // row_height)
+        if visible != self._visible:
+            self._visible = visible
+            self._schedule_render()
+
+    # ---- 滚动与选择 ----
+
+    def yview(self, *args):
+        """滚动条回调：('moveto', 比例) 或 ('scroll', 步数, 'units'/'pages')"""
+        lines = len(self._get_lines())
+        if not args:
+            return (self._offset / lines, (self._offset + self._visible) / lines) if lines else (0.0, 1.0)
+        if args[0] == 'moveto':
+            self._offset = int(float(args[1]) * lines)
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            self._offset += step * self._visible if args[2] == 'pages' else step
+        self._schedule_render()
+
+    def _scroll_lines(self, step):
+        self._offset += step
+        self._schedule_render()
+        return 'break'
+
+    def _on_mousewheel(self, event):
+        # Windows 每格 delta 为 120，macOS 为 1
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_lines(-step * 3)
+
+    def _on_tree_select(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        line = self._offset + self._slots.index(selection[0])
+        lines = self._get_lines()
+        if line >= len(lines) or lines[line] == self._selected:
+            return  # 渲染时恢复的选择，不重复通知
+        self._selected = lines[line]
+        self.event_generate('<<TreeviewSelect>>')
+
+    def _move_selection(self, step):
+        lines = self._get_lines()
+        if not lines:
+            return 'break'
+        line = self._get_line_index().get(self._selected, self._offset - 1 if step > 0 else self._offset)
+        line = max(0, min(line + step, len(lines) - 1))
+        if lines[line] != self._selected:
+            self.selection_set(lines[line])
+            self.event_generate('<<TreeviewSelect>>')
+        return 'break'
@@ -1,6 +1,97 @@
+from models.string_table import STRINGS
+
+
+def _split_names(part):
+    """按 '/' 拆分一组手术名称，去掉空白和空项"""
+    return [name.strip() for name in part.split('/') if name.strip()]
+
+
+def derive_fields(main_surgeries_names, other_surgeries_names):
+    """
+    计算组合的派生字段
+    Returns:
+        tuple: (次要手术名称列表, 搭配手术名称列表, 操作数,
+                主要手术显示文本, 主要手术小写文本, 其他手术小写文本, 搜索文本)
+    """
+    # 其他手术按 '+' 分为次要手术和搭配手术两组
+    parts = other_surgeries_names.split('+') if other_surgeries_names else []
+    secondary = _split_names(parts[0]) if parts else []
+    companion = _split_names(parts[1]) if len(parts) > 1 else []
+
+    # 操作数：主要手术至少1个，次要手术、搭配手术非空时各加1
+    surgery_count = 1
+    if parts and parts[0].strip():
+        surgery_count += 1
+    if len(parts) > 1 and parts[1].strip():
+        surgery_count += 1
+
+    # 显示和搜索用的字符串
+    main_text = ' / '.join(main_surgeries_names)
+    other_lower = (other_surgeries_names or '').lower()
+    search_text = ' '.join(name.lower() for name in main_surgeries_names) + ' ' + other_lower
+    return secondary, companion, surgery_count, main_text, main_text.lower(), other_lower, search_text
+
+
+def parse_row(row):
+    """把目录中的一行（字典或 pandas 行）解析为 DiseaseGroup 的构造参数"""
+    dip_code = row['DIP分组编码']
+    disease_name = row['病种名称']
+    
+    # 主要手术
+    main_surgery = str(row['主要手术编码']).replace('nan', '')
+    main_surgery_name = str(row['主要手术名称']).replace('nan', '')
+    
+    # 其他手术
+    other_surgeries = str(row['其他手术编码']).replace('nan', '')
+    other_surgeries_name = str(row['其他手术名称']).replace('nan', '')
+    
+    # 获取备注信息
+    remark = str(row.get('备注', '')).replace('nan', '')
+    
+    # 如果有多个手术组，确保+号前后的空格处理正确
+    if other_surgeries_name:
+        other_surgeries_name = ' + '.join(
+            part.strip() 
+            for part in other_surgeries_name.split('+')
+        )
+    
+    # 处理主要手术代码和名称
+    main_surgeries_list = [s.strip() for s in main_surgery.split('/') if s]
+    main_surgeries_names_list = [s.strip() for s in main_surgery_name.split('/') if s]
+    
+    # 处理其他手术代码
+    other_surgeries_list = [s.strip() for s in other_surgeries.split('/') if s]
+    
+    # 如果主要手术和其他手术都为空，则设置为保守治疗
+    if not main_surgeries_list and not other_surgeries_list:
+        main_surgeries_names_list = ["保守治疗"]
+    
+    return dict(
+        dip_code=dip_code,
+        main_surgeries=main_surgeries_list,
+        main_surgeries_names=main_surgeries_names_list,
+        other_surgeries=other_surgeries_list,
+        other_surgeries_names=other_surgeries_name,
+        score=row['分值'],
+        disease_name=disease_name,
+        remark=remark,
+        disease_code=str(row.get('病种编码', '')).replace('nan', '')
+    )
+
+
 class DiseaseGroup:
+    # 目录有几千个组合，使用 __slots__ 节省内存并加快属性访问
+    __slots__ = (
+        'dip_code', 'main_surgeries', 'main_surgeries_names', 'other_surgeries',
+        'other_surgeries_names', 'score', 'disease_name', 'remark', 'disease_code',
+        'is_basic_level',
+        # 以下为加载时预先计算的派生字段
+        'secondary_surgeries_names', 'companion_surgeries_names', 'surgery_count',
+        'main_surgeries_text', 'main_surgeries_lower', 'other_surgeries_lower', 'search_text',
+    )
+
     def __init__(self, dip_code, main_surgeries, main_surgeries_names, other_surgeries, 
-                 other_surgeries_names, score, disease_name, remark=''):
+                 other_surgeries_names, score, disease_name, remark='', disease_code=''):
         self.dip_code = dip_code
         self.main_surgeries = main_surgeries
         self.main_surgeries_names = main_surgeries_names
@@ -9,49 +100,20 @@ class DiseaseGroup:
         self.score = score
         self.disease_name = disease_name
         self.remark = remark
+        self.disease_code = disease_code or str(dip_code).split(':')[0]
         self.is_basic_level = '基层病种' in (remark or '')
 
+        (self.secondary_surgeries_names, self.companion_surgeries_names, self.surgery_count,
+         self.main_surgeries_text, self.main_surgeries_lower, self.other_surgeries_lower,
+         self.search_text) = derive_fields(main_surgeries_names, other_surgeries_names)
+
     @classmethod
     def from_row(cls, row):
-        dip_code = row['DIP分组编码']
-        disease_name = row['病种名称']
-        
-        # 主要手术
-        main_surgery = str(row['主要手术编码']).replace('nan', '')
-        main_surgery_name = str(row['主要手术名称']).replace('nan', '')
-        
-        # 其他手术
-        other_surgeries = str(row['其他手术编码']).replace('nan', '')
-        other_surgeries_name = str(row['其他手术名称']).replace('nan', '')
-        
-        # 获取备注信息
-        remark = str(row.get('备注', '')).replace('nan', '')
-        
-        # 如果有多个手术组，确保+号前后的空格处理正确
-        if other_surgeries_name:
-            other_surgeries_name = ' + '.join(
-                part.strip() 
-                for part in other_surgeries_name.split('+')
-            )
-        
-        # 处理主要手术代码和名称
-        main_surgeries_list = [s.strip() for s in main_surgery.split('/') if s]
-        main_surgeries_names_list = [s.strip() for s in main_surgery_name.split('/') if s]
-        
-        # 处理其他手术代码
-        other_surgeries_list = [s.strip() for s in other_surgeries.split('/') if s]
-        
-        # 如果主要手术和其他手术都为空，则设置为保守治疗
-        if not main_surgeries_list and not other_surgeries_list:
-            main_surgeries_names_list = ["保守治疗"]
-        
-        return cls(
-            dip_code=dip_code,
-            main_surgeries=main_surgeries_list,
-            main_surgeries_names=main_surgeries_names_list,
-            other_surgeries=other_surgeries_list,
-            other_surgeries_names=other_surgeries_name,
-            score=row['分值'],
-            disease_name=disease_name,
-            remark=remark
-        ) 
\ No newline at end of file
+        fields = parse_row(row)
+        # 名称和编码登记到共享字符串表，相同的字符串只保留一份
+        canonical = STRINGS.canonical
+        for key in ('dip_code', 'disease_name', 'disease_code', 'remark', 'other_surgeries_names'):
+            fields[key] = canonical(fields[key])
+        for key in ('main_surgeries', 'main_surgeries_names', 'other_surgeries'):
+            fields[key] = [canonical(value) for value in fields[key]]
+        return cls(**fields)
@@ -0,0 +1,179 @@
+from models.disease_group import derive_fields, parse_row
+from models.string_table import STRINGS
+
+# 单值字符串列：每行存字符串表中的id
+STRING_FIELDS = (
+    'dip_code', 'disease_name', 'disease_code', 'remark', 'other_surgeries_names',
+    'main_surgeries_text', 'main_surgeries_lower', 'other_surgeries_lower', 'search_text',
+)
+# 列表列：按 CSR 方式存储（offsets[row]:offsets[row+1] 为该行在 ids 中的范围）
+LIST_FIELDS = (
+    'main_surgeries', 'main_surgeries_names', 'other_surgeries',
+    'secondary_surgeries_names', 'companion_surgeries_names',
+)
+
+
+class GroupTable:
+    """
+    按列存储的组合目录
+
+    每列是一个 NumPy 数组，字符串统一登记在字符串表（默认为共享的 STRINGS）中，
+    列里只存id；组合对象（DiseaseGroupView）按行号即用即建，属性名与 DiseaseGroup
+    相同，另有 <字段>_id / <字段>_ids 属性直接返回字符串id。
+    支持 len()、下标和迭代，可以替代 DiseaseGroup 列表传给各个索引和界面。
+    """
+
+    def __init__(self, strings, columns, lists, scores, surgery_counts, basic_mask):
+        self.strings = strings
+        self._columns = columns
+        self._lists = lists
+        self.scores = scores
+        self.surgery_counts = surgery_counts
+        self.basic_mask = basic_mask
+        # 分值列全为整数时按 int 返回，与 DiseaseGroup 保持一致
+        self._score_type = int if scores.dtype.kind == 'i' else float
+
+    @classmethod
+    def from_rows(cls, rows, strings=None):
+        """
+        由目录行（字典）构建，解析规则与 DiseaseGroup.from_row 相同
+        Args:
+            strings: 字符串表，默认使用进程内共享的 STRINGS
+        """
+        # NumPy 在构建时才导入，导入 core 层时不加载
+        import numpy as np
+        strings = STRINGS if strings is None else strings
+        intern = strings.intern
+
+        columns = {field: [] for field in STRING_FIELDS}
+        lists = {field: ([0], []) for field in LIST_FIELDS}
+        scores = []
+        surgery_counts = []
+        basic_mask = []
+        for row in rows:
+            fields = parse_row(row)
+            fields['disease_code'] = fields['disease_code'] or str(fields['dip_code']).split(':')[0]
+            (fields['secondary_surgeries_names'], fields['companion_surgeries_names'], surgery_count,
+             fields['main_surgeries_text'], fields['main_surgeries_lower'], fields['other_surgeries_lower'],
+             fields['search_text']) = derive_fields(fields['main_surgeries_names'], fields['other_surgeries_names'])
+
+            for field in STRING_FIELDS:
+                columns[field].append(intern(fields[field]))
+            for field in LIST_FIELDS:
+                offsets, ids = lists[field]
+                ids.extend(intern(value) for value in fields[field])
+                offsets.append(len(ids))
+            scores.append(fields['score'])
+            surgery_counts.append(surgery_count)
+            basic_mask.append('基层病种' in (fields['remark'] or ''))
+
+        return cls(
+            strings,
+            {field: np.array(ids, dtype=np.uint32) for field, ids in columns.items()},
+            {field: (np.array(offsets, dtype=np.int64), np.array(ids, dtype=np.uint32))
+             for field, (offsets, ids) in lists.items()},
+            np.array(scores),
+            np.array(surgery_counts, dtype=np.uint8),
+            np.array(basic_mask, dtype=bool),
+        )
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [DiseaseGroupView(self, index) for index in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return DiseaseGroupView(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield DiseaseGroupView(self, row)
+
+    def string(self, field, row):
+        return self.strings[self._columns[field][row]]
+
+    def string_id(self, field, row):
+        return int(self._columns[field][row])
+
+    def string_list(self, field, row):
+        return self.strings.values(self.string_ids(field, row).tolist())
+
+    def string_ids(self, field, row):
+        offsets, ids = self._lists[field]
+        return ids[offsets[row]:offsets[row + 1]]
+
+    def unique_ids(self, *fields):
+        """若干列表列中出现过的全部字符串id（去重、升序）"""
+        import numpy as np
+        arrays = [self._lists[field][1] for field in fields]
+        return np.unique(np.concatenate(arrays)) if arrays else np.array([], dtype=np.uint32)
+
+    @property
+    def nbytes(self):
+        """数组部分占用的字节数（不含字符串表）"""
+        arrays = list(self._columns.values()) + [self.scores, self.surgery_counts, self.basic_mask]
+        for offsets, ids in self._lists.values():
+            arrays += [offsets, ids]
+        return sum(array.nbytes for array in arrays)
+
+
+def _string_property(field):
+    return property(lambda self: self.table.string(field, self.row))
+
+
+def _list_property(field):
+    return property(lambda self: self.table.string_list(field, self.row))
+
+
+def _string_id_property(field):
+    return property(lambda self: self.table.string_id(field, self.row))
+
+
+def _list_ids_property(field):
+    return property(lambda self: self.table.string_ids(field, self.row))
+
+
+class DiseaseGroupView:
+    """GroupTable 中一行的轻量视图，只保存表和行号，属性按需从列中读取"""
+
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def score(self):
+        return self.table._score_type(self.table.scores[self.row])
+
+    @property
+    def surgery_count(self):
+        return int(self.table.surgery_counts[self.row])
+
+    @property
+    def is_basic_level(self):
+        return bool(self.table.basic_mask[self.row])
+
+    # 同一行的视图可能被创建多次，按表和行号判断相等
+    def __eq__(self, other):
+        if not isinstance(other, DiseaseGroupView):
+            return NotImplemented
+        return self.table is other.table and self.row == other.row
+
+    def __hash__(self):
+        return hash((id(self.table), self.row))
+
+    def __repr__(self):
+        return f"<DiseaseGroupView {self.row}: {self.dip_code}>"
+
+
+for _field in STRING_FIELDS:
+    setattr(DiseaseGroupView, _field, _string_property(_field))
+    setattr(DiseaseGroupView, f'{_field}_id', _string_id_property(_field))
+for _field in LIST_FIELDS:
+    setattr(DiseaseGroupView, _field, _list_property(_field))
+    setattr(DiseaseGroupView, f'{_field}_ids', _list_ids_property(_field))
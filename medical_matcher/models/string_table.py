@@ -0,0 +1,61 @@
+import threading
+
+
+class StringTable:
+    """
+    字符串表
+
+    病种名称、手术名称和编码在目录中大量重复，统一登记到字符串表后，
+    每个不同的字符串只保存一份，组合中只存整数id；
+    同一张表内 id 相等即字符串相等，集合运算也可以直接在 id 上进行。
+
+    可被多个线程同时使用（预加载线程构建组合表时，界面线程或服务线程也在登记字符串）：
+    已登记字符串的查询不加锁，登记新字符串时加锁，保证同一个id不会分给两个字符串。
+    """
+
+    def __init__(self):
+        self.strings = []
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, sid):
+        return self.strings[sid]
+
+    def __contains__(self, value):
+        return value in self._ids
+
+    def intern(self, value):
+        """登记字符串，返回其id（已存在时返回原id）"""
+        sid = self._ids.get(value)
+        if sid is None:
+            with self._lock:
+                sid = self._ids.get(value)  # 等锁期间可能已被其他线程登记
+                if sid is None:
+                    # 先追加字符串再发布id，不加锁的读取方拿到id时字符串一定已经存在
+                    self.strings.append(value)
+                    sid = self._ids[value] = len(self.strings) - 1
+        return sid
+
+    def canonical(self, value):
+        """返回表中与 value 相等的那一个字符串对象"""
+        return self.strings[self.intern(value)]
+
+    def id_of(self, value, default=None):
+        """查询字符串的id，不登记新字符串"""
+        return self._ids.get(value, default)
+
+    def ids(self, values):
+        """查询一组字符串的id集合，未登记的字符串忽略"""
+        get = self._ids.get
+        return {sid for sid in map(get, values) if sid is not None}
+
+    def values(self, ids):
+        strings = self.strings
+        return [strings[sid] for sid in ids]
+
+
+# 进程内共享的字符串表：加载多个地区/年度的目录时，相同的名称和编码使用同一个id
+STRINGS = StringTable()
@@ -0,0 +1,371 @@
+"""
+本地 HTTP JSON 服务：在目录和分组匹配之上提供病种搜索、组合列表、盈亏平衡值计算和批量分组接口，
+供其他科室的工具直接调用。
+
+用法:
+    python medical_matcher/server.py --port 8765
+
+接口（GET 响应带 ETag，目录未更新时可用 If-None-Match 得到 304）:
+    GET  /version                              目录版本、组合数、病种数
+    GET  /diseases?q=gz&sort=standard_score    病种搜索（名称子串、拼音、首字母）
+    GET  /diseases/<病种名称>                   病种汇总及标准分值的盈亏平衡值
+    GET  /diseases/<病种名称>/groups?q=切除     病种下的组合
+    GET  /combinations?disease=..&terms=..&counts=1,2
+    GET  /surgeries?q=胆囊                      按手术名称搜索组合
+    GET  /balance?score=100&disease=..          任意分值的盈亏平衡值及区间
+    POST /match  {"main_surgery", "other_surgeries", "disease_code", "top_k"}
+    POST /group  {"records": [{"病种编码", "主要手术编码", "其他手术编码"}, ...]}
+参数 rural、worker、weight（GET 为查询参数，POST 为 body 中的 "params"）不指定时使用启动参数。
+"""
+import argparse
+import gc
+import hashlib
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from batch_group import BatchGrouper, load_saved_params
+from core import DISEASE_SORT_COLUMNS, GROUP_SORT_COLUMNS, CatalogService, balance_range
+
+MAX_BODY = 16 * 1024 * 1024  # 请求体上限（字节）
+PARAM_NAMES = ('rural', 'worker', 'weight')
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def parse_params(source, defaults):
+    """从查询参数（parse_qs 的结果）或 body["params"] 读取 (城乡分值, 职工分值, 权重系数)，缺省时用 defaults"""
+    params = []
+    for name, default in zip(PARAM_NAMES, defaults):
+        value = source.get(name)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if value in (None, ''):
+            params.append(default)
+            continue
+        try:
+            params.append(float(value))
+        except (TypeError, ValueError):
+            raise ApiError(400, f"参数 {name} 不是有效的数值：{value!r}")
+    return tuple(params)
+
+
+def group_record(core, group, params):
+    """组合的 JSON 表示，盈亏平衡值按 params 计算"""
+    rural_balance, worker_balance = core.score_balance(group.score, group.disease_name, params)
+    return {
+        'row': core.row_of(group),
+        'dip_code': group.dip_code,
+        'disease_name': group.disease_name,
+        'disease_code': group.disease_code,
+        'score': group.score,
+        'surgery_count': group.surgery_count,
+        'is_basic': group.is_basic_level,
+        'main_surgeries': group.main_surgeries,
+        'main_surgeries_names': group.main_surgeries_names,
+        'other_surgeries': group.other_surgeries,
+        'secondary_surgeries_names': group.secondary_surgeries_names,
+        'companion_surgeries_names': group.companion_surgeries_names,
+        'remark': group.remark,
+        'rural_balance': round(rural_balance, 2),
+        'worker_balance': round(worker_balance, 2),
+    }
+
+
+class CatalogApi:
+    """
+    接口路由与查询
+
+    只处理路径、参数和 JSON 对象，不涉及 HTTP 细节；目录数据只读，可被多个线程同时调用。
+    """
+
+    def __init__(self, core, default_params):
+        self.core = core
+        self.default_params = tuple(float(value) for value in default_params)
+        # 同一目录版本和默认参数下 GET 的结果只取决于 URL，ETag 由两者得出；
+        # 重启时换了 --rural 等默认参数，客户端缓存的盈亏平衡值随之失效
+        key = f"{core.fingerprint}|{self.default_params}"
+        self.etag = 'W/"%s"' % hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    def warm_up(self):
+        """预先构建延迟初始化的索引，避免并发的第一批请求重复构建"""
+        self.core.data_handler.surgery_name_index
+        self.core.data_handler.pinyin_index
+        self.core.data_handler.matcher
+
+    # ---- 参数解析 ----
+
+    @staticmethod
+    def _first(query, name, default=None):
+        values = query.get(name)
+        return values[0] if values else default
+
+    @staticmethod
+    def _number(value, name, kind=float):
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            raise ApiError(400, f"参数 {name} 不是有效的数值：{value!r}")
+
+    def _params(self, source):
+        return parse_params(source, self.default_params)
+
+    def _limit(self, query, items):
+        limit = self._first(query, 'limit')
+        if limit is None:
+            return items
+        return items[:max(0, self._number(limit, 'limit', int))]
+
+    def _sort(self, query, columns):
+        sort = self._first(query, 'sort')
+        if sort is not None and sort not in columns:
+            raise ApiError(400, f"sort 只能是 {', '.join(columns)}")
+        return sort, self._first(query, 'reverse', '') in ('1', 'true')
+
+    def _disease(self, name):
+        summary = self.core.disease_summary(name)
+        if summary is None:
+            raise ApiError(404, f"病种不存在：{name}")
+        return summary
+
+    # ---- GET ----
+
+    def has_get(self, path):
+        """path 是否为存在的 GET 接口（含病种是否存在），用于在校验 ETag 前排除 404"""
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if len(parts) == 1:
+            return parts[0] in ('version', 'diseases', 'combinations', 'surgeries', 'balance')
+        if parts[0] != 'diseases' or len(parts) not in (2, 3) or parts[2:] not in ([], ['groups']):
+            return False
+        return parts[1] in self.core.disease_index
+
+    def get(self, path, query):
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if parts == ['version']:
+            return {
+                'version': self.core.fingerprint,
+                'etag': self.etag,
+                'groups': len(self.core.groups),
+                'diseases': len(self.core.disease_index),
+                'params': dict(zip(PARAM_NAMES, self.default_params)),
+            }
+        if parts == ['diseases']:
+            sort, reverse = self._sort(query, DISEASE_SORT_COLUMNS)
+            items = self.core.diseases(self._first(query, 'q', '').lower(), sort, reverse)
+            return {'items': [{'name': name, 'standard_score': score}
+                              for score, name in self._limit(query, items)]}
+        if len(parts) == 2 and parts[0] == 'diseases':
+            summary = self._disease(parts[1])
+            params = self._params(query)
+            _, rural_balance, worker_balance = self.core.standard_balance(parts[1], params)
+            return dict(summary, rural_balance=round(rural_balance, 2), worker_balance=round(worker_balance, 2))
+        if len(parts) == 3 and parts[0] == 'diseases' and parts[2] == 'groups':
+            self._disease(parts[1])
+            sort, reverse = self._sort(query, GROUP_SORT_COLUMNS)
+            params = self._params(query)
+            rows = self.core.disease_groups(parts[1], self._first(query, 'q', '').lower(), sort, reverse)
+            return {'items': [group_record(self.core, self.core.groups[row[-1]], params)
+                              for row in self._limit(query, rows)]}
+        if parts == ['combinations']:
+            return self._combinations(query)
+        if parts == ['surgeries']:
+            search_text = self._first(query, 'q', '').strip().lower()
+            if not search_text:
+                raise ApiError(400, "缺少参数 q")
+            params = self._params(query)
+            groups = self._limit(query, self.core.search_surgeries(search_text))
+            return {'items': [group_record(self.core, group, params) for group in groups]}
+        if parts == ['balance']:
+            return self._balance(query)
+        raise ApiError(404, f"未知接口：{path}")
+
+    def _combinations(self, query):
+        disease = self._first(query, 'disease')
+        if not disease:
+            raise ApiError(400, "缺少参数 disease")
+        summary = self._disease(disease)
+        terms = self._first(query, 'terms', '').lower().split()
+        counts = self._first(query, 'counts')
+        counts = {self._number(count, 'counts', int) for count in counts.split(',')} if counts else (1, 2, 3)
+        params = self._params(query)
+        base_score = summary['standard_score']
+        items = []
+        for group in self._limit(query, self.core.combinations(disease, terms, counts)):
+            record = group_record(self.core, group, params)
+            record['score_increase'] = max(group.score - base_score, 0) if base_score is not None else 0
+            items.append(record)
+        return {'standard_score': base_score, 'items': items}
+
+    def _balance(self, query):
+        score = self._number(self._first(query, 'score'), 'score')
+        disease = self._first(query, 'disease', '')
+        is_basic = self.core.is_basic(disease)
+        rural_balance, worker_balance = self.core.score_balance(score, disease, self._params(query))
+        return {
+            'score': score,
+            'disease': disease,
+            'is_basic': is_basic,
+            'rural_balance': round(rural_balance, 2),
+            'worker_balance': round(worker_balance, 2),
+            'rural_range': [round(value, 2) for value in balance_range(rural_balance)],
+            'worker_range': [round(value, 2) for value in balance_range(worker_balance)],
+        }
+
+    # ---- POST ----
+
+    def post(self, path, body):
+        if not isinstance(body, dict):
+            raise ApiError(400, "请求体应为 JSON 对象")
+        params = self._params(body.get('params') or {})
+        if path == '/match':
+            user_input = {
+                'main_surgery': str(body.get('main_surgery') or ''),
+                'other_surgeries': str(body.get('other_surgeries') or ''),
+            }
+            top_k = self._number(body.get('top_k', 1), 'top_k', int)
+            matches = self.core.match(user_input, top_k=top_k, disease_code=body.get('disease_code') or None)
+            return {'items': [dict(group_record(self.core, group, params), matched_other=count)
+                              for group, count in matches]}
+        if path == '/group':
+            records = body.get('records')
+            if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+                raise ApiError(400, "records 应为病案对象列表")
+            grouper = BatchGrouper(self.core.data_handler, *params)
+            results = grouper.group_records(records)
+            return {
+                'results': results,
+                'matched': sum(1 for result in results if result['DIP分组编码']),
+            }
+        raise ApiError(404, f"未知接口：{path}")
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'    # 默认保持连接
+    server_version = 'DIPServer/1.0'
+    disable_nagle_algorithm = True   # 响应头和正文分两次写出，避免 Nagle 算法带来的延迟
+    api = None                       # 由 make_server 设置
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if self._not_modified() and self.api.has_get(url.path):
+            self.send_response(304)
+            self.send_header('ETag', self.api.etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._respond(lambda: self.api.get(url.path, parse_qs(url.query)), etag=self.api.etag)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        self._respond(lambda: self.api.post(url.path, self._read_json()))
+
+    def _not_modified(self):
+        header = self.headers.get('If-None-Match')
+        if not header:
+            return False
+        tags = {tag.strip() for tag in header.split(',')}
+        # 弱比较：忽略 W/ 前缀
+        etag = self.api.etag[2:] if self.api.etag.startswith('W/') else self.api.etag
+        return '*' in tags or any((tag[2:] if tag.startswith('W/') else tag) == etag for tag in tags)
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            raise ApiError(400, "Content-Length 无效")
+        if length < 0:
+            self.close_connection = True  # 无法确定请求体的边界，不再复用连接
+            raise ApiError(400, "Content-Length 无效")
+        if length > MAX_BODY:
+            self.close_connection = True  # 不读取超长的请求体
+            raise ApiError(413, f"请求体超过 {MAX_BODY // 1024 // 1024} MB")
+        data = self.rfile.read(length)
+        try:
+            return json.loads(data.decode('utf-8')) if data else {}
+        except (UnicodeDecodeError, ValueError):
+            raise ApiError(400, "请求体不是有效的 JSON")
+
+    def _respond(self, handler, etag=None):
+        try:
+            status, result = 200, handler()
+        except ApiError as e:
+            status, result, etag = e.status, {'error': e.message}, None
+        except Exception as e:  # 未预期的错误返回 500，连接和服务继续可用
+            self.log_error("处理 %s 出错：%r", self.path, e)
+            status, result, etag = 500, {'error': str(e)}, None
+        self._send_json(status, result, etag)
+
+    def _send_json(self, status, result, etag=None):
+        body = json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')  # 可缓存，但每次用 If-None-Match 校验
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class CatalogServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # 允许较多并发连接排队
+
+
+def make_server(host='127.0.0.1', port=8765, core=None, params=None, verbose=False):
+    """创建服务（未启动），core 不指定时加载目录快照"""
+    core = core if core is not None else CatalogService()
+    api = CatalogApi(core, params or load_saved_params())
+    api.warm_up()
+    # 目录和索引加载后不再变化，移出垃圾回收的扫描范围，
+    # 否则每次完整回收都要遍历整个目录（十几毫秒），直接体现在请求的尾延迟上
+    gc.collect()
+    gc.freeze()
+    handler = type('CatalogRequestHandler', (RequestHandler,), {'api': api})
+    server = CatalogServer((host, port), handler)
+    server.api = api
+    server.verbose = verbose
+    return server
+
+
+def parse_args(argv=None):
+    rural, worker, weight = load_saved_params()
+    parser = argparse.ArgumentParser(description="本地 HTTP JSON 服务：目录查询、盈亏平衡值计算和批量分组")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址，默认只接受本机连接")
+    parser.add_argument('--port', type=int, default=8765, help="端口")
+    parser.add_argument('--rural', type=float, default=rural, help="默认城乡分值")
+    parser.add_argument('--worker', type=float, default=worker, help="默认职工分值")
+    parser.add_argument('--weight', type=float, default=weight, help="默认权重系数")
+    parser.add_argument('-v', '--verbose', action='store_true', help="输出每个请求的日志")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    server = make_server(args.host, args.port, params=(args.rural, args.worker, args.weight),
+                         verbose=args.verbose)
+    print(f"目录版本 {server.api.etag}，加载耗时 {time.perf_counter() - start:.2f}s")
+    print(f"服务已启动：http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
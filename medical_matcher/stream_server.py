@@ -0,0 +1,374 @@
+"""
+流式批量分组服务（asyncio）：接收分块上传的 NDJSON 病案，在进程池中分组，
+边读取上传边以 NDJSON 返回结果，几万条的批次也不会阻塞其他请求，内存占用与批次大小无关。
+
+用法:
+    python medical_matcher/stream_server.py --port 8766 -j 4
+    curl -sN -X POST -T 病案.ndjson -H 'Transfer-Encoding: chunked' \\
+        'http://127.0.0.1:8766/group/stream?rural=8&worker=10&weight=0.889'
+
+接口:
+    POST /group/stream  请求体每行一条病案对象（{"病种编码", "主要手术编码", "其他手术编码"}），
+                        可用 Content-Length 或 chunked 上传；响应为 chunked 的 NDJSON，
+                        每行一条分组结果（字段同 POST /group 的 results），顺序与输入一致。
+                        上传中途出错（某行不是 JSON 对象等）时，最后一行为 {"error", "line"}，随后关闭连接。
+    GET  /status        进程数、正在处理的批次数、已分组的病案数
+参数 rural、worker、weight 为查询参数，不指定时使用启动参数。
+查询接口见 server.py。
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from batch_group import _group_chunk, _init_worker, load_saved_params
+from server import PARAM_NAMES, ApiError, parse_params
+
+MAX_HEAD = 64 * 1024        # 请求行和请求头的上限（字节）
+MAX_LINE = 1024 * 1024      # 单条病案（一行）的上限（字节）
+READ_SIZE = 64 * 1024       # 每次从连接读取的字节数
+FLUSH_INTERVAL = 0.2        # 上传较慢时，不满一块的病案最多等待的秒数
+MAX_STREAMS = 4             # 同时处理的批次数，更多的连接排队等待
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           411: 'Length Required', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+async def read_head(reader):
+    """
+    读取请求行和请求头
+    Returns:
+        (方法, 路径, 查询参数, 请求头)，请求头名称为小写；连接在请求前关闭时返回None
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise ApiError(431, f"请求头超过 {MAX_HEAD // 1024} KB")
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise ApiError(400, "请求行无效")
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    url = urlsplit(target)
+    return method, url.path, parse_qs(url.query), headers
+
+
+async def read_body(reader, headers):
+    """按块读取请求体（chunked 或 Content-Length），逐块产出字节"""
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            try:
+                size = int((await reader.readline()).split(b';')[0].strip(), 16)
+            except ValueError:
+                raise ApiError(400, "分块编码无效")
+            if size == 0:
+                # 跳过 trailer
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            while size > 0:
+                data = await reader.read(min(size, READ_SIZE))
+                if not data:
+                    raise ApiError(400, "请求体不完整")
+                size -= len(data)
+                yield data
+            await reader.readexactly(2)  # 块末尾的 CRLF
+    else:
+        length = int(headers['content-length'])
+        while length > 0:
+            data = await reader.read(min(length, READ_SIZE))
+            if not data:
+                raise ApiError(400, "请求体不完整")
+            length -= len(data)
+            yield data
+
+
+class RecordError(ApiError):
+    """上传内容中某一行有误"""
+
+    def __init__(self, line, message):
+        super().__init__(400, f"第 {line} 行{message}")
+        self.line = line
+
+
+async def read_records(pieces):
+    """
+    把请求体切分为 NDJSON 行，每读到一块数据产出一次其中完整的病案（列表）；
+    遇到无效的行时先产出它之前的病案，再抛出 RecordError
+    """
+    buffer = b''
+    line_number = 0
+    async for data in pieces:
+        buffer += data
+        *lines, buffer = buffer.split(b'\n')
+        if len(buffer) > MAX_LINE:
+            raise ApiError(413, f"第 {line_number + len(lines) + 1} 行超过 {MAX_LINE // 1024} KB")
+        records, error = _parse_lines(lines, line_number + 1)
+        yield records
+        if error:
+            raise error
+        line_number += len(lines)
+    if buffer.strip():
+        records, error = _parse_lines([buffer], line_number + 1)
+        yield records
+        if error:
+            raise error
+
+
+def _parse_lines(lines, first_line):
+    """Returns: ([病案], 第一个无效行的 RecordError 或None)"""
+    records = []
+    for offset, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except (UnicodeDecodeError, ValueError):
+            record = None
+        if not isinstance(record, dict):
+            return records, RecordError(first_line + offset, "不是有效的病案 JSON 对象")
+        records.append(record)
+    return records, None
+
+
+class StreamServer:
+    """
+    流式分组服务
+
+    事件循环只负责读写连接，分组在进程池中进行。每个批次按块提交，最多同时有 2 倍进程数的块在处理，
+    结果按输入顺序写出；写不出去（客户端读得慢）时停止读取上传，因此每个批次的内存只与块大小有关。
+    """
+
+    def __init__(self, default_params, workers=None, chunk_size=500):
+        self.default_params = tuple(float(value) for value in default_params)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.executor = None
+        self.active = 0
+        self.grouped = 0
+        self._streams = None
+
+    async def start(self, host='127.0.0.1', port=8766):
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.default_params,))
+        self._streams = asyncio.Semaphore(MAX_STREAMS)
+        # 预先启动全部进程并加载目录，避免第一个批次等待
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _group_chunk, [])
+                               for _ in range(self.workers)))
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEAD)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        """处理一个连接上的一个请求，结束后关闭连接"""
+        headers_sent = False
+        try:
+            request = await read_head(reader)
+            if request is None:
+                return
+            method, path, query, headers = request
+            if path == '/status':
+                if method != 'GET':
+                    raise ApiError(405, "只支持 GET")
+                await self._send_json(writer, 200, {
+                    'workers': self.workers,
+                    'active': self.active,
+                    'grouped': self.grouped,
+                    'params': dict(zip(PARAM_NAMES, self.default_params)),
+                })
+                return
+            if path != '/group/stream':
+                raise ApiError(404, f"未知接口：{path}")
+            if method != 'POST':
+                raise ApiError(405, "只支持 POST")
+            params = parse_params(query, self.default_params)
+            if headers.get('transfer-encoding', '').lower() != 'chunked':
+                try:
+                    if int(headers['content-length']) < 0:
+                        raise ValueError
+                except (KeyError, ValueError):
+                    raise ApiError(411, "需要 Content-Length 或 chunked 上传")
+
+            async with self._streams:
+                if headers.get('expect', '').lower() == '100-continue':
+                    writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+                writer.write(self._head(200, 'application/x-ndjson; charset=utf-8', chunked=True))
+                headers_sent = True
+                self.active += 1
+                try:
+                    await self._stream(reader, writer, headers, params)
+                finally:
+                    self.active -= 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # 客户端中途断开
+        except ApiError as e:
+            await self._send_error(writer, e, headers_sent)
+        except Exception as e:  # 未预期的错误返回 500，服务继续可用
+            print(f"处理请求出错：{e!r}", file=sys.stderr)
+            await self._send_error(writer, ApiError(500, str(e)), headers_sent)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _stream(self, reader, writer, headers, params):
+        loop = asyncio.get_running_loop()
+        pending = deque()
+        chunk, chunk_start = [], None
+
+        def submit():
+            nonlocal chunk, chunk_start
+            pending.append(loop.run_in_executor(self.executor, _group_chunk, chunk, params))
+            chunk, chunk_start = [], None
+
+        async def emit():
+            results = await pending.popleft()
+            self.grouped += len(results)
+            await self._write_chunk(writer, ''.join(_dumps(result) + '\n' for result in results))
+
+        batches = read_records(read_body(reader, headers)).__aiter__()
+        next_batch = None
+        try:
+            while True:
+                # 等待上传数据时不超过不满一块的病案的剩余等待时间，最早的一块分组完成时也立即醒来，
+                # 上传停顿时已分组的结果照样在 FLUSH_INTERVAL 内返回（读取放在任务中，超时不会取消它）
+                if next_batch is None:
+                    next_batch = asyncio.ensure_future(batches.__anext__())
+                waiting = {next_batch, pending[0]} if pending else {next_batch}
+                timeout = max(0.0, chunk_start + FLUSH_INTERVAL - time.monotonic()) if chunk else None
+                await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if next_batch.done():
+                    batch, next_batch = next_batch, None
+                    try:
+                        records = batch.result()
+                    except StopAsyncIteration:
+                        break
+                    for record in records:
+                        if chunk_start is None:
+                            chunk_start = time.monotonic()
+                        chunk.append(record)
+                        if len(chunk) >= self.chunk_size:
+                            submit()
+                # 上传较慢时不满一块也提交，尽快返回结果
+                if chunk and time.monotonic() - chunk_start >= FLUSH_INTERVAL:
+                    submit()
+                # 先写出已完成的块（上传仍在进行）；在处理的块过多时等待最早的一块，读取随之暂停
+                while pending and (pending[0].done() or len(pending) >= self.workers * 2):
+                    await emit()
+            if chunk:
+                submit()
+            while pending:
+                await emit()
+        except ApiError:
+            # 出错之前的病案照常返回
+            if chunk:
+                submit()
+            while pending:
+                await emit()
+            raise
+        finally:
+            if next_batch is not None:
+                next_batch.cancel()
+            for future in pending:
+                future.cancel()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    @staticmethod
+    def _head(status, content_type, length=None, chunked=False, extra=()):
+        lines = [f'HTTP/1.1 {status} {REASONS.get(status, "")}', f'Content-Type: {content_type}',
+                 'Connection: close']
+        if chunked:
+            lines.append('Transfer-Encoding: chunked')
+        else:
+            lines.append(f'Content-Length: {length}')
+        lines.extend(extra)
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    @staticmethod
+    async def _write_chunk(writer, text):
+        data = text.encode('utf-8')
+        if data:
+            writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+            await writer.drain()  # 客户端读得慢时在这里等待
+
+    async def _send_json(self, writer, status, result):
+        body = _dumps(result).encode('utf-8')
+        writer.write(self._head(status, 'application/json; charset=utf-8', len(body)) + body)
+        await writer.drain()
+
+    async def _send_error(self, writer, error, headers_sent):
+        try:
+            if headers_sent:
+                result = {'error': error.message}
+                if isinstance(error, RecordError):
+                    result['line'] = error.line
+                await self._write_chunk(writer, _dumps(result) + '\n')
+                writer.write(b'0\r\n\r\n')
+                await writer.drain()
+            else:
+                await self._send_json(writer, error.status, {'error': error.message})
+        except ConnectionError:
+            pass
+
+
+def parse_args(argv=None):
+    rural, worker, weight = load_saved_params()
+    parser = argparse.ArgumentParser(description="流式批量分组服务：NDJSON 上传，边读边返回分组结果")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址，默认只接受本机连接")
+    parser.add_argument('--port', type=int, default=8766, help="端口")
+    parser.add_argument('--rural', type=float, default=rural, help="默认城乡分值")
+    parser.add_argument('--worker', type=float, default=worker, help="默认职工分值")
+    parser.add_argument('--weight', type=float, default=weight, help="默认权重系数")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help="分组进程数，默认为CPU核数")
+    parser.add_argument('--chunk-size', type=int, default=500, help="每次提交给进程池的病案数")
+    return parser.parse_args(argv)
+
+
+async def serve(args):
+    stream_server = StreamServer((args.rural, args.worker, args.weight), args.workers, args.chunk_size)
+    start = time.perf_counter()
+    try:
+        server = await stream_server.start(args.host, args.port)
+        print(f"{stream_server.workers} 个分组进程已加载目录，耗时 {time.perf_counter() - start:.2f}s")
+        print(f"服务已启动：http://{args.host}:{server.sockets[0].getsockname()[1]}/group/stream")
+        async with server:
+            await server.serve_forever()
+    finally:
+        stream_server.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
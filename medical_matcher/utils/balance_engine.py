@@ -0,0 +1,102 @@
+from collections import OrderedDict
+
+CACHE_SIZE = 12  # 缓存的参数组数，够一年的月度参数来回切换
+
+
+class BalanceEngine:
+    """
+    盈亏平衡值计算
+
+    所有组合的分值和基层病种标记保存在数组中，参数变化时一次性向量化
+    重新计算全部组合的城乡、职工盈亏平衡值，界面只需按行号读取。
+    基层病种：分值 × 城乡/职工分值；其他病种：分值 × 权重系数 × 城乡/职工分值
+
+    最近用过的 CACHE_SIZE 组参数的结果按 (参数, 目录版本) 缓存（LRU），
+    在几个月的参数之间来回切换时直接取用，不再重新计算。
+    """
+
+    def __init__(self, groups, is_basic_level_disease, version=None, cache_size=CACHE_SIZE):
+        """
+        Args:
+            version: 目录版本（DataHandler.fingerprint），作为缓存键的一部分
+            cache_size: 缓存的参数组数，0 表示不缓存
+        """
+        # NumPy 在创建时才导入，导入 core 层时不加载
+        import numpy as np
+        self.groups = groups
+        self._rows = None
+        if hasattr(groups, 'scores'):
+            # GroupTable 已按列存放分值，直接使用
+            self.scores = np.asarray(groups.scores, dtype=np.float64)
+        else:
+            self.scores = np.fromiter((group.score for group in groups), dtype=np.float64, count=len(groups))
+        self.basic_mask = np.fromiter(
+            (bool(is_basic_level_disease(group.disease_name)) for group in groups),
+            dtype=bool, count=len(groups)
+        )
+        self.version = version
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (参数, 目录版本) -> (城乡数组, 职工数组)，最近使用的在末尾
+        self.hits = 0
+        self.misses = 0
+        self.params = None
+        self.update(1.0, 1.0, 1.0)
+
+    def update(self, rural_value, worker_value, weight_value):
+        """
+        按新参数重新计算全部盈亏平衡值，最近用过的参数直接取缓存
+        Returns:
+            bool: 参数是否有变化
+        """
+        params = (float(rural_value), float(worker_value), float(weight_value))
+        if params == self.params:
+            return False
+
+        key = (params, self.version)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            self.rural_balances, self.worker_balances = cached
+        else:
+            self.misses += 1
+            self.rural_balances, self.worker_balances = self._compute(*params)
+            if self.cache_size > 0:
+                self._cache[key] = (self.rural_balances, self.worker_balances)
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        self.params = params
+        return True
+
+    def _compute(self, rural_value, worker_value, weight_value):
+        import numpy as np
+        base = np.where(self.basic_mask, self.scores, self.scores * weight_value)
+        rural_balances = base * rural_value
+        worker_balances = base * worker_value
+        # 数组会被缓存并在多次切换间共用，设为只读
+        rural_balances.flags.writeable = False
+        worker_balances.flags.writeable = False
+        return rural_balances, worker_balances
+
+    def cache_info(self):
+        """缓存统计：命中次数、未命中（重新计算）次数、当前和最大缓存组数"""
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._cache), 'max_size': self.cache_size}
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def row_of(self, group):
+        """组合在数组中的行号（GroupTable 的组合视图自带行号）"""
+        row = getattr(group, 'row', None)
+        if row is not None:
+            return row
+        if self._rows is None:
+            self._rows = {id(group): row for row, group in enumerate(self.groups)}
+        return self._rows[id(group)]
+
+    def rural_balance(self, group):
+        return float(self.rural_balances[self.row_of(group)])
+
+    def worker_balance(self, group):
+        return float(self.worker_balances[self.row_of(group)])
@@ -1,40 +1,236 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-from data.surgery_data import SURGERY_DATA
+import threading
+
+from data.catalog import load_catalog
+from data.index_cache import CACHE_DIR, IndexCache
 from models.disease_group import DiseaseGroup
+from models.group_table import GroupTable
+from utils.disease_index import DiseaseIndex
+from utils.search_index import SurgeryNameIndex
+from utils.pinyin_index import PinyinIndex, build_pinyin_index, is_pinyin_query
+from utils.group_matcher import GroupMatcher
 
 class DataHandler:
-    def __init__(self):
+    _matcher = None  # 静态方法 match_group(s) 最近一次使用的编码位集索引；实例使用自己的 matcher
+    # 派生索引：名称 -> (索引类, 构建方法名)，可保存到磁盘缓存
+    _INDEXES = {
+        'disease_index': (DiseaseIndex, '_build_disease_index'),
+        'surgery_name_index': (SurgeryNameIndex, '_build_surgery_name_index'),
+        'pinyin_index': (PinyinIndex, '_build_pinyin_index'),
+        'matcher': (GroupMatcher, '_build_matcher'),
+    }
+
+    def __init__(self, store=None, cache_dir=CACHE_DIR):
+        """
+        Args:
+            store: 可选的 SQLite 目录库（data.sqlite_store.CatalogStore），
+                   指定时从目录库读取组合，筛选和手术名称搜索改用 SQL 查询
+            cache_dir: 派生索引（病种索引、手术名称索引、拼音索引、编码位集）的磁盘缓存目录，
+                       为None时每次都重新构建
+        """
+        self.store = store
         self.groups = self._load_predefined_data()
+        self.index_cache = IndexCache(self.content_hash, cache_dir) if cache_dir else None
+        self._indexes = {}
+        self._index_locks = {name: threading.Lock() for name in self._INDEXES}
+        # 病种索引，供各窗口共享查询
+        self.disease_index = self._index('disease_index')
     
     def _load_predefined_data(self):
-        """加载预定义的数据"""
-        return [DiseaseGroup.from_row(row) for row in SURGERY_DATA]
+        """
+        加载预定义的数据（从目录快照或目录库读取，不再执行 surgery_data.py）
+        组合按列存放在 GroupTable 中，遍历/下标得到的是按需创建的组合视图
+        """
+        if self.store is not None:
+            self.fingerprint = self.store.fingerprint
+            self.content_hash = self.store.content_hash
+            if not self.content_hash:
+                # 旧版目录库没有内容哈希，退回到源文件指纹
+                import hashlib
+                self.content_hash = hashlib.sha1(self.fingerprint.encode('utf-8')).hexdigest()
+            return GroupTable.from_rows(self.store.records())
+        self.catalog = load_catalog()
+        self.fingerprint = self.catalog.fingerprint
+        self.content_hash = self.catalog.content_hash()
+        return GroupTable.from_rows(self.catalog.rows())
     
     def load_data(self, file_path=None):
         """保留文件加载方法，但默认使用预定义数据"""
         if file_path:
+            import pandas as pd  # 只在导入外部 Excel 时才需要，避免拖慢启动
             df = pd.read_excel(file_path, engine='openpyxl')
             return [DiseaseGroup.from_row(row) for _, row in df.iterrows()]
         return self.groups
 
+    # ---- 派生索引 ----
+
+    def _index(self, name):
+        """已有的索引；首次使用时从磁盘缓存加载，缓存不可用时构建（多个线程同时请求时只构建一次）"""
+        index = self._indexes.get(name)
+        if index is None:
+            with self._index_locks[name]:
+                index = self._indexes.get(name)
+                if index is None:
+                    index = self._indexes[name] = self._load_or_build(name)
+        return index
+
+    def _load_or_build(self, name):
+        index_class, build = self._INDEXES[name]
+        if self.index_cache is not None:
+            arrays = self.index_cache.load(index_class.CACHE_NAME)
+            if arrays is not None:
+                try:
+                    return index_class.from_arrays(arrays, self.groups)
+                except (KeyError, IndexError, ValueError, TypeError):
+                    pass  # 缓存内容与当前代码不符时重建
+        index = getattr(self, build)()
+        if self.index_cache is not None and len(index):
+            # 序列化和写文件放到后台，不增加本次的等待；非守护线程，退出前会写完
+            threading.Thread(target=self._save_index, args=(index_class.CACHE_NAME, index),
+                             name=f'save-{name}').start()
+        return index
+
+    def _save_index(self, cache_name, index):
+        self.index_cache.save(cache_name, index.to_arrays())
+
+    def start_index_rebuild(self):
+        """
+        目录更新后（缓存中缺少当前内容哈希的索引时）在后台线程中构建并保存缺少的索引，
+        第一次搜索、匹配时不必再等待构建；缓存齐全时不做任何事
+        Returns:
+            threading.Thread 或None
+        """
+        if self.index_cache is None:
+            return None
+        names = [name for name, (index_class, _) in self._INDEXES.items()
+                 if name not in self._indexes and not self.index_cache.has(index_class.CACHE_NAME)]
+        if not names:
+            return None
+        thread = threading.Thread(target=lambda: [self._index(name) for name in names],
+                                  name='index-rebuild', daemon=True)
+        thread.start()
+        return thread
+
+    def _build_disease_index(self):
+        return DiseaseIndex(self.groups)
+
+    def _build_surgery_name_index(self):
+        return SurgeryNameIndex(self.groups)
+
+    def _build_pinyin_index(self):
+        try:
+            return build_pinyin_index(self.disease_index.names() + self.surgery_names())
+        except ImportError:
+            return PinyinIndex()  # 未安装 pypinyin 时为空索引（不写入缓存）
+
+    def _build_matcher(self):
+        return GroupMatcher(self.groups)
+
+    @property
+    def surgery_name_index(self):
+        """手术名称倒排索引，首次搜索时加载或构建"""
+        return self._index('surgery_name_index')
+
+    @property
+    def pinyin_index(self):
+        """病种及手术名称的拼音索引，首次查询时加载或构建"""
+        return self._index('pinyin_index')
+
+    @property
+    def matcher(self):
+        """本目录的编码位集索引，首次匹配时加载或构建"""
+        return self._index('matcher')
+
+    def surgery_names(self):
+        """目录中出现的所有手术名称（去重）"""
+        if hasattr(self.groups, 'unique_ids'):
+            # 按列存储时直接在字符串id上去重
+            ids = self.groups.unique_ids(
+                'main_surgeries_names', 'secondary_surgeries_names', 'companion_surgeries_names'
+            )
+            return sorted(self.groups.strings.values(ids.tolist()))
+        names = set()
+        for group in self.groups:
+            names.update(group.main_surgeries_names)
+            names.update(group.secondary_surgeries_names)
+            names.update(group.companion_surgeries_names)
+        return sorted(names)
+
+    def search_pinyin(self, search_text):
+        """按拼音或首字母前缀查找病种/手术名称，非拼音输入返回空集合"""
+        if not is_pinyin_query(search_text):
+            return set()
+        return self.pinyin_index.search(search_text)
+
+    def search_surgeries(self, search_text):
+        """按手术名称子串（或拼音、首字母）搜索组合，保持目录顺序"""
+        # 拼音、首字母查询（尤其是单个字母）会展开出成百上千个名称，
+        # 由 n-gram 索引一次合并查找，不逐个名称执行搜索（或 SQL 查询）
+        names = self.search_pinyin(search_text)
+        if self.store is not None:
+            # 目录库的组合序号从1开始，与内存中的组合顺序一致
+            group_ids = {group_id - 1 for group_id in self.store.search_ids(search_text)}
+            if names:
+                group_ids.update(self.surgery_name_index.search_ids_any(names))
+            return [self.groups[group_id] for group_id in sorted(group_ids)]
+
+        index = self.surgery_name_index
+        return [index.groups[group_id] for group_id in index.search_ids_any([search_text, *names])]
+
+    def filter_groups(self, disease_name=None, min_score=None, max_score=None,
+                      is_basic=None, operation_count=None):
+        """
+        按病种、分值范围、基层病种、操作数筛选组合，保持目录顺序
+        使用目录库时在 SQL 中完成筛选，否则逐个判断
+        """
+        if self.store is not None:
+            group_ids = self.store.filter_ids(
+                disease_name=disease_name, min_score=min_score, max_score=max_score,
+                is_basic=is_basic, operation_count=operation_count
+            )
+            return [self.groups[group_id - 1] for group_id in group_ids]
+
+        if disease_name is not None:
+            groups = self.disease_index.groups_of(disease_name)
+        else:
+            groups = self.groups
+        if isinstance(operation_count, int):
+            operation_count = (operation_count,)
+        result = []
+        for group in groups:
+            if min_score is not None and group.score < min_score:
+                continue
+            if max_score is not None and group.score > max_score:
+                continue
+            if is_basic is not None and group.is_basic_level != bool(is_basic):
+                continue
+            if operation_count is not None and group.surgery_count not in operation_count:
+                continue
+            result.append(group)
+        return result
+
+    @staticmethod
+    def get_matcher(groups):
+        """
+        获取组合列表对应的编码位集索引（同一列表只构建一次），供不持有 DataHandler 的调用方使用；
+        有 DataHandler 时应使用其 matcher 属性
+        """
+        matcher = DataHandler._matcher
+        if matcher is None or matcher.source is not groups or len(matcher) != len(groups):
+            matcher = DataHandler._matcher = GroupMatcher(groups)
+        return matcher
+
     @staticmethod
     def match_group(user_input, groups):
-        matches = []
-        user_main_surgery = user_input.get('main_surgery', '').strip().split('/')
-        user_other_surgeries = set(user_input.get('other_surgeries', '').strip().split('/'))
-        
-        for group in groups:
-            if all(ms in group.main_surgeries for ms in user_main_surgery):
-                matched_other_surgeries = set(group.other_surgeries) & user_other_surgeries
-                if matched_other_surgeries:
-                    matches.append((group, len(matched_other_surgeries)))
-        
-        matches.sort(key=lambda x: (x[1], x[0].score), reverse=True)
-        return matches[0][0] if matches else None
+        return DataHandler.get_matcher(groups).best(user_input)
+
+    @staticmethod
+    def match_groups(user_input, groups, top_k=5):
+        """返回按命中个数、分值排序的前 top_k 个 (组合, 命中个数)"""
+        return DataHandler.get_matcher(groups).match(user_input, top_k=top_k)
 
     @staticmethod
     def visualize_scores(disease_group):
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(8, 6))
         plt.bar([disease_group.disease_type], [disease_group.score])
         plt.xlabel('病种类型')
@@ -46,8 +242,4 @@ class DataHandler:
 
     def is_basic_level_disease(self, disease_name):
         """判断是否为基层病种"""
-        # 从预定义数据中判断是否为基层病种
-        for group in self.groups:
-            if group.disease_name == disease_name:
-                return getattr(group, 'is_basic_level', False)
-        return False
\ No newline at end of file
+        return self.disease_index.is_basic(disease_name)
\ No newline at end of file
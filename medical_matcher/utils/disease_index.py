@@ -0,0 +1,149 @@
+import threading
+from array import array
+
+CONSERVATIVE_TREATMENT = '保守治疗'
+
+# 从缓存加载的病种在首次访问 groups 时创建组合视图，可能同时发生在预加载线程和界面/服务线程中
+_groups_lock = threading.Lock()
+
+
+class DiseaseEntry:
+    """单个病种的汇总信息"""
+
+    def __init__(self, name):
+        self.name = name
+        self._groups = []
+        self._table = None
+        self._rows = None  # 从缓存加载时为组合行号，首次访问 groups 时才创建组合视图
+        self.conservative_score = None  # 第一个保守治疗组合的分值
+        self.min_score = None
+        self.max_score = None
+        self.is_basic = False  # 与 DataHandler.is_basic_level_disease 一致，取该病种第一个组合的标记
+
+    @property
+    def groups(self):
+        if self._rows is not None:
+            with _groups_lock:
+                rows = self._rows  # 等锁期间可能已被其他线程创建
+                if rows is not None:
+                    # 先发布组合列表再清除行号，不加锁的读取方看到 _rows 为None时 _groups 一定已经就绪
+                    self._groups = [self._table[row] for row in rows]
+                    self._rows = None
+        return self._groups
+
+    @property
+    def group_count(self):
+        rows = self._rows  # 只读一次，避免与 groups 的创建交错
+        return len(rows) if rows is not None else len(self._groups)
+
+    @property
+    def standard_score(self):
+        """标准分值：有保守治疗时取保守治疗分值，否则取最低分值"""
+        if self.conservative_score is not None:
+            return self.conservative_score
+        return self.min_score
+
+    def _add(self, group):
+        if not self.groups:
+            self.is_basic = getattr(group, 'is_basic_level', False)
+        self._groups.append(group)
+
+        score = group.score
+        if self.min_score is None or score < self.min_score:
+            self.min_score = score
+        if self.max_score is None or score > self.max_score:
+            self.max_score = score
+
+        if self.conservative_score is None and \
+                CONSERVATIVE_TREATMENT in group.main_surgeries_lower:
+            self.conservative_score = score
+
+
+class DiseaseIndex:
+    """病种索引：一次遍历按病种名称分组，并计算标准分值等汇总信息"""
+
+    CACHE_NAME = 'disease_index.1'  # 索引缓存中的名称，序列化格式变化时递增
+
+    def __init__(self, groups=()):
+        self._entries = {}
+        for group in groups:
+            entry = self._entries.get(group.disease_name)
+            if entry is None:
+                entry = self._entries[group.disease_name] = DiseaseEntry(group.disease_name)
+            entry._add(group)
+        self._names = sorted(self._entries)
+
+    def to_arrays(self):
+        """
+        序列化为索引缓存的数组（组合需带行号，即 GroupTable 的组合视图）
+        病种按名称排序，rows[offsets[i]:offsets[i + 1]] 为第 i 个病种的组合行号
+        """
+        entries = [self._entries[name] for name in self._names]
+        scores = [entry.min_score for entry in entries] + [entry.max_score for entry in entries]
+        code = 'q' if all(isinstance(score, int) for score in scores) else 'd'
+        rows = array('I')
+        offsets = array('Q', [0])
+        for entry in entries:
+            rows.extend(group.row for group in entry.groups)
+            offsets.append(len(rows))
+        return {
+            'names': list(self._names),
+            'offsets': offsets,
+            'rows': rows,
+            'min_scores': array(code, [entry.min_score for entry in entries]),
+            'max_scores': array(code, [entry.max_score for entry in entries]),
+            'conservative_scores': array(code, [entry.conservative_score or 0 for entry in entries]),
+            'has_conservative': array('B', [entry.conservative_score is not None for entry in entries]),
+            'is_basic': array('B', [entry.is_basic for entry in entries]),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, groups):
+        """由索引缓存的数组恢复，groups 为同一目录的 GroupTable；组合视图在首次访问时创建"""
+        index = cls()
+        offsets, rows = arrays['offsets'], arrays['rows']
+        conservative_scores, has_conservative = arrays['conservative_scores'], arrays['has_conservative']
+        for i, (name, min_score, max_score, is_basic) in enumerate(zip(
+                arrays['names'], arrays['min_scores'], arrays['max_scores'], arrays['is_basic'])):
+            entry = index._entries[name] = DiseaseEntry(name)
+            entry._table = groups
+            entry._rows = rows[offsets[i]:offsets[i + 1]]
+            entry.min_score = min_score
+            entry.max_score = max_score
+            entry.conservative_score = conservative_scores[i] if has_conservative[i] else None
+            entry.is_basic = bool(is_basic)
+        index._names = list(arrays['names'])
+        return index
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, disease_name):
+        return disease_name in self._entries
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def names(self):
+        """按名称排序的病种列表"""
+        return list(self._names)
+
+    def get(self, disease_name):
+        return self._entries.get(disease_name)
+
+    def groups_of(self, disease_name):
+        """病种下的所有组合（保持目录中的原始顺序）"""
+        entry = self._entries.get(disease_name)
+        return entry.groups if entry else []
+
+    def standard_score(self, disease_name):
+        entry = self._entries.get(disease_name)
+        return entry.standard_score if entry else None
+
+    def is_basic(self, disease_name):
+        entry = self._entries.get(disease_name)
+        return entry.is_basic if entry else False
+
+    def standard_scores(self):
+        """病种名称 -> 标准分值（按名称排序）"""
+        return {name: self._entries[name].standard_score for name in self._names}
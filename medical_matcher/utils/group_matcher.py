@@ -0,0 +1,166 @@
+import heapq
+
+
+class _Bitsets:
+    """
+    从索引缓存加载的 编码 -> 位集：位集在文件中按定长小端字节存放，
+    查询到某个编码时才转换为 Python 整数（之后复用）
+    """
+
+    def __init__(self, codes, data, width):
+        self._rows = {code: i for i, code in enumerate(codes)}
+        self._data = data
+        self._width = width
+        self._decoded = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __getitem__(self, code):
+        if code not in self._rows:
+            raise KeyError(code)
+        return self.get(code)
+
+    def get(self, code, default=0):
+        bits = self._decoded.get(code)
+        if bits is None:
+            i = self._rows.get(code)
+            if i is None:
+                return default
+            bits = self._decoded[code] = int.from_bytes(
+                self._data[i * self._width:(i + 1) * self._width], 'little')
+        return bits
+
+
+def _iter_bits(bits):
+    """依次返回位集中为1的位序号"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class GroupMatcher:
+    """
+    手术编码位集索引
+
+    为每个主要手术编码、其他手术编码记录包含它的组合位集（Python 整数，
+    第 i 位对应第 i 个组合）。匹配时主要手术位集按位与得到候选，
+    与其他手术位集求交后按命中个数、分值排序，可返回前 K 个结果。
+    """
+
+    def __init__(self, groups):
+        self.source = groups  # 构建索引时的原始组合列表
+        self.groups = list(groups)
+        self._main_bits = {}
+        self._other_bits = {}
+        self._disease_bits = {}
+        for index, group in enumerate(self.groups):
+            bit = 1 << index
+            code = getattr(group, 'disease_code', '')
+            self._disease_bits[code] = self._disease_bits.get(code, 0) | bit
+            for code in set(group.main_surgeries):
+                self._main_bits[code] = self._main_bits.get(code, 0) | bit
+            for code in set(group.other_surgeries):
+                self._other_bits[code] = self._other_bits.get(code, 0) | bit
+
+    CACHE_NAME = 'code_bitsets.1'  # 索引缓存中的名称，序列化格式变化时递增
+
+    def __len__(self):
+        return len(self.groups)
+
+    def to_arrays(self):
+        """序列化为索引缓存的数组：每类编码一个编码列表和一块定长（组合数/8 字节）的位集"""
+        width = (len(self.groups) + 7) // 8
+        arrays = {}
+        for kind, bitsets in (('main', self._main_bits), ('other', self._other_bits),
+                              ('disease', self._disease_bits)):
+            codes = list(bitsets)
+            arrays[f'{kind}_codes'] = codes
+            arrays[f'{kind}_bits'] = b''.join(bitsets[code].to_bytes(width, 'little') for code in codes)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, groups):
+        """由索引缓存的数组恢复，groups 为同一目录的 GroupTable"""
+        matcher = cls.__new__(cls)
+        matcher.source = groups
+        matcher.groups = groups
+        width = (len(groups) + 7) // 8
+        matcher._main_bits = _Bitsets(arrays['main_codes'], arrays['main_bits'], width)
+        matcher._other_bits = _Bitsets(arrays['other_codes'], arrays['other_bits'], width)
+        matcher._disease_bits = _Bitsets(arrays['disease_codes'], arrays['disease_bits'], width)
+        return matcher
+
+    @staticmethod
+    def parse_input(user_input):
+        """与原匹配规则一致地拆分用户输入的手术编码"""
+        main_codes = user_input.get('main_surgery', '').strip().split('/')
+        other_codes = set(user_input.get('other_surgeries', '').strip().split('/'))
+        return main_codes, other_codes
+
+    def disease_groups(self, disease_code):
+        """病种编码下的所有组合（目录顺序）"""
+        return [self.groups[index] for index in _iter_bits(self._disease_bits.get(disease_code, 0))]
+
+    def candidates(self, main_codes, other_codes, disease_code=None):
+        """
+        计算候选组合
+        Args:
+            disease_code: 指定时只在该病种编码的组合中匹配
+        Returns:
+            (候选位集, [每个其他手术编码与候选的交集位集])
+        """
+        if disease_code is None:
+            bits = (1 << len(self.groups)) - 1
+        else:
+            bits = self._disease_bits.get(disease_code, 0)
+        for code in main_codes:
+            bits &= self._main_bits.get(code, 0)
+            if not bits:
+                return 0, []
+
+        other_masks = []
+        any_other = 0
+        for code in other_codes:
+            mask = bits & self._other_bits.get(code, 0)
+            if mask:
+                other_masks.append(mask)
+                any_other |= mask
+        return any_other, other_masks
+
+    def match(self, user_input, top_k=1, disease_code=None):
+        """
+        匹配用户输入
+        Args:
+            user_input: {'main_surgery': 'a/b', 'other_surgeries': 'c/d'}
+            top_k: 返回的候选个数，None 表示全部
+            disease_code: 指定时只在该病种编码的组合中匹配
+        Returns:
+            list: [(组合, 命中的其他手术个数), ...]，按命中个数、分值从高到低排序，
+                  同分时保持目录顺序
+        """
+        main_codes, other_codes = self.parse_input(user_input)
+        bits, other_masks = self.candidates(main_codes, other_codes, disease_code)
+        if not bits:
+            return []
+
+        ranked = []
+        for index in _iter_bits(bits):
+            bit = 1 << index
+            count = sum(1 for mask in other_masks if mask & bit)
+            ranked.append((count, self.groups[index].score, -index))
+
+        if top_k is None or top_k >= len(ranked):
+            ranked.sort(reverse=True)
+        else:
+            ranked = heapq.nlargest(top_k, ranked)
+        return [(self.groups[-neg_index], count) for count, _, neg_index in ranked]
+
+    def best(self, user_input, disease_code=None):
+        """返回最佳匹配组合，没有匹配时返回None"""
+        matches = self.match(user_input, top_k=1, disease_code=disease_code)
+        return matches[0][0] if matches else None
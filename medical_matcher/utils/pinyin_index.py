@@ -0,0 +1,85 @@
+from array import array
+from bisect import bisect_left
+
+
+def is_pinyin_query(text):
+    """只由字母数字组成的输入才按拼音查询"""
+    return bool(text) and text.isascii() and text.isalnum()
+
+
+def to_pinyin(name):
+    """
+    名称转拼音
+    Returns:
+        (全拼, 首字母)：全拼按音节以空格分隔，首字母与音节一一对应；
+        非汉字的字母数字按单个字符处理，其余符号忽略
+    """
+    from pypinyin import lazy_pinyin
+
+    parts = lazy_pinyin(name, errors=lambda chars: list(chars.lower()))
+    parts = [part.lower() for part in parts if part.isalnum()]
+    return ' '.join(parts), ''.join(part[0] for part in parts)
+
+
+def pinyin_keys(name):
+    """名称从每个音节起始处的全拼和首字母键"""
+    syllables, letters = to_pinyin(name)
+    parts = syllables.split(' ') if syllables else []
+    keys = set()
+    for start in range(len(parts)):
+        keys.add(''.join(parts[start:]))
+        keys.add(letters[start:])
+    return keys
+
+
+def build_pinyin_index(names):
+    """生成拼音索引：每个名称的全部键与名称成对，按键排序（需要 pypinyin）"""
+    entries = sorted((key, name) for name in set(names) for key in pinyin_keys(name))
+    return PinyinIndex([key for key, _ in entries], [name for _, name in entries])
+
+
+class PinyinIndex:
+    """
+    拼音/首字母前缀索引
+
+    每个名称从每个音节起始处生成全拼和首字母两种键，键已排序，用二分查找
+    做前缀匹配，因此 "lanwei"、"lwy" 以及 "qcs"（...切除术）都能命中。
+    """
+
+    CACHE_NAME = 'pinyin.1'  # 索引缓存中的名称，序列化格式变化时递增
+
+    def __init__(self, keys=(), names=()):
+        self._keys = list(keys)
+        self._names = list(names)
+
+    def to_arrays(self):
+        """序列化为索引缓存的数组：键列表，及每个键对应名称在去重名称表中的序号"""
+        names = sorted(set(self._names))
+        name_ids = {name: i for i, name in enumerate(names)}
+        return {
+            'keys': self._keys,
+            'names': names,
+            'name_ids': array('I', [name_ids[name] for name in self._names]),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, groups=None):
+        names = arrays['names']
+        return cls(arrays['keys'], [names[i] for i in arrays['name_ids']])
+
+    def __len__(self):
+        return len(self._keys)
+
+    def search(self, query):
+        """返回拼音或首字母以 query 开头（从任一音节起）的名称集合"""
+        query = query.lower()
+        if not is_pinyin_query(query):
+            return set()
+
+        keys = self._keys
+        matched = set()
+        pos = bisect_left(keys, query)
+        while pos < len(keys) and keys[pos].startswith(query):
+            matched.add(self._names[pos])
+            pos += 1
+        return matched
@@ -0,0 +1,157 @@
+from array import array
+
+# 索引的字符 n-gram 长度；查询至少取其中最长的一种切分
+GRAM_SIZES = (1, 2, 3)
+
+
+def _grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SurgeryNameIndex:
+    """
+    手术名称的字符 n-gram 倒排索引
+
+    每个组合的主要手术名称和其他手术名称分别切分为 1/2/3 字符片段，
+    片段 -> 组合编号 的倒排表按编号升序存放。查询时对查询词的片段求
+    倒排表交集得到候选，再逐个按原始子串规则校验。
+    """
+
+    CACHE_NAME = 'surgery_ngrams.1'  # 索引缓存中的名称，序列化格式变化时递增
+
+    def __init__(self, groups=()):
+        self.groups = []
+        self._texts = []  # 每个组合的 (主要手术小写列表, 其他手术小写文本)
+        self._postings = {}
+        self.add_groups(groups)
+
+    def __len__(self):
+        return len(self.groups)
+
+    def to_arrays(self):
+        """
+        序列化为索引缓存的数组：ids[offsets[i]:offsets[i + 1]] 为第 i 个片段的倒排表，
+        主要手术名称以 '\x1f' 连接
+        """
+        grams = list(self._postings)
+        offsets = array('Q', [0])
+        ids = array('I')
+        for gram in grams:
+            ids.extend(self._postings[gram])
+            offsets.append(len(ids))
+        return {
+            'grams': grams,
+            'offsets': offsets,
+            'ids': ids,
+            'main_names': ['\x1f'.join(main_names) for main_names, _ in self._texts],
+            'other_names': [other_names for _, other_names in self._texts],
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, groups):
+        """由索引缓存的数组恢复，groups 为同一目录的 GroupTable；倒排表直接使用缓存文件中的切片"""
+        index = cls()
+        index.groups = groups
+        offsets, ids = arrays['offsets'], arrays['ids']
+        index._postings = {gram: ids[offsets[i]:offsets[i + 1]] for i, gram in enumerate(arrays['grams'])}
+        index._texts = [(main_names.split('\x1f') if main_names else [], other_names)
+                        for main_names, other_names in zip(arrays['main_names'], arrays['other_names'])]
+        return index
+
+    def add_groups(self, groups):
+        """追加组合（例如加载多个地区目录时）"""
+        if not isinstance(self.groups, list):
+            self.groups = list(self.groups)  # 从缓存加载的索引引用 GroupTable
+        postings = self._postings
+        for group in groups:
+            group_id = len(self.groups)
+            main_names = [name.lower() for name in group.main_surgeries_names]
+            other_names = (group.other_surgeries_names or '').lower()
+            self.groups.append(group)
+            self._texts.append((main_names, other_names))
+
+            grams = set()
+            for text in main_names + [other_names]:
+                for n in GRAM_SIZES:
+                    grams |= _grams(text, n)
+            for gram in grams:
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('I')
+                elif not isinstance(posting, array):
+                    posting = postings[gram] = array('I', posting)  # 缓存文件中的只读切片
+                posting.append(group_id)
+
+    def _query_grams(self, query):
+        n = min(len(query), GRAM_SIZES[-1])
+        return _grams(query, n)
+
+    def candidates(self, query):
+        """返回可能匹配的组合编号（升序），未经校验"""
+        query = query.lower()
+        if not query:
+            return []
+
+        postings = []
+        for gram in self._query_grams(query):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return sorted(result)
+
+    def _rarest_posting(self, query, samples=4):
+        """
+        查询词的候选组合：在均匀取出的至多 samples 个片段中取最短的倒排表
+        （任一片段的倒排表都包含全部匹配的组合，任一片段不存在时为空）
+        """
+        n = min(len(query), GRAM_SIZES[-1])
+        last = len(query) - n
+        step = max(1, last // (samples - 1)) if samples > 1 else last + 1
+        get = self._postings.get
+        rarest = None
+        for start in range(0, last + 1, step):
+            posting = get(query[start:start + n])
+            if posting is None:
+                return ()
+            if rarest is None or len(posting) < len(rarest):
+                rarest = posting
+        return rarest
+
+    def matches(self, group_id, query):
+        """按原始规则校验：查询词是某个主要手术名称或其他手术文本的子串"""
+        main_names, other_names = self._texts[group_id]
+        return any(query in name for name in main_names) or query in other_names
+
+    def search_ids(self, query):
+        query = query.lower()
+        return [group_id for group_id in self.candidates(query) if self.matches(group_id, query)]
+
+    def search_ids_any(self, queries):
+        """
+        匹配任一查询词的组合编号（升序），用于拼音、首字母展开出的成百上千个名称：
+        每个名称只取最短的一条倒排表逐个校验，已命中的组合不再校验，不做倒排表求交
+        """
+        found = set()
+        total = len(self._texts)
+        for query in queries:
+            query = query.lower()
+            if not query:
+                continue
+            for group_id in self._rarest_posting(query):
+                if group_id not in found and self.matches(group_id, query):
+                    found.add(group_id)
+            if len(found) == total:
+                break
+        return sorted(found)
+
+    def search(self, query):
+        """返回匹配的组合，保持目录中的原始顺序"""
+        return [self.groups[group_id] for group_id in self.search_ids(query)]
@@ -0,0 +1,380 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+MATCHER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'medical_matcher')
+sys.path.insert(0, MATCHER_DIR)
+
+from core import CatalogService  # noqa: E402
+from data.catalog import SNAPSHOT_PATH, Catalog, load_catalog  # noqa: E402
+from models.group_table import GroupTable  # noqa: E402
+from models.string_table import StringTable  # noqa: E402
+from utils.balance_engine import BalanceEngine  # noqa: E402
+from utils.data_handler import DataHandler  # noqa: E402
+from utils.disease_index import DiseaseIndex  # noqa: E402
+from utils.group_matcher import GroupMatcher  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+DEFAULT_THRESHOLD = 0.25  # 最小耗时比基线慢 25% 以上视为退化（最小值受机器负载影响最小）
+NOISE_FLOOR_MS = 0.05     # 差值小于此值的不计（计时精度以内的抖动）
+
+DISEASE_QUERIES = ('骨折', '肿瘤', '囊肿', 'gz', 'zl', '恶性')
+SURGERY_QUERIES = ('切除', '置换', '内固定', '腹腔镜', 'qc', '胆囊')
+MATCH_CASES = 2000
+
+
+class Context:
+    """基准测试共用的数据，只在第一次用到时加载"""
+
+    def __init__(self):
+        self._handler = None
+        self._core = None
+        self._cases = None
+
+    @property
+    def handler(self):
+        if self._handler is None:
+            self._handler = DataHandler()
+        return self._handler
+
+    @property
+    def core(self):
+        if self._core is None:
+            self._core = CatalogService(self.handler)
+        return self._core
+
+    @property
+    def match_cases(self):
+        """
+        由目录生成的合成病案：(病种编码, 用户输入)
+        大部分取自某个组合的手术编码（可匹配），其余为随机编码组合或空输入
+        """
+        if self._cases is None:
+            rng = random.Random(20240501)
+            groups = self.handler.groups
+            # 只有带其他手术的组合能被 match_group 匹配到
+            matchable = [group for group in groups if group.other_surgeries]
+            all_codes = sorted({code for group in matchable for code in group.other_surgeries if code})
+            cases = []
+            for _ in range(MATCH_CASES):
+                kind = rng.random()
+                if kind < 0.7:
+                    group = rng.choice(matchable)
+                    others = rng.sample(group.other_surgeries, rng.randint(1, len(group.other_surgeries)))
+                    others.append(rng.choice(all_codes))
+                    user_input = {'main_surgery': '/'.join(group.main_surgeries),
+                                  'other_surgeries': '/'.join(others)}
+                else:
+                    group = groups[rng.randrange(len(groups))]
+                    if kind < 0.9:
+                        user_input = {'main_surgery': rng.choice(all_codes),
+                                      'other_surgeries': '/'.join(rng.sample(all_codes, 3))}
+                    else:
+                        user_input = {'main_surgery': '', 'other_surgeries': ''}
+                cases.append((group.disease_code, user_input))
+            self._cases = cases
+        return self._cases
+
+
+def bench_catalog_load(ctx):
+    """打开目录快照并读出全部行"""
+    def run():
+        catalog = load_catalog()
+        for _ in catalog.rows():
+            pass
+        catalog.close()
+    return None, run
+
+
+def bench_group_table_build(ctx):
+    """由目录行构建按列存储的组合表（独立的字符串表，不受共享表预热影响）"""
+    catalog = Catalog.open(SNAPSHOT_PATH)
+    rows = list(catalog.rows())
+    return catalog.close, lambda: GroupTable.from_rows(rows, StringTable())
+
+
+def bench_disease_index_build(ctx):
+    groups = ctx.handler.groups
+    return None, lambda: DiseaseIndex(groups)
+
+
+def bench_disease_filter(ctx):
+    """病种列表的搜索过滤（子串 + 拼音/首字母），与主窗口的病种搜索一致"""
+    core = ctx.core
+    core.data_handler.pinyin_index  # 拼音索引只加载一次，不计入
+
+    def run():
+        for query in DISEASE_QUERIES:
+            core.diseases(query)
+    return None, run
+
+
+def bench_group_filter(ctx):
+    """按分值范围、基层病种、操作数筛选组合"""
+    handler = ctx.handler
+
+    def run():
+        handler.filter_groups(min_score=500, max_score=2000)
+        handler.filter_groups(is_basic=True)
+        handler.filter_groups(operation_count=(2, 3))
+        handler.filter_groups(min_score=100, is_basic=False, operation_count=1)
+    return None, run
+
+
+def bench_surgery_search(ctx):
+    """手术名称搜索（倒排索引 + 拼音），索引构建另行计时"""
+    handler = ctx.handler
+    handler.surgery_name_index
+    handler.pinyin_index
+
+    def run():
+        for query in SURGERY_QUERIES:
+            handler.search_surgeries(query)
+    return None, run
+
+
+def bench_surgery_index_build(ctx):
+    from utils.search_index import SurgeryNameIndex
+    groups = ctx.handler.groups
+    return None, lambda: SurgeryNameIndex(groups)
+
+
+def bench_index_cache_load(ctx):
+    """从磁盘缓存（临时目录）加载病种索引、手术名称索引、拼音索引和编码位集，与各自的构建耗时对比"""
+    from data.index_cache import IndexCache
+    handler = ctx.handler
+    tmpdir = tempfile.TemporaryDirectory()
+    cache = IndexCache(handler.content_hash, tmpdir.name)
+    indexes = [handler.disease_index, handler.surgery_name_index, handler.pinyin_index, handler.matcher]
+    for index in indexes:
+        cache.save(index.CACHE_NAME, index.to_arrays())
+    groups = handler.groups
+
+    def run():
+        for index in indexes:
+            type(index).from_arrays(cache.load(index.CACHE_NAME), groups)
+    return tmpdir.cleanup, run
+
+
+def bench_match_group(ctx):
+    """对合成病案逐条匹配最佳组合"""
+    matcher = GroupMatcher(ctx.handler.groups)
+    cases = ctx.match_cases
+
+    def run():
+        for disease_code, user_input in cases:
+            matcher.best(user_input, disease_code=disease_code)
+    return None, run
+
+
+def bench_matcher_build(ctx):
+    groups = ctx.handler.groups
+    return None, lambda: GroupMatcher(groups)
+
+
+def bench_balance_update(ctx):
+    """参数变化时重新计算全部组合的盈亏平衡值（不使用缓存）"""
+    handler = ctx.handler
+    engine = BalanceEngine(handler.groups, handler.is_basic_level_disease, cache_size=0)
+    params = [(8 + i * 0.1, 10 + i * 0.1, 0.889) for i in range(10)]
+
+    def run():
+        for rural, worker, weight in params:
+            engine.update(rural, worker, weight)
+    return None, run
+
+
+def bench_balance_switch(ctx):
+    """在几组用过的月度参数之间来回切换（命中缓存）"""
+    handler = ctx.handler
+    engine = BalanceEngine(handler.groups, handler.is_basic_level_disease, version=handler.fingerprint)
+    params = [(8 + i * 0.1, 10 + i * 0.1, 0.889) for i in range(3)] * 4
+    for rural, worker, weight in params:
+        engine.update(rural, worker, weight)
+
+    def run():
+        for rural, worker, weight in params:
+            engine.update(rural, worker, weight)
+    return None, run
+
+
+def bench_excel_convert(ctx):
+    """把目录 Excel 编译为 py、二进制快照和 SQLite 三种格式（输出到临时目录）"""
+    import pandas as pd
+    from excel_to_dict import compile_catalog
+
+    tmpdir = tempfile.TemporaryDirectory()
+    excel_file = os.path.join(tmpdir.name, 'catalog.xlsx')
+    catalog = load_catalog()
+    pd.DataFrame(list(catalog.rows())).to_excel(excel_file, index=False)
+    catalog.close()
+    outputs = {fmt: os.path.join(tmpdir.name, f'surgery_data.{ext}')
+               for fmt, ext in (('py', 'py'), ('bin', 'bin'), ('sqlite', 'db'))}
+    return tmpdir.cleanup, lambda: compile_catalog(excel_file, ('py', 'bin', 'sqlite'), outputs)
+
+
+def _import_benchmark(target):
+    """新进程导入 target 的耗时（-X importtime 统计的累计值）"""
+    def setup(ctx):
+        from startup_budget import measure
+        return None, lambda: measure(target, runs=1)[0] / 1000
+    return setup
+
+
+# 名称 -> (准备函数, 重复次数)；准备函数返回 (清理函数或None, 被计时的函数)
+BENCHMARKS = {
+    'catalog_load': (bench_catalog_load, 50),
+    'group_table_build': (bench_group_table_build, 5),
+    'disease_index_build': (bench_disease_index_build, 10),
+    'disease_filter': (bench_disease_filter, 50),
+    'group_filter': (bench_group_filter, 50),
+    'surgery_index_build': (bench_surgery_index_build, 5),
+    'surgery_search': (bench_surgery_search, 50),
+    'matcher_build': (bench_matcher_build, 5),
+    'index_cache_load': (bench_index_cache_load, 10),
+    'match_group': (bench_match_group, 10),
+    'balance_update': (bench_balance_update, 50),
+    'balance_switch': (bench_balance_switch, 50),
+    'excel_convert': (bench_excel_convert, 3),
+    'startup_import': (_import_benchmark('gui.home_page'), 5),
+    'core_import': (_import_benchmark('core'), 5),
+}
+
+
+def run_benchmark(ctx, name, repeat=None):
+    """
+    运行一项基准测试
+    Returns:
+        dict: {'median_ms', 'min_ms', 'repeat'}；计时函数返回数值时以该值为一次的耗时（毫秒）
+    """
+    setup, default_repeat = BENCHMARKS[name]
+    cleanup, func = setup(ctx)
+    try:
+        func()  # 预热
+        timings = []
+        for _ in range(repeat or default_repeat):
+            start = time.perf_counter()
+            value = func()
+            elapsed = (time.perf_counter() - start) * 1000
+            timings.append(value if isinstance(value, float) else elapsed)
+    finally:
+        if cleanup is not None:
+            cleanup()
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'repeat': len(timings),
+    }
+
+
+def calibrate(repeat=15):
+    """
+    固定的纯 Python 计算量的最小耗时（毫秒）
+    共享机器/降频时所有项目会一起变慢，比较前按校准耗时之比换算基线
+    """
+    def work():
+        table = {}
+        for i in range(200000):
+            table[i & 1023] = table.get(i & 1023, 0) + i
+        return sorted(str(value) for value in table.values())
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        work()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(min(timings), 3)
+
+
+def compare(results, baseline, threshold, scale=1.0):
+    """
+    返回退化的项目：[(名称, 换算后的基线最小耗时, 当前最小耗时, 变化比例)]
+    Args:
+        scale: 本机当前速度相对基线的换算系数（当前校准耗时 / 基线校准耗时）
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        before, after = base['min_ms'] * scale, result['min_ms']
+        if after - before > NOISE_FLOOR_MS and after > before * (1 + threshold):
+            regressions.append((name, before, after, after / before - 1))
+    return regressions
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="运行性能基准测试（无需图形界面），与基线比较")
+    parser.add_argument('names', nargs='*', help="要运行的项目，默认全部：" + ', '.join(BENCHMARKS))
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="基线文件路径")
+    parser.add_argument('--save', action='store_true', help="把本次结果写入基线文件")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"退化阈值（比例），默认 {DEFAULT_THRESHOLD}")
+    parser.add_argument('--repeat', type=int, help="每项重复次数，默认按项目设定")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知项目：{', '.join(unknown)}")
+
+    baseline, base_calibration = {}, None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            data = json.load(f)
+        baseline = data.get('results', {})
+        base_calibration = data.get('calibration_ms')
+
+    calibration = calibrate()
+    scale = calibration / base_calibration if base_calibration else 1.0
+    print(f"校准耗时 {calibration:.3f} ms，基线按 ×{scale:.2f} 换算")
+
+    ctx = Context()
+    results = {}
+    print(f"{'项目':<22}{'中位数(ms)':>12}{'最小(ms)':>12}{'基线最小(ms)':>14}{'变化':>9}")
+    for name in args.names or BENCHMARKS:
+        result = results[name] = run_benchmark(ctx, name, args.repeat)
+        base = baseline.get(name)
+        change = ''
+        base_text = ''
+        if base:
+            base_text = f"{base['min_ms'] * scale:.3f}"
+            change = f"{result['min_ms'] / (base['min_ms'] * scale) - 1:+.0%}"
+        print(f"{name:<22}{result['median_ms']:>12.3f}{result['min_ms']:>12.3f}{base_text:>14}{change:>9}")
+
+    regressions = compare(results, baseline, args.threshold, scale)
+    for name, before, after, ratio in regressions:
+        print(f"退化：{name} {before:.3f} ms -> {after:.3f} ms（{ratio:+.0%}，阈值 {args.threshold:.0%}）")
+
+    if args.save:
+        # 只运行部分项目时保留基线中其余项目的结果（换算到本次的校准耗时）
+        saved = {name: {**base, 'median_ms': round(base['median_ms'] * scale, 3),
+                        'min_ms': round(base['min_ms'] * scale, 3)}
+                 for name, base in baseline.items()}
+        saved.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'calibration_ms': calibration, 'results': saved},
+                      f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"基线已写入 {args.baseline}")
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
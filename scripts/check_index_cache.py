@@ -0,0 +1,126 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+MATCHER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'medical_matcher')
+sys.path.insert(0, MATCHER_DIR)
+
+from data.index_cache import KEEP_KEYS, IndexCache, open_arrays, save_arrays  # noqa: E402
+from utils.data_handler import DataHandler  # noqa: E402
+
+# 索引缓存自检：每种派生索引构建后保存、重新加载，比较写入与读出的数组，以及加载后的索引再次序列化的结果；
+# 再检查截断、改写文件头、哈希不一致的文件被拒绝（返回None，由调用方重建），以及旧文件的清理规则。
+
+
+def _plain(value):
+    """把数组、memoryview 转为列表，便于比较"""
+    if isinstance(value, list):
+        return value
+    return memoryview(value).tolist()
+
+
+def _same_arrays(expected, actual):
+    return all(name in actual and _plain(expected[name]) == _plain(actual[name]) for name in expected)
+
+
+def check_round_trip(handler, directory):
+    """Returns: 失败信息列表"""
+    failures = []
+    cache = IndexCache(handler.content_hash, directory)
+    for name, (index_class, build) in DataHandler._INDEXES.items():
+        index = getattr(handler, build)()
+        if not len(index):
+            print(f"跳过 {name}：索引为空（未安装可选依赖）")
+            continue
+        expected = index.to_arrays()
+        if not cache.save(index_class.CACHE_NAME, expected):
+            failures.append(f"{name}: 写入失败")
+            continue
+        arrays = cache.load(index_class.CACHE_NAME)
+        if arrays is None:
+            failures.append(f"{name}: 读取失败")
+            continue
+        for array_name in expected:
+            if _plain(expected[array_name]) != _plain(arrays[array_name]):
+                failures.append(f"{name}: 数组 {array_name} 与写入的不一致")
+        loaded = index_class.from_arrays(arrays, handler.groups)
+        if not _same_arrays(expected, loaded.to_arrays()):
+            failures.append(f"{name}: 加载后的索引再次序列化结果不一致")
+        print(f"{name}: {len(expected)} 个数组，往返一致")
+    return failures
+
+
+def check_corruption(directory):
+    """截断、改写文件头、哈希不一致的文件都不能被读取"""
+    failures = []
+    from array import array
+    arrays = {'ids': array('I', range(1000)), 'names': ['甲', '乙', ''], 'scores': array('d', [1.5, 2.5])}
+    cache = IndexCache('a' * 40, directory)
+    cache.save('probe.1', arrays)
+    path = cache.path('probe.1')
+    with open(path, 'rb') as f:
+        data = f.read()
+    loaded = open_arrays(path)
+    if not _same_arrays(arrays, loaded):
+        failures.append("探针文件往返不一致")
+    del loaded  # 释放映射后再改写文件（Windows 上映射中的文件不能改写）
+
+    cases = {
+        '截断到文件头之内': data[:16],
+        '截断数组数据': data[:len(data) - 1000],
+        '改写 MAGIC': b'XXXXXXXX' + data[8:],
+        '空文件': b'',
+    }
+    for label, content in cases.items():
+        with open(path, 'wb') as f:
+            f.write(content)
+        if cache.load('probe.1') is not None:
+            failures.append(f"{label}：损坏的文件被读取")
+    save_arrays(path, 'b' * 40, arrays)
+    if cache.load('probe.1') is not None:
+        failures.append("哈希不一致的文件被读取")
+    print(f"损坏文件：{len(cases) + 1} 种情况均被拒绝" if not failures else "损坏文件检查失败")
+    return failures
+
+
+def check_pruning(directory):
+    """同一版本保留最近使用的 KEEP_KEYS 个哈希，其他版本的文件删除"""
+    failures = []
+    from array import array
+    arrays = {'ids': array('I', [1, 2, 3])}
+    old_version = IndexCache('0' * 40, directory)
+    old_version.save('prune.0', arrays)
+    keys = [str(i) * 40 for i in range(1, KEEP_KEYS + 2)]
+    for i, key in enumerate(keys):
+        cache = IndexCache(key, directory)
+        cache.save('prune.1', arrays)
+        os.utime(cache.path('prune.1'), (1000 + i, 1000 + i))  # 依次更晚使用
+    if old_version.has('prune.0'):
+        failures.append("其他版本的文件未被删除")
+    kept = [key for key in keys if IndexCache(key, directory).has('prune.1')]
+    if kept != keys[-KEEP_KEYS:]:
+        failures.append(f"保留的哈希不符：{len(kept)} 个")
+    print(f"清理：保留最近的 {len(kept)} 个哈希" if not failures else "清理检查失败")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="检查索引缓存的写入、读取与损坏处理（在临时目录中进行）")
+    parser.parse_args(argv)
+    directory = tempfile.mkdtemp(prefix='dip-index-cache-')
+    try:
+        handler = DataHandler(cache_dir=None)
+        failures = check_round_trip(handler, directory)
+        failures += check_corruption(directory)
+        failures += check_pruning(directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    for failure in failures:
+        print(f"失败：{failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
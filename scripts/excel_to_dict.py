@@ -1,59 +1,217 @@
-import pandas as pd
+import argparse
+import json
 import os
-from tkinter import filedialog
-import tkinter as tk
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+MATCHER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'medical_matcher')
+sys.path.insert(0, MATCHER_DIR)
+
+from data.catalog import Catalog, SNAPSHOT_PATH, SOURCE_EXCEL, SOURCE_MODULE, source_fingerprint  # noqa: E402
+from data.sqlite_store import STORE_PATH, CatalogStore  # noqa: E402
+
+# 编码列一律按文本处理（Excel 中可能是数字，如 86.0701）
+CODE_COLUMNS = ('DIP分组编码', '病种编码', '主要手术编码', '其他手术编码')
+
+DEFAULT_OUTPUTS = {
+    'py': SOURCE_MODULE,
+    'bin': SNAPSHOT_PATH,
+    'sqlite': STORE_PATH,
+}
+
+
+def _read_excel(excel_file):
+    # python-calamine 解析大表比 openpyxl 快数倍，未安装（或 pandas 版本不支持）时退回默认引擎
+    try:
+        return pd.read_excel(excel_file, engine='calamine')
+    except (ImportError, ValueError):
+        return pd.read_excel(excel_file)
+
+
+def read_catalog_excel(excel_file):
+    """读取目录 Excel 并按列批量规范化"""
+    df = _read_excel(excel_file)
+    df.columns = [str(column).strip() for column in df.columns]
+
+    for column in df.columns:
+        values = df[column]
+        missing = values.isna()
+        if column not in CODE_COLUMNS and pd.api.types.is_numeric_dtype(values):
+            # 没有缺失且都是整数的数值列转成整数，其余保持浮点
+            if not missing.any() and np.array_equal(values, np.floor(values)):
+                df[column] = values.astype('int64')
+            continue
+        text = values.astype(str).str.strip()
+        text[missing] = ''
+        df[column] = text
+    return df
+
+
+def _literal(value):
+    """Python 字面量；字符串用 JSON 转义（同样是合法的 Python 字符串）"""
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if value is None or value != value:
+        return '""'
+    return repr(value.item() if hasattr(value, 'item') else value)
+
+
+def write_module(df, output_path):
+    """生成 surgery_data.py"""
+    columns = list(df.columns)
+    keys = [f'        {json.dumps(column, ensure_ascii=False)}: ' for column in columns]
+    values = [[_literal(value) for value in df[column].tolist()] for column in columns]
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("# 预定义的手术数据\n")
+        f.write("SURGERY_DATA = [\n")
+        for row in zip(*values):
+            f.write("    {\n")
+            f.writelines(f"{key}{value},\n" for key, value in zip(keys, row))
+            f.write("    },\n")
+        f.write("]\n")
+    os.replace(tmp_path, output_path)
+
+
+def build_catalog(df, fingerprint=''):
+    """用 factorize 批量构建字符串表，生成按列存储的目录"""
+    strings = []
+    string_ids = {}
+
+    def intern(text):
+        sid = string_ids.get(text)
+        if sid is None:
+            sid = string_ids[text] = len(strings)
+            strings.append(text)
+        return sid
+
+    for column in df.columns:
+        intern(column)
+
+    arrays = []
+    for column in df.columns:
+        values = df[column]
+        if values.dtype.kind == 'i':
+            arrays.append(memoryview(values.to_numpy(dtype=np.int64)).cast('B').cast('q'))
+        elif values.dtype.kind == 'f':
+            arrays.append(memoryview(values.to_numpy(dtype=np.float64)).cast('B').cast('d'))
+        else:
+            codes, uniques = pd.factorize(values)
+            ids = np.array([intern(text) for text in uniques], dtype=np.uint32)
+            arrays.append(memoryview(ids[codes]).cast('B').cast('I'))
+    return Catalog(df.columns, arrays, strings, fingerprint)
+
+
+def _output_fingerprint(output_path, default_path, excel_file):
+    # 写到默认位置时使用默认源文件的指纹，避免启动时再次重建
+    if os.path.abspath(output_path) == os.path.abspath(default_path):
+        sources = [path for path in (SOURCE_MODULE, SOURCE_EXCEL) if os.path.exists(path)]
+    else:
+        sources = [excel_file]
+    return source_fingerprint(sources)
+
+
+def write_snapshot(df, output_path, excel_file):
+    build_catalog(df, _output_fingerprint(output_path, SNAPSHOT_PATH, excel_file)).save(output_path)
+
+
+def write_sqlite(df, output_path, excel_file):
+    """生成 SQLite 目录库（组合、病种、手术分表，带索引和 FTS5 全文索引）"""
+    fingerprint = _output_fingerprint(output_path, STORE_PATH, excel_file)
+    content_hash = build_catalog(df, fingerprint).content_hash()
+    CatalogStore.build(output_path, df.to_dict('records'), fingerprint, content_hash).close()
+
+
+WRITERS = {
+    'py': lambda df, path, excel_file: write_module(df, path),
+    'bin': write_snapshot,
+    'sqlite': write_sqlite,
+}
+
+
+def _is_default_output(outputs, fmt):
+    path = outputs.get(fmt) or DEFAULT_OUTPUTS[fmt]
+    return os.path.abspath(path) == os.path.abspath(DEFAULT_OUTPUTS[fmt])
+
+
+def compile_catalog(excel_file, formats=('py',), outputs=None):
+    """
+    编译目录 Excel
+    Args:
+        excel_file: Excel 文件路径
+        formats: 输出格式，可选 py（surgery_data.py）、bin（二进制快照）、sqlite；
+                 bin、sqlite 写到默认位置时自动包含 py
+        outputs: {格式: 输出路径}，未指定的使用默认路径
+    Returns:
+        (dict, int): 写出的文件 {格式: 输出路径} 和目录行数
+    """
+    outputs = dict(outputs or {})
+    formats = list(formats)
+    # 默认位置的快照/目录库以默认 surgery_data.py 的指纹为准，启动时据此判断是否过期，
+    # 因此写到默认位置时 surgery_data.py 也必须一并更新，否则新数据会带着旧源文件的指纹
+    if any(fmt != 'py' and _is_default_output(outputs, fmt) for fmt in formats):
+        if not _is_default_output(outputs, 'py'):
+            raise ValueError("快照或目录库写到默认位置时，surgery_data.py 也要写到默认位置")
+        if 'py' not in formats:
+            formats.append('py')
+    df = read_catalog_excel(excel_file)
+    # py 要先写，默认位置的快照指纹依赖 surgery_data.py 的修改时间
+    written = {}
+    for fmt in sorted(formats, key=lambda fmt: fmt != 'py'):
+        path = outputs.get(fmt) or DEFAULT_OUTPUTS[fmt]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        WRITERS[fmt](df, path, excel_file)
+        written[fmt] = path
+    return written, len(df)
+
+
+def choose_excel_file():
+    from tkinter import filedialog
+    import tkinter as tk
 
-def convert_excel_to_dict():
     # 创建临时的 root 窗口
     root = tk.Tk()
     root.withdraw()  # 隐藏主窗口
-    
+
     # 打开文件选择对话框
     excel_file = filedialog.askopenfilename(
         title="选择Excel文件",
         filetypes=[("Excel files", "*.xlsx")]
     )
-    
+    root.destroy()
+    return excel_file
+
+
+def convert_excel_to_dict(argv=None):
+    parser = argparse.ArgumentParser(description="把目录 Excel 编译为 surgery_data.py、二进制快照或 SQLite 数据库")
+    parser.add_argument('excel', nargs='?', help="目录 Excel 文件，不指定时弹出文件选择框")
+    parser.add_argument('-f', '--format', action='append', choices=sorted(WRITERS),
+                        help="输出格式，可重复指定，默认为 py")
+    parser.add_argument('--py-output', help="surgery_data.py 输出路径")
+    parser.add_argument('--bin-output', help="二进制快照输出路径")
+    parser.add_argument('--sqlite-output', help="SQLite 数据库输出路径")
+    args = parser.parse_args(argv)
+
+    excel_file = args.excel or choose_excel_file()
     if not excel_file:
         print("未选择文件")
         return
-    
+
+    outputs = {'py': args.py_output, 'bin': args.bin_output, 'sqlite': args.sqlite_output}
     try:
-        # 读取Excel文件
-        df = pd.read_excel(excel_file)
-        
-        # 获取输出路径
-        output_path = os.path.join(
-            os.path.dirname(os.path.dirname(__file__)), 
-            'medical_matcher', 'data', 'surgery_data.py'
-        )
-        
-        # 确保输出目录存在
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # 写入数据
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("# 预定义的手术数据\n")
-            f.write("SURGERY_DATA = [\n")
-            
-            for _, row in df.iterrows():
-                f.write("    {\n")
-                for column in df.columns:
-                    value = row[column]
-                    if pd.isna(value):
-                        value = ""
-                    if isinstance(value, str):
-                        f.write(f'        "{column}": "{value}",\n')
-                    else:
-                        f.write(f'        "{column}": {value},\n')
-                f.write("    },\n")
-            
-            f.write("]\n")
-        
-        print(f"数据已成功写入到 {output_path}")
-        
+        start = time.perf_counter()
+        written, count = compile_catalog(excel_file, args.format or ['py'], outputs)
+        elapsed = time.perf_counter() - start
+        for fmt, path in written.items():
+            print(f"数据已成功写入到 {path}")
+        print(f"共 {count} 行，耗时 {elapsed:.2f}s")
     except Exception as e:
         print(f"发生错误：{str(e)}")
 
+
 if __name__ == "__main__":
-    convert_excel_to_dict() 
\ No newline at end of file
+    convert_excel_to_dict()
@@ -0,0 +1,116 @@
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+
+def lookup_paths(base, count=200, seed=1):
+    """按目录生成一组查询 URL：病种搜索、病种详情、组合列表、手术搜索、盈亏平衡值"""
+    host, port = base
+    conn = http.client.HTTPConnection(host, port)
+    conn.request('GET', '/diseases')
+    names = [item['name'] for item in json.loads(conn.getresponse().read())['items']]
+    conn.close()
+
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        name = quote(rng.choice(names))
+        paths.append(rng.choice((
+            f'/diseases?q={quote(rng.choice(("gz", "骨折", "肿瘤", "zl", "囊肿")))}',
+            f'/diseases/{name}',
+            f'/diseases/{name}/groups?sort=score&reverse=1',
+            f'/combinations?disease={name}&counts=1,2',
+            f'/surgeries?q={quote(rng.choice(("胆囊", "置换", "内固定")))}&limit=20',
+            f'/balance?score={rng.randint(50, 5000)}&disease={name}&rural=8&worker=10&weight=0.889',
+        )))
+    return paths
+
+
+def worker(base, paths, deadline, revalidate, interval, latencies, statuses, lock):
+    """
+    保持一个连接，循环发送请求直到 deadline
+    Args:
+        interval: 请求间隔（秒），为 0 时不限速；按计划时间计算延迟，排队等待也计入
+    """
+    conn = http.client.HTTPConnection(*base)
+    etag = None
+    local_latencies = []
+    local_statuses = {}
+    index = 0
+    next_time = time.perf_counter() + random.random() * interval
+    while next_time < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        headers = {'If-None-Match': etag} if revalidate and etag else {}
+        if interval:
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            start = next_time
+            next_time += interval
+        else:
+            start = next_time = time.perf_counter()
+        conn.request('GET', path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        local_latencies.append((time.perf_counter() - start) * 1000)
+        local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+        etag = response.getheader('ETag') or etag
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        for status, count in local_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对本地 HTTP 服务做查询压测，输出吞吐量和延迟分位数")
+    parser.add_argument('--url', default='http://127.0.0.1:8765', help="服务地址")
+    parser.add_argument('-c', '--connections', type=int, default=8, help="并发连接数（每个连接一个线程）")
+    parser.add_argument('-d', '--duration', type=float, default=10, help="持续时间（秒）")
+    parser.add_argument('-r', '--rate', type=float, default=0, help="总请求速率（个/秒），默认不限速")
+    parser.add_argument('--revalidate', action='store_true', help="带 If-None-Match 请求（测 304 路径）")
+    parser.add_argument('--p99-budget', type=float, default=10, help="p99 延迟预算（毫秒），超出时以非零状态退出")
+    args = parser.parse_args(argv)
+
+    url = urlsplit(args.url)
+    base = (url.hostname, url.port or 80)
+    paths = lookup_paths(base)
+
+    latencies, statuses, lock = [], {}, threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    interval = args.connections / args.rate if args.rate else 0
+    threads = [threading.Thread(target=worker, args=(base, paths, deadline, args.revalidate, interval,
+                                                     latencies, statuses, lock))
+               for _ in range(args.connections)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    p99 = percentile(latencies, 0.99)
+    print(f"请求 {len(latencies)} 个，{len(latencies) / elapsed:.0f} 个/秒，连接数 {args.connections}")
+    print("状态码：" + "，".join(f"{status} × {count}" for status, count in sorted(statuses.items())))
+    print(f"延迟(ms)：平均 {statistics.mean(latencies):.2f}，p50 {percentile(latencies, 0.5):.2f}，"
+          f"p95 {percentile(latencies, 0.95):.2f}，p99 {p99:.2f}，最大 {max(latencies):.2f}")
+    if p99 > args.p99_budget:
+        print(f"不通过：p99 超出预算 {args.p99_budget:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
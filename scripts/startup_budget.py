@@ -0,0 +1,70 @@
+import argparse
+import os
+import subprocess
+import sys
+
+MATCHER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'medical_matcher')
+
+# 首页显示前允许的导入耗时（毫秒），以及不允许在启动时导入的重型模块
+DEFAULT_BUDGET_MS = 150
+DEFAULT_TARGET = 'gui.home_page'
+FORBIDDEN = ('pandas', 'matplotlib', 'numpy')
+
+
+def measure(target, runs=3):
+    """
+    用 -X importtime 在子进程中导入 target，返回耗时最少的一次结果
+    Returns:
+        (总耗时微秒, [(自身微秒, 累计微秒, 层级, 模块名)])
+    """
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+            cwd=MATCHER_DIR, capture_output=True, text=True, check=True,
+        )
+        records = []
+        for line in result.stderr.splitlines():
+            # 格式：import time: self [us] | cumulative | imported package
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            depth = (len(name) - len(name.lstrip())) // 2
+            records.append((int(self_us), int(cumulative_us), depth, name.strip()))
+        # 顶层模块的累计耗时之和即为整个导入的耗时
+        total = sum(cumulative for _, cumulative, depth, _ in records if depth == 0)
+        if best is None or total < best[0]:
+            best = (total, records)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量启动时的导入耗时，检查是否超出预算")
+    parser.add_argument('--target', default=DEFAULT_TARGET, help=f"要导入的模块，默认为 {DEFAULT_TARGET}")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS, help="耗时预算（毫秒）")
+    parser.add_argument('--runs', type=int, default=3, help="测量次数，取最快的一次")
+    parser.add_argument('--forbid', nargs='*', default=list(FORBIDDEN),
+                        help="启动时不允许导入的模块，默认为 " + ' '.join(FORBIDDEN))
+    parser.add_argument('--top', type=int, default=10, help="列出自身耗时最多的模块个数")
+    args = parser.parse_args(argv)
+
+    total, records = measure(args.target, args.runs)
+    print(f"导入 {args.target}：{total / 1000:.1f} ms（预算 {args.budget:.0f} ms），共 {len(records)} 个模块")
+    print(f"{'自身(ms)':>10} {'累计(ms)':>10}  模块")
+    for self_us, cumulative_us, depth, name in sorted(records, reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>10.1f} {cumulative_us / 1000:>10.1f}  {name}")
+
+    problems = []
+    loaded = {name.split('.')[0] for _, _, _, name in records}
+    heavy = [name for name in args.forbid if name in loaded]
+    if heavy:
+        problems.append(f"启动时导入了 {', '.join(heavy)}")
+    if total / 1000 > args.budget:
+        problems.append(f"导入耗时超出预算 {total / 1000 - args.budget:.1f} ms")
+    for problem in problems:
+        print(f"不通过：{problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())